@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import DBLibrary as db
 import Helper as h
+import ImageStore
 import UpdateInventory
 import Help
 import os
@@ -195,11 +196,15 @@ def addInventoryPage(window, personID, itemID=None):
                 else:
                     raise ValueError("Missing image.")
                 db.addInventoryItem(name, desc, category, cost, price, qty, threshold, packages, imageBlob)
+                ImageStore.generateThumbnails(imageBlob)
                 messagebox.showinfo("Success", f"'{name}' added successfully!")
             else:
                 if image:
                     imageBlob = h.convertImageToBlob(image)
                 db.updateInventoryItem(itemID, name, desc, category, cost, price, qty, threshold, packagesCopy, imageBlob)
+                if imageBlob:
+                    ImageStore.generateThumbnails(imageBlob)
+                    h.invalidateImageCache(itemID)
                 messagebox.showinfo("Success", f"'{name}' updated successfully!")
             back()
 
@@ -0,0 +1,294 @@
+import html
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import DBLibrary as db
+import Reports
+
+# Sales analytics for managers: margin, sales by category, top sellers, average order
+# value and trailing revenue trends. The order lines of the period are loaded in one
+# query into a column per field (see DBLibrary.iterOrderLineBatches), and every figure
+# is computed with NumPy group-bys (np.unique + np.bincount) and cumulative sums rather
+# than Python loops, so a period with millions of lines takes seconds. Reports are
+# built on a background thread and written with Reports.writeReport.
+
+TRAILING_WINDOWS = (7, 30)
+TOP_SELLER_COUNT = 25
+
+# Field order of the rows from DBLibrary.iterOrderLineBatches
+LINE_COLUMNS = ("orderID", "day", "inventoryID", "quantity", "revenue", "cost", "tax", "noPrice", "noCost")
+INTEGER_COLUMNS = ("orderID", "day", "inventoryID", "noPrice", "noCost")
+# Lines of items no longer in the catalog
+UNKNOWN_CATEGORY = -1
+
+# One worker keeps analytics off the Tk thread without competing with checkout
+analyticsExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Analytics")
+
+SUMMARY_ROW = "    <tr><td>{}</td><td>{}</td></tr>\n".format
+
+CATEGORY_ROW = "    <tr><td>{}</td><td>{}</td><td>{}</td><td>${:.2f}</td><td>${:.2f}</td><td>${:.2f}</td><td>{:.1f}%</td><td>{:.1f}%</td></tr>\n".format
+
+ITEM_ROW = "    <tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>${:.2f}</td><td>${:.2f}</td><td>{:.1f}%</td></tr>\n".format
+
+TREND_ROW = "    <tr><td>{}</td><td>{}</td><td>${:.2f}</td><td>${:.2f}</td><td>${:.2f}</td><td>${:.2f}</td><td>${:.2f}</td></tr>\n".format
+
+def loadOrderLines(startDate, endDate):
+    """
+    Loads every order line of a range of days into NumPy columns.
+
+    Args:
+        startDate (datetime.date): First day of the range; "day" counts from it.
+        endDate (datetime.date): Last day of the range (inclusive).
+
+    Returns:
+        dict: Column name (see LINE_COLUMNS) -> array with one entry per line.
+    """
+    batches = [np.array(rows, dtype=np.float64) for rows in db.iterOrderLineBatches(startDate, endDate)]
+    table = np.concatenate(batches) if batches else np.empty((0, len(LINE_COLUMNS)))
+    columns = {name: table[:, index] for index, name in enumerate(LINE_COLUMNS)}
+    for name in INTEGER_COLUMNS:
+        columns[name] = columns[name].astype(np.int64)
+    return columns
+
+def groupSums(keys, **values):
+    """
+    Sums each array of values per distinct key.
+
+    Returns:
+        tuple: (sorted distinct keys, group index of each entry, {name: sums per key}).
+    """
+    uniqueKeys, groups = np.unique(keys, return_inverse=True)
+    sums = {name: np.bincount(groups, weights=value, minlength=uniqueKeys.size) for name, value in values.items()}
+    return uniqueKeys, groups, sums
+
+def distinctValues(values):
+    """
+    Returns the distinct values of an integer array, sorted. Sorting is several times
+    faster than np.unique's hash table for arrays of millions of IDs.
+    """
+    values = np.sort(values)
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+def distinctOrders(groups, orderIDs, groupCount):
+    """
+    Counts the distinct orders in each group.
+    """
+    # (group, order) packed into one integer key, as 2-D uniqueness checks are slow
+    base = int(orderIDs.max()) + 1
+    pairs = distinctValues(groups * base + orderIDs)
+    return np.bincount(pairs // base, minlength=groupCount)
+
+def categoryColumn(inventoryIDs, items):
+    """
+    Maps each line's item to its category through a lookup array indexed by InventoryID.
+    """
+    lookup = np.full(max(max(items, default=0), int(inventoryIDs.max())) + 1, UNKNOWN_CATEGORY, dtype=np.int64)
+    for inventoryID, (_, categoryID) in items.items():
+        if categoryID is not None:
+            lookup[inventoryID] = categoryID
+    return lookup[inventoryIDs]
+
+def marginPercent(margin, revenue):
+    """
+    Margin as a percentage of revenue, 0 where there was no revenue.
+    """
+    return np.divide(margin * 100, revenue, out=np.zeros_like(margin), where=revenue != 0)
+
+def computeAnalytics(startDate, endDate):
+    """
+    Computes the sales analytics of a range of days.
+
+    Args:
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range (inclusive).
+
+    Returns:
+        dict: {"totals", "categories", "topSellers", "trend"}, or None if nothing sold
+            in the range. Revenue is after discounts and before tax; margin is revenue
+            less the cost recorded on each line. Lines with no recorded price or cost
+            count 0 for it and are tallied in totals["LinesWithoutPrice"] and
+            totals["LinesWithoutCost"].
+    """
+    # Lines from before the range are loaded only to fill the first trailing windows
+    history = max(TRAILING_WINDOWS) - 1
+    loadStart = startDate - timedelta(days=history)
+    lines = loadOrderLines(loadStart, endDate)
+    revenue = lines["revenue"]
+    margin = revenue - lines["cost"]
+
+    inRange = lines["day"] >= history
+    if not inRange.any():
+        return None
+    orderIDs = lines["orderID"][inRange]
+    quantity = lines["quantity"][inRange]
+    rangeRevenue = revenue[inRange]
+    rangeMargin = margin[inRange]
+
+    orderCount = distinctValues(orderIDs).size
+    totals = {
+        "Orders": orderCount,
+        "Units": int(quantity.sum()),
+        "Revenue": float(rangeRevenue.sum()),
+        "Cost": float((rangeRevenue - rangeMargin).sum()),
+        "Margin": float(rangeMargin.sum()),
+        "Tax": float(lines["tax"][inRange].sum()),
+        "LinesWithoutPrice": int(lines["noPrice"][inRange].sum()),
+        "LinesWithoutCost": int(lines["noCost"][inRange].sum()),
+    }
+    totals["MarginPercent"] = totals["Margin"] * 100 / totals["Revenue"] if totals["Revenue"] else 0.0
+    totals["AverageOrderValue"] = totals["Revenue"] / orderCount
+    totals["AverageUnitsPerOrder"] = totals["Units"] / orderCount
+
+    items, categoryNames = db.getAnalyticsLabels()
+    inventoryIDs = lines["inventoryID"][inRange]
+
+    categoryIDs, groups, sums = groupSums(categoryColumn(inventoryIDs, items), units=quantity,
+                                          revenue=rangeRevenue, margin=rangeMargin)
+    order = np.argsort(-sums["revenue"], kind="stable")
+    categories = {
+        "names": [categoryNames.get(categoryID, "Uncategorized") for categoryID in categoryIDs[order].tolist()],
+        "orders": distinctOrders(groups, orderIDs, categoryIDs.size)[order],
+        "units": sums["units"][order],
+        "revenue": sums["revenue"][order],
+        "cost": (sums["revenue"] - sums["margin"])[order],
+        "margin": sums["margin"][order],
+        "marginPercent": marginPercent(sums["margin"], sums["revenue"])[order],
+        "share": (sums["revenue"] * 100 / totals["Revenue"] if totals["Revenue"] else np.zeros_like(sums["revenue"]))[order],
+    }
+
+    inventoryIDs, groups, sums = groupSums(inventoryIDs, units=quantity,
+                                           revenue=rangeRevenue, margin=rangeMargin)
+    top = np.argsort(-sums["revenue"], kind="stable")[:TOP_SELLER_COUNT]
+    topSellers = {
+        "inventoryIDs": inventoryIDs[top],
+        "names": [items[inventoryID][0] if inventoryID in items else f"Item {inventoryID}"
+                  for inventoryID in inventoryIDs[top].tolist()],
+        "orders": distinctOrders(groups, orderIDs, inventoryIDs.size)[top],
+        "units": sums["units"][top],
+        "revenue": sums["revenue"][top],
+        "margin": sums["margin"][top],
+        "marginPercent": marginPercent(sums["margin"], sums["revenue"])[top],
+    }
+
+    # Daily series over the loaded days; each order counts once, on its day
+    dayCount = (endDate - loadStart).days + 1
+    dailyRevenue = np.bincount(lines["day"], weights=revenue, minlength=dayCount)
+    dailyMargin = np.bincount(lines["day"], weights=margin, minlength=dayCount)
+    _, firstLines = np.unique(lines["orderID"], return_index=True)
+    dailyOrders = np.bincount(lines["day"][firstLines], minlength=dayCount)
+
+    # Trailing sums from running totals: the window ending on day d is cs[d + 1] - cs[d + 1 - w]
+    reportDays = np.arange(history, dayCount)
+    revenueRunning = np.concatenate(([0.0], np.cumsum(dailyRevenue)))
+    ordersRunning = np.concatenate(([0], np.cumsum(dailyOrders)))
+    trend = {
+        "dates": [(loadStart + timedelta(days=day)).isoformat() for day in reportDays.tolist()],
+        "orders": dailyOrders[reportDays],
+        "revenue": dailyRevenue[reportDays],
+        "margin": dailyMargin[reportDays],
+    }
+    for window in TRAILING_WINDOWS:
+        windowRevenue = revenueRunning[reportDays + 1] - revenueRunning[reportDays + 1 - window]
+        windowOrders = ordersRunning[reportDays + 1] - ordersRunning[reportDays + 1 - window]
+        trend[f"revenue{window}"] = windowRevenue / window
+        trend[f"orderValue{window}"] = np.divide(windowRevenue, windowOrders, out=np.zeros_like(windowRevenue),
+                                                 where=windowOrders != 0)
+
+    return {"totals": totals, "categories": categories, "topSellers": topSellers, "trend": trend}
+
+def writeAnalyticsReport(analytics, title, folder=Reports.REPORT_FOLDER):
+    """
+    Writes the analytics of a period as an HTML report.
+
+    Args:
+        analytics (dict): As returned by computeAnalytics.
+        title (str): Title for the report.
+        folder (Path): Folder to write the report to.
+
+    Returns:
+        Path: The report file.
+    """
+    totals = analytics["totals"]
+    summary = [
+        ("Orders", totals["Orders"]),
+        ("Units Sold", totals["Units"]),
+        ("Revenue (after discounts)", f"${totals['Revenue']:.2f}"),
+        ("Cost", f"${totals['Cost']:.2f}"),
+        ("Margin", f"${totals['Margin']:.2f} ({totals['MarginPercent']:.1f}%)"),
+        ("Tax Collected", f"${totals['Tax']:.2f}"),
+        ("Average Order Value", f"${totals['AverageOrderValue']:.2f}"),
+        ("Average Units per Order", f"{totals['AverageUnitsPerOrder']:.2f}"),
+    ]
+    # Legacy lines recorded without a price or cost are in the figures at $0
+    if totals["LinesWithoutPrice"]:
+        summary.append(("Lines Without a Recorded Price (counted as $0 revenue)", totals["LinesWithoutPrice"]))
+    if totals["LinesWithoutCost"]:
+        summary.append(("Lines Without a Recorded Cost (counted as $0 cost)", totals["LinesWithoutCost"]))
+    categories = analytics["categories"]
+    topSellers = analytics["topSellers"]
+    trend = analytics["trend"]
+    firstWindow, secondWindow = TRAILING_WINDOWS
+
+    filename, _ = Reports.writeReport(title, [
+        (None, ["Measure", "Value"], summary, lambda row: SUMMARY_ROW(*row)),
+        ("Sales by Category", ["Category", "Orders", "Units", "Revenue", "Cost", "Margin", "Margin %", "Share of Revenue"],
+         zip(categories["names"], categories["orders"].tolist(), categories["units"].astype(np.int64).tolist(),
+             categories["revenue"].tolist(), categories["cost"].tolist(), categories["margin"].tolist(),
+             categories["marginPercent"].tolist(), categories["share"].tolist()),
+         lambda row: CATEGORY_ROW(html.escape(row[0]), *row[1:])),
+        (f"Top {TOP_SELLER_COUNT} Sellers by Revenue", ["Item ID", "Item", "Orders", "Units", "Revenue", "Margin", "Margin %"],
+         zip(topSellers["inventoryIDs"].tolist(), topSellers["names"], topSellers["orders"].tolist(),
+             topSellers["units"].astype(np.int64).tolist(), topSellers["revenue"].tolist(),
+             topSellers["margin"].tolist(), topSellers["marginPercent"].tolist()),
+         lambda row: ITEM_ROW(row[0], html.escape(row[1]), *row[2:])),
+        ("Daily Trend", ["Date", "Orders", "Revenue", "Margin",
+                         f"{firstWindow}-Day Avg Daily Revenue", f"{secondWindow}-Day Avg Daily Revenue",
+                         f"{secondWindow}-Day Avg Order Value"],
+         zip(trend["dates"], trend["orders"].tolist(), trend["revenue"].tolist(), trend["margin"].tolist(),
+             trend[f"revenue{firstWindow}"].tolist(), trend[f"revenue{secondWindow}"].tolist(),
+             trend[f"orderValue{secondWindow}"].tolist()),
+         lambda row: TREND_ROW(*row)),
+    ], folder)
+    return filename
+
+def reportTitle(startDate, endDate):
+    """
+    Returns the title of the analytics report of a range of days.
+    """
+    return f"Sales Analytics {startDate.strftime('%m-%d-%Y')} to {endDate.strftime('%m-%d-%Y')}"
+
+def generateReport(startDate, endDate):
+    """
+    Computes and writes the analytics report of a range of days. Runs on the
+    analytics thread.
+
+    Args:
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range (inclusive).
+
+    Returns:
+        Path: The report file, or None if nothing sold in the range.
+    """
+    analytics = computeAnalytics(startDate, endDate)
+    if analytics is None:
+        return None
+    return writeAnalyticsReport(analytics, reportTitle(startDate, endDate))
+
+def queueReport(startDate, endDate):
+    """
+    Queues an analytics report to be built in the background.
+
+    Args:
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range (inclusive).
+
+    Returns:
+        Future: Resolves to the report file, or None if nothing sold in the range.
+    """
+    return analyticsExecutor.submit(generateReport, startDate, endDate)
+
+def shutdown():
+    """
+    Stops the analytics thread, dropping reports that have not started.
+    """
+    analyticsExecutor.shutdown(wait=False, cancel_futures=True)
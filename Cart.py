@@ -5,6 +5,7 @@ import Customer
 import Payment
 import DBLibrary as db
 import Help
+import Pricing
 
 discount = None
 totalLabel = None
@@ -29,6 +30,9 @@ def cartPage(window, personID, pageNumber, managerID=None):
     """
     window.configure(background="#7393B3")
 
+    # Refresh prices and stock, and keep the cart's stock held while the customer is looking at it
+    cartChanges = h.revalidateCart()
+
     title = ttk.Label(window, text="Your Cart", font=("Calibri", 28, "bold"), background="#7393B3")
     title.pack(pady=10)
 
@@ -63,13 +67,11 @@ def cartPage(window, personID, pageNumber, managerID=None):
 
             selectedIndex = int(selected)
             item = h.cart[selectedIndex]
-            availableQty = db.checkQuantity(item['InventoryID'])
+            # Holds the stock for the new quantity, or as much of it as is available
+            newQty = h.setCartQuantity(selectedIndex, qty)
 
-            if qty > availableQty:
-                messagebox.showerror("Quantity Error", f"Only {availableQty} of '{item['name']}' are available.")
-                item['quantity'] = availableQty
-            else:
-                item['quantity'] = qty
+            if newQty < qty:
+                messagebox.showerror("Quantity Error", f"Only {newQty} of '{item['name']}' are available.")
 
             refreshTree()
             quantityVar.set("")
@@ -84,7 +86,7 @@ def cartPage(window, personID, pageNumber, managerID=None):
         """
         selected = tree.focus()
         if selected:
-            h.cart.pop(int(selected))
+            h.removeFromCart(h.cart[int(selected)])
             refreshTree()
         if h.cart:
             proceedButton.config(state="normal")
@@ -95,7 +97,7 @@ def cartPage(window, personID, pageNumber, managerID=None):
         """
         Clears all items from the cart and disables the checkout button.
         """
-        h.cart.clear()
+        h.clearCart()
         refreshTree()
         proceedButton.config(state="disabled")
 
@@ -123,32 +125,15 @@ def cartPage(window, personID, pageNumber, managerID=None):
         Recalculates the subtotal, discount, tax, and final total, and updates the display.
         """
         subtotal = float(sum(item['price'] * item['quantity'] for item in h.cart))
+        # Charge exactly what checkout will record, line by line in cents
+        amounts = Pricing.priceOrderLines(h.cart, discount)
+        discountAmt = sum(lineDiscount for lineDiscount, lineTax in amounts)
+        # Describe the discount from what is charged, which is capped at the subtotal
         discountText = ""
-        discountAmt = 0
-
-        if discount:
-            if discount['DiscountLevel'] == 0:
-                # Cart level Discount
-                if discount['DiscountType'] == 0:
-                    discountAmt = subtotal * discount['DiscountPercentage']
-                    discountText = f"Cart Discount ({int(discount['DiscountPercentage']*100)}%): -${discountAmt:.2f}\n"
-                elif discount['DiscountType'] == 1:
-                    discountAmt = discount['DiscountDollarAmount']
-                    discountText = f"Cart Discount: -${discountAmt:.2f}\n"
-
-            elif discount['DiscountLevel'] == 1:
-                # Item level Discount
-                for item in h.cart:
-                    if item['InventoryID'] == discount['InventoryID']:
-                        if discount['DiscountType'] == 0:
-                            discountAmt += item['price'] * item['quantity'] * discount['DiscountPercentage']
-                        elif discount['DiscountType'] == 1:
-                            discountAmt += discount['DiscountDollarAmount'] * item['quantity']
-                if discountAmt > 0:
-                    discountText = f"Item Discount ({discount['DiscountCode']}): -${discountAmt:.2f}\n"
-
+        if discount and discountAmt > 0:
+            discountText = f"Discount ({Pricing.describeDiscount(discount, discountAmt)}): -${discountAmt:.2f}\n"
         discountTotal = subtotal - discountAmt
-        tax = discountTotal * 0.0825
+        tax = sum(lineTax for lineDiscount, lineTax in amounts)
         finalTotal = discountTotal + tax
 
         total_display = (
@@ -169,8 +154,16 @@ def cartPage(window, personID, pageNumber, managerID=None):
 
     def payment():
         """
-        Proceeds to the payment page with the current cart and applied discount.
+        Proceeds to the payment page with the current cart and applied discount, unless
+        the cart changed since it was shown.
         """
+        changes = h.revalidateCart()
+        if changes:
+            refreshTree()
+            if not h.cart:
+                proceedButton.config(state="disabled")
+            messagebox.showwarning("Cart Updated", "\n".join(changes))
+            return
         h.clearScreen(window)
         Payment.paymentPage(window, h.cart, discount, personID, pageNumber, managerID)
 
@@ -263,4 +256,7 @@ def cartPage(window, personID, pageNumber, managerID=None):
 
     if managerID:
         loadAvailableDiscounts()
-        h.clearScreen(promoFrame)
\ No newline at end of file
+        h.clearScreen(promoFrame)
+
+    if cartChanges:
+        messagebox.showinfo("Cart Updated", "\n".join(cartChanges))
\ No newline at end of file
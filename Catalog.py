@@ -0,0 +1,369 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import DBLibrary as db
+import ImageLoader
+
+# Pages of the customer catalog. Pages are fetched with keyset pagination: each page
+# records the InventoryID it starts after (its anchor), so fetching the next page is an
+# index seek no matter how deep the user has paged. While a page is on screen the pages
+# either side of it, and their thumbnails, are loaded in the background so Next and
+# Previous can be drawn straight from memory. Keyword searches are ordered by relevance
+# rather than InventoryID, and so are paged by offset instead, as are browses narrowed
+# by the price, package or stock filters.
+#
+# Match counts and facet counts come from a facet cube per search (see
+# DBLibrary.getFacetCube), so changing a filter recounts everything in memory.
+#
+# Everything cached belongs to one CatalogVersion, a counter the database bumps on every
+# inventory, package, category or image write. When the counter moves on (a manager
+# edits an item, a sale changes stock) the cached pages and cubes are dropped, so
+# customers never see stale prices or stock. Page anchors are kept: they are only
+# InventoryIDs to seek from, so a deep page is still one index seek after a sale.
+# Pages and cubes are each held in a bounded LRU.
+
+PAGE_SIZE = 12
+PREFETCH_POLL_MS = 50
+MAX_CACHED_PAGES = 100
+MAX_CACHED_CUBES = 50
+MAX_PAGE_ANCHORS = 5000
+
+prefetchExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CatalogPrefetch")
+cacheLock = threading.Lock()
+# pageKey -> list of item dictionaries
+pages = OrderedDict()
+# full-text query -> facet cube of its matches
+facetCubes = OrderedDict()
+# pageKey -> InventoryID the page starts after (keyset pages only)
+pageAnchors = {}
+# pageKey -> Future of a background fetch in progress
+inFlight = {}
+# CatalogVersion the cached data was read at (None caches nothing)
+cacheVersion = None
+# Bumped on every clear so fetches that started before it are not stored
+cacheGeneration = 0
+
+def pageKey(keyword, category, pageNumber, filters=None):
+    """
+    Returns the cache key for a page of a search: (full-text query, category, price
+    bucket, package, in stock only, page number). Search texts that produce the same
+    full-text query share a key, and no category is the same as "All".
+    """
+    filters = filters or {}
+    if not category or category == "All":
+        category = "All"
+    return ((db.toSearchQuery(keyword) or "").lower(), category, filters.get("priceBucket"),
+            filters.get("package") or None, filters.get("inStockOnly", True), pageNumber)
+
+def isKeysetPage(key):
+    """
+    Tells whether a page can use keyset pagination: no keyword and no filters other
+    than the category.
+    """
+    searchKey, _, priceBucket, package, inStockOnly, _ = key
+    return not searchKey and priceBucket is None and package is None and inStockOnly
+
+def storeLRU(cache, key, value, maxEntries):
+    """
+    Adds an entry to a bounded cache, evicting the least recently used. Caller holds cacheLock.
+    """
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > maxEntries:
+        cache.popitem(last=False)
+
+def canStore(generation):
+    """
+    Tells whether data read during the given cache generation may be cached. Caller holds cacheLock.
+    """
+    # A cancelled search may have been interrupted part way, so its results are not kept
+    return generation == cacheGeneration and cacheVersion is not None and not db.queryCancelled()
+
+def storePage(key, items, generation):
+    """
+    Caches a page along with the anchors it reveals. Caller holds cacheLock.
+    """
+    inFlight.pop(key, None)
+    if not canStore(generation):
+        return
+    storeLRU(pages, key, items, MAX_CACHED_PAGES)
+    if items and isKeysetPage(key):
+        if len(pageAnchors) > MAX_PAGE_ANCHORS:
+            pageAnchors.clear()
+        pageAnchors[key] = items[0]["InventoryID"] - 1
+        pageAnchors[key[:-1] + (key[-1] + 1,)] = items[-1]["InventoryID"]
+
+def resetCache(version):
+    """
+    Empties the cache and starts collecting for a new catalog version. Caller holds cacheLock.
+    """
+    global cacheVersion, cacheGeneration
+
+    cacheGeneration += 1
+    cacheVersion = version
+    pages.clear()
+    facetCubes.clear()
+    # Fetches already running may have read the old data; later lookups query afresh
+    inFlight.clear()
+
+def checkVersion():
+    """
+    Drops the cache if the catalog has changed since it was filled.
+    """
+    version = db.getCatalogVersion()
+    with cacheLock:
+        if version is None or version != cacheVersion:
+            resetCache(version)
+
+def nearestAnchor(key):
+    """
+    Finds the closest page before a keyset page whose anchor is known. Caller holds cacheLock.
+
+    Returns:
+        tuple: (page number, InventoryID it starts after); (0, None) for the first page.
+    """
+    for pageNumber in range(key[-1] - 1, 0, -1):
+        afterID = pageAnchors.get(key[:-1] + (pageNumber,))
+        if afterID is not None:
+            return pageNumber, afterID
+    return 0, None
+
+def walkToPage(key, category, pageSize, generation):
+    """
+    Reaches a keyset page with no known anchor by seeking forward a page at a time from
+    the nearest page that has one, caching each page passed on the way.
+
+    Returns:
+        list: The page's item dictionaries.
+    """
+    with cacheLock:
+        pageNumber, afterID = nearestAnchor(key)
+    while True:
+        items = db.seekInventory(category, afterID=afterID, limit=pageSize)
+        if pageNumber == key[-1] or not items:
+            return items
+        with cacheLock:
+            storePage(key[:-1] + (pageNumber,), items, generation)
+        afterID = items[-1]["InventoryID"]
+        pageNumber += 1
+
+def fetchPage(keyword, category, pageNumber, pageSize=PAGE_SIZE, filters=None):
+    """
+    Loads a page from the database and stores it, along with the anchors it reveals.
+
+    Args:
+        keyword (str): Optional search text.
+        category (str): Optional category filter; "All" applies no filter.
+        pageNumber (int): Zero-based page number.
+        pageSize (int): Number of items per page.
+        filters (dict, optional): Price, package and stock filters (see DBLibrary.summarizeFacets).
+
+    Returns:
+        list: The page's item dictionaries.
+    """
+    key = pageKey(keyword, category, pageNumber, filters)
+    with cacheLock:
+        generation = cacheGeneration
+        afterID = pageAnchors.get(key)
+        nextPage = pages.get(key[:-1] + (pageNumber + 1,))
+
+    if not isKeysetPage(key):
+        items = db.searchInventoryFiltered(keyword, category, filters, pageNumber * pageSize, pageSize)
+    elif pageNumber == 0:
+        items = db.seekInventory(category, limit=pageSize)
+    elif afterID is not None:
+        items = db.seekInventory(category, afterID=afterID, limit=pageSize)
+    elif nextPage:
+        items = db.seekInventory(category, beforeID=nextPage[0]["InventoryID"], limit=pageSize)
+    else:
+        # No anchor (e.g. returning to a deep page after clearCache)
+        items = walkToPage(key, category, pageSize, generation)
+
+    with cacheLock:
+        storePage(key, items, generation)
+    return items
+
+def getPage(keyword, category, pageNumber, pageSize=PAGE_SIZE, filters=None):
+    """
+    Returns a page of the catalog, from memory when it has already been loaded or
+    prefetched.
+
+    Args:
+        keyword (str): Optional search text.
+        category (str): Optional category filter; "All" applies no filter.
+        pageNumber (int): Zero-based page number.
+        pageSize (int): Number of items per page.
+        filters (dict, optional): Price, package and stock filters.
+
+    Returns:
+        list: The page's item dictionaries.
+    """
+    checkVersion()
+    key = pageKey(keyword, category, pageNumber, filters)
+    with cacheLock:
+        if key in pages:
+            pages.move_to_end(key)
+            return pages[key]
+        future = inFlight.get(key)
+
+    # Already being prefetched, so wait for that rather than querying twice
+    if future is not None:
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Catalog prefetch error: {e}")
+    return fetchPage(keyword, category, pageNumber, pageSize, filters)
+
+def getFacets(keyword, category, filters=None):
+    """
+    Returns the number of items matching a search and the facet counts for refining
+    it, worked out from the search's cached facet cube.
+
+    Args:
+        keyword (str): Optional search text.
+        category (str): Optional category filter; "All" applies no filter.
+        filters (dict, optional): Price, package and stock filters.
+
+    Returns:
+        tuple: (match count, facets or None). See DBLibrary.summarizeFacets.
+    """
+    checkVersion()
+    searchKey = pageKey(keyword, category, None)[0]
+    with cacheLock:
+        cube = facetCubes.get(searchKey)
+        if cube is not None:
+            facetCubes.move_to_end(searchKey)
+        generation = cacheGeneration
+
+    if cube is None:
+        cube = db.getFacetCube(keyword)
+        if cube is None:
+            return db.countSearchInventory(keyword, category), None
+        with cacheLock:
+            if canStore(generation):
+                storeLRU(facetCubes, searchKey, cube, MAX_CACHED_CUBES)
+
+    return db.summarizeFacets(cube, category, filters)
+
+def getItemCount(keyword, category, filters=None):
+    """
+    Returns how many items match a search, cached per catalog version.
+
+    Args:
+        keyword (str): Optional search text.
+        category (str): Optional category filter; "All" applies no filter.
+        filters (dict, optional): Price, package and stock filters.
+
+    Returns:
+        int: The number of matching items.
+    """
+    return getFacets(keyword, category, filters)[0]
+
+def search(keyword, category, filters=None, pageSize=PAGE_SIZE):
+    """
+    Returns the first page of a search with its match count and facet counts. When
+    neither is cached, all three are read from the database in one transaction.
+
+    Args:
+        keyword (str): Optional search text.
+        category (str): Optional category filter; "All" applies no filter.
+        filters (dict, optional): Price, package and stock filters.
+        pageSize (int): Number of items per page.
+
+    Returns:
+        tuple: (first page of items, match count, facets or None).
+    """
+    checkVersion()
+    key = pageKey(keyword, category, 0, filters)
+    with cacheLock:
+        cached = key in pages or key[0] in facetCubes or key in inFlight
+        generation = cacheGeneration
+
+    if cached:
+        totalCount, facets = getFacets(keyword, category, filters)
+        return getPage(keyword, category, 0, pageSize, filters), totalCount, facets
+
+    items, totalCount, facets, cube = db.searchInventoryFacets(keyword, category, filters, 0, pageSize)
+    with cacheLock:
+        storePage(key, items, generation)
+        if cube is not None and canStore(generation):
+            storeLRU(facetCubes, key[0], cube, MAX_CACHED_CUBES)
+    return items, totalCount, facets
+
+def prefetchAround(widget, keyword, category, pageNumber, maxPage, pageSize=PAGE_SIZE, imageSize=(150, 100), filters=None):
+    """
+    Loads the pages before and after the current one, and their images, in the background.
+    Must be called on the Tk thread.
+
+    Args:
+        widget (tk.Widget): Any widget of the application, used to reach the Tk root.
+        keyword (str): Optional search text.
+        category (str): Optional category filter; "All" applies no filter.
+        pageNumber (int): The page currently on screen.
+        maxPage (int): The last valid page number.
+        pageSize (int): Number of items per page.
+        imageSize (tuple): Size of the grid images to prefetch.
+        filters (dict, optional): Price, package and stock filters.
+    """
+    root = widget.nametowidget(".")
+    loadedPages = []
+    futures = []
+
+    for neighbour in (pageNumber + 1, pageNumber - 1):
+        if neighbour < 0 or neighbour > maxPage:
+            continue
+        key = pageKey(keyword, category, neighbour, filters)
+        with cacheLock:
+            if key in pages:
+                pages.move_to_end(key)
+                loadedPages.append(pages[key])
+                continue
+            if key in inFlight:
+                continue
+            future = prefetchExecutor.submit(fetchPage, keyword, category, neighbour, pageSize, filters)
+            inFlight[key] = future
+        futures.append(future)
+
+    for items in loadedPages:
+        prefetchImages(root, items, imageSize)
+    if futures:
+        root.after(PREFETCH_POLL_MS, prefetchImagesWhenReady, root, futures, imageSize)
+
+def prefetchImages(root, items, imageSize):
+    """
+    Queues background loads for the images of a page of items.
+    """
+    for item in items:
+        ImageLoader.prefetch(root, item["InventoryID"], item["ImageHash"], imageSize)
+
+def prefetchImagesWhenReady(root, futures, imageSize):
+    """
+    Starts loading the images of prefetched pages as each page arrives. Runs on the Tk
+    thread via after().
+    """
+    remaining = []
+    for future in futures:
+        if not future.done():
+            remaining.append(future)
+            continue
+        try:
+            prefetchImages(root, future.result(), imageSize)
+        except Exception as e:
+            print(f"Catalog prefetch error: {e}")
+
+    if remaining:
+        root.after(PREFETCH_POLL_MS, prefetchImagesWhenReady, root, remaining, imageSize)
+
+def clearCache():
+    """
+    Discards every cached page, facet cube and anchor.
+    """
+    with cacheLock:
+        resetCache(None)
+        pageAnchors.clear()
+
+def shutdown():
+    """
+    Stops the prefetch thread, dropping any fetches that have not started.
+    """
+    prefetchExecutor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
 import Helper as h
+import ImageLoader
+import Catalog
+import LiveSearch
 import Login
 import Help
 import DBLibrary as db
@@ -10,7 +13,13 @@ import Manager
 import Favorite
 
 searchState = {"keyword": "",
-               "category": ""}
+               "category": "",
+               "priceBucket": None,
+               "package": None,
+               "inStockOnly": True}
+
+ANY_PRICE = "Any price"
+ANY_PACKAGE = "Any package"
 
 def customerPage(window, personID, pageNumber, managerID=None):
     """
@@ -18,7 +27,8 @@ def customerPage(window, personID, pageNumber, managerID=None):
 
     This page allows users (or guests) to:
     - Browse products with pagination
-    - Filter products by keyword or category
+    - Filter products by keyword, category, price, package or stock, with a count of
+      matching items next to each choice
     - Click a product to view details
     - Navigate to Cart or Favorites pages
     - Return to the login or manager page depending on session
@@ -33,11 +43,11 @@ def customerPage(window, personID, pageNumber, managerID=None):
     ITEMS_PER_PAGE = 12
     keyword = searchState["keyword"]
     category = searchState["category"]
+    filters = {"priceBucket": searchState["priceBucket"],
+               "package": searchState["package"],
+               "inStockOnly": searchState["inStockOnly"]}
 
-    if keyword or (category and category != "All"):
-        totalItems = db.countSearchInventory(keyword, category)
-    else:
-        totalItems = db.getInventoryCount()
+    totalItems, facets = Catalog.getFacets(keyword, category, filters)
     maxPage = (totalItems -1) // ITEMS_PER_PAGE
 
     def back():
@@ -46,7 +56,8 @@ def customerPage(window, personID, pageNumber, managerID=None):
         Clears the screen and inventory cache.
         """
         h.clearScreen(window)
-        h.clearInventoryCache()
+        Catalog.clearCache()
+        h.closeCart()
         if managerID:
             Manager.managerPage(window, managerID)
         else:
@@ -89,52 +100,181 @@ def customerPage(window, personID, pageNumber, managerID=None):
     filterFrame.pack(pady=5)
 
     searchEntry = ttk.Entry(filterFrame, width=50)
+    searchEntry.insert(0, keyword)
     searchEntry.pack(side="left", padx=5)
 
     categoryVar = tk.StringVar()
     categories = db.getCategories()
-    categoryDropdown = ttk.OptionMenu(filterFrame, categoryVar, categories[0], *categories)
+    categoryDropdown = ttk.OptionMenu(filterFrame, categoryVar, category if category in categories else categories[0], *categories)
     categoryDropdown.pack(side="left", padx=5)
 
+    # Second row: price, package and stock filters
+    facetFrame = tk.Frame(window, bg="#7393B3")
+    facetFrame.pack(pady=5)
+
+    priceLabels = [ANY_PRICE] + [bucket[0] for bucket in db.PRICE_BUCKETS]
+    priceVar = tk.StringVar()
+    priceBucket = filters["priceBucket"]
+    priceDropdown = ttk.OptionMenu(facetFrame, priceVar, ANY_PRICE if priceBucket is None else priceLabels[priceBucket + 1], *priceLabels)
+    priceDropdown.pack(side="left", padx=5)
+
+    packageVar = tk.StringVar()
+    packageDropdown = ttk.OptionMenu(facetFrame, packageVar, filters["package"] or ANY_PACKAGE, ANY_PACKAGE)
+    packageDropdown.pack(side="left", padx=5)
+
+    stockVar = tk.BooleanVar(value=filters["inStockOnly"])
+    stockCheck = ttk.Checkbutton(facetFrame, text="In stock only", variable=stockVar)
+    stockCheck.pack(side="left", padx=5)
+
+    def getFilters(priceLabel, package, inStockOnly):
+        """
+        Turns the filter controls' values into a Catalog filters dictionary.
+        """
+        return {"priceBucket": priceLabels.index(priceLabel) - 1 if priceLabel in priceLabels[1:] else None,
+                "package": None if package == ANY_PACKAGE else package,
+                "inStockOnly": inStockOnly}
+
+    def fillMenu(dropdown, var, choices):
+        """
+        Replaces a dropdown's choices.
+
+        Args:
+            dropdown (ttk.OptionMenu): The dropdown to update.
+            var (tk.StringVar): The variable the dropdown sets.
+            choices (list): (value, label) pairs.
+        """
+        menu = dropdown["menu"]
+        menu.delete(0, "end")
+        for value, label in choices:
+            menu.add_command(label=label, command=lambda v=value: var.set(v))
+
+    def updateFacetMenus(facets):
+        """
+        Shows how many items each filter choice would give, from the facet counts of
+        the current search.
+
+        Args:
+            facets (dict or None): Facet counts from Catalog.getFacets.
+        """
+        if facets is None:
+            return
+
+        categoryCounts = facets["category"]
+        fillMenu(categoryDropdown, categoryVar,
+                 [(name, f"{name} ({sum(categoryCounts.values()) if name == 'All' else categoryCounts.get(name, 0)})")
+                  for name in categories])
+
+        priceCounts = facets["price"]
+        fillMenu(priceDropdown, priceVar,
+                 [(ANY_PRICE, f"{ANY_PRICE} ({sum(priceCounts.values())})")] +
+                 [(label, f"{label} ({priceCounts.get(index, 0)})") for index, label in enumerate(priceLabels[1:])])
+
+        packageCounts = facets["package"]
+        packages = sorted(packageCounts)
+        # Keep the selected package available even when nothing else matches it
+        if packageVar.get() != ANY_PACKAGE and packageVar.get() not in packageCounts:
+            packages.insert(0, packageVar.get())
+        fillMenu(packageDropdown, packageVar,
+                 [(ANY_PACKAGE, ANY_PACKAGE)] + [(name, f"{name} ({packageCounts.get(name, 0)})") for name in packages])
+
+        stockCheck.configure(text=f"In stock only ({facets['stock']['inStock']} of {facets['stock']['all']})")
+
+    # Widgets of each grid cell, reused when the results change
+    productCells = []
+
     def refreshProductDisplay(items):
         """
-        Populates the product display grid with items.
+        Populates the product display grid with items. Cells already on screen are
+        reused and only updated where their item changed.
 
         Args:
             items (list): A list of product dictionaries to display.
         """
-        for widget in productFrame.winfo_children():
-            widget.destroy()
-
         columns = 4
         imgSize = (150, 100)
 
         for index, item in enumerate(items):
-            row = index // columns
-            col = index % columns
+            if index < len(productCells):
+                cell = productCells[index]
+                # A replaced image keeps its InventoryID but gets a new ImageHash
+                if (cell["item"]["InventoryID"], cell["item"]["ImageHash"]) != (item["InventoryID"], item["ImageHash"]):
+                    ImageLoader.loadImage(cell["imgLabel"], item['InventoryID'], item['ImageHash'], imgSize)
+                if cell["item"]["ItemName"] != item["ItemName"]:
+                    cell["nameLabel"].configure(text=item['ItemName'])
+            else:
+                row = index // columns
+                col = index % columns
+
+                frame = ttk.Frame(productFrame, relief="raised", padding=5)
+                frame.grid(row=row, column=col, padx=10, pady=10)
+
+                imgLabel = tk.Label(frame, cursor="hand2")
+                ImageLoader.loadImage(imgLabel, item['InventoryID'], item['ImageHash'], imgSize)
+                imgLabel.pack()
+
+                nameLabel = ttk.Label(frame, text=item['ItemName'], font=("Calibri", 10))
+                nameLabel.pack(pady=5)
+
+                cell = {"frame": frame, "imgLabel": imgLabel, "nameLabel": nameLabel}
+                productCells.append(cell)
+
+            cell["item"] = item
+            cell["imgLabel"].bind("<Button-1>", lambda e, it=item: product(it))
+
+        # Remove cells left over from a longer result list
+        while len(productCells) > len(items):
+            productCells.pop()["frame"].destroy()
+
+    def runSearch(query):
+        """
+        Loads the first page, the match count and the facet counts for a search. Runs on
+        a worker thread.
 
-            frame = ttk.Frame(productFrame, relief="raised", padding=5)
-            frame.grid(row=row, column=col, padx=10, pady=10)
+        Args:
+            query (tuple): (keyword, category, price label, package, in stock only).
 
-            image = h.convertToTkImage(item['ItemImage'], item['InventoryID'], imgSize)
-            imgLabel = tk.Label(frame, image=image, cursor="hand2")
-            imgLabel.image = image
-            imgLabel.pack()
+        Returns:
+            tuple: (query, total number of matches, first page of items, facet counts).
+        """
+        keyword, category = query[:2]
+        items, totalItems, facets = Catalog.search(keyword, category, getFilters(*query[2:]), ITEMS_PER_PAGE)
+        return query, totalItems, items, facets
 
-            nameLabel = ttk.Label(frame, text=item['ItemName'], font=("Calibri", 10))
-            nameLabel.pack(pady=5)
+    def showSearchResults(results):
+        """
+        Shows the first page of a finished search in place of the current grid.
 
-            imgLabel.bind("<Button-1>", lambda e, it=item: product(it))
+        Args:
+            results (tuple): The value returned by runSearch.
+        """
+        nonlocal pageNumber, maxPage
+
+        query, totalItems, items, facets = results
+        keyword, category = query[:2]
+        filters = getFilters(*query[2:])
+        searchState.update(filters, keyword=keyword, category=category)
+        pageNumber = 0
+        maxPage = (totalItems - 1) // ITEMS_PER_PAGE
+        refreshProductDisplay(items)
+        updateFacetMenus(facets)
+        Catalog.prefetchAround(window, keyword, category, pageNumber, maxPage, ITEMS_PER_PAGE, filters=filters)
+
+    def getQuery():
+        """
+        Returns the search text and filter choices currently on screen.
+        """
+        return (searchEntry.get().strip(), categoryVar.get(), priceVar.get(), packageVar.get(), stockVar.get())
+
+    # Search as the user types or changes a filter
+    liveSearch = LiveSearch.bindLiveSearch(searchEntry, getQuery, runSearch, showSearchResults, initialQuery=getQuery())
+    for var in (categoryVar, priceVar, packageVar, stockVar):
+        var.trace_add("write", lambda *args: liveSearch(delay=0))
 
     def searchProducts():
         """
-        Performs a product search using the provided keyword and category.
-        Resets to the first page of results.
+        Runs the search straight away instead of waiting for typing to pause.
         """
-        searchState["keyword"] = searchEntry.get().strip()
-        searchState["category"] = categoryVar.get()
-        h.clearScreen(window)
-        customerPage(window, personID, 0, managerID)
+        liveSearch(delay=0, force=True)
 
     searchButton = ttk.Button(filterFrame, text="Search", command=searchProducts)
     searchButton.pack(side="left", padx=5)
@@ -142,17 +282,8 @@ def customerPage(window, personID, pageNumber, managerID=None):
     productFrame = tk.Frame(window, bg="#7393B3")
     productFrame.pack(pady=10)
 
-    # Get items from DB and store the rendered pages for faster loading
-    cacheKey = (pageNumber, keyword.lower(), category.lower())
-
-    if cacheKey in h.pageCache:
-        items = h.pageCache[cacheKey]
-    else:
-        if keyword or (category and category != "All"):
-            items = db.searchInventory(keyword, category, pageNumber * ITEMS_PER_PAGE, ITEMS_PER_PAGE)
-        else:
-            items = db.getPageInventory(pageNumber * ITEMS_PER_PAGE, ITEMS_PER_PAGE)
-    h.pageCache[cacheKey] = items
+    # Pages come from memory when they were prefetched while the previous page was open
+    items = Catalog.getPage(keyword, category, pageNumber, ITEMS_PER_PAGE, filters)
 
 
     def product(item):
@@ -166,6 +297,8 @@ def customerPage(window, personID, pageNumber, managerID=None):
         Product.productPage(window, item, personID, pageNumber, False, managerID)
 
     refreshProductDisplay(items)
+    updateFacetMenus(facets)
+    Catalog.prefetchAround(window, keyword, category, pageNumber, maxPage, ITEMS_PER_PAGE, filters=filters)
 
     # Page buttons
     pageFrame = tk.Frame(window, bg="#7393B3")
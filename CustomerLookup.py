@@ -3,6 +3,7 @@ from tkinter import ttk, messagebox
 import Helper as h
 import DBLibrary as db
 import Help
+import Receipts
 import Manager
 import Customer
 
@@ -52,6 +53,8 @@ def customerLookupPage(window, managerID):
             return
         personID = int(selected)
         h.clearScreen(window)
+        # Switch the terminal to this customer's cart
+        h.openCart(personID)
         Customer.customerPage(window, personID, 0, managerID)
 
     def showCustomerOrders():
@@ -74,6 +77,16 @@ def customerLookupPage(window, managerID):
                 order['OrderDate']
             ))
 
+    def reprintReceipt():
+        """
+        Reprints the receipt of the selected order from what it recorded at checkout.
+        """
+        selected = ordersTree.focus()
+        if not selected:
+            messagebox.showerror("Selection Error", "Please select an order.")
+            return
+        Receipts.queueReceipt(ordersTree.item(selected)["values"][0])
+
     def back():
         """
         Navigates back to the Manager Page.
@@ -105,6 +118,7 @@ def customerLookupPage(window, managerID):
     ttk.Button(actionFrame, text="Search", command=searchCustomers).pack(side="left", padx=5)
     ttk.Button(actionFrame, text="Customer Orders", command=showCustomerOrders).pack(side="left", padx=5)
     ttk.Button(actionFrame, text="Select Customer", command=selectCustomer).pack(side="left", padx=5)
+    ttk.Button(actionFrame, text="Reprint Receipt", command=reprintReceipt).pack(side="left", padx=5)
 
     resultTree = ttk.Treeview(window, columns=("PersonID", "FirstName", "LastName", "Email", "Phone"), show="headings", height=5)
     for col in resultTree["columns"]:
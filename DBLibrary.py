@@ -1,37 +1,176 @@
 import sqlite3
-import os
+import re
+import json
+import time
+import queue
+import threading
+from contextlib import contextmanager
 from tkinter import messagebox
-from datetime import date, datetime
+from datetime import date, timedelta
 from pathlib import Path
+import LocalDatabase
+import ImageStore
+import Pricing
+import Migrations
 
 DB_PATH = str(Path.home() / "Documents" / "Cars2U" / "Cars2U.db")
 
+# Long-lived connections shared by every DBLibrary function. Opening Cars2U.db,
+# registering the type converters and setting PRAGMAs happens once per pooled
+# connection instead of once per query.
+POOL_SIZE = 4
+connectionPool = queue.LifoQueue(maxsize=POOL_SIZE)
+threadState = threading.local()
+# Set in processes that only read, such as report workers (see useReadOnlyConnections)
+readOnly = False
+
 def connect():
     """
-    Establishes a connection to the SQLite database and enables foreign key constraints.
+    Establishes a connection to the SQLite database, enables foreign key constraints
+    and applies the deployment's performance profile.
+
+    Connections may be handed between threads by the pool, but are only ever used
+    by one thread at a time.
 
     Returns:
         sqlite3.Connection: A connection object to the database.
+
+    Raises:
+        sqlite3.Error: In a read-only process, which has no window to report errors
+            in, if the connection could not be opened.
     """
     try:
-        conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
+        if readOnly:
+            conn = sqlite3.connect(Path(DB_PATH).as_uri() + "?mode=ro", uri=True,
+                                   detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
         conn.execute("PRAGMA foreign_keys = ON;")
+        LocalDatabase.applyPerformanceProfile(conn, readOnly=readOnly)
         return conn
     except Exception as e:
+        if readOnly:
+            raise
         print(f"An error occurred connecting to DB: {e}")
         messagebox.showerror(title="Connection Error", message="Trouble connecting, please try again later")
 
-def close(conn, cursor):
+@contextmanager
+def dbConnection():
+    """
+    Borrows a pooled connection for the duration of a with block.
+
+    Nested use on the same thread reuses the connection already held by that thread,
+    so helpers can call each other without taking a second connection. Any transaction
+    left open when the outermost block exits is rolled back before the connection is
+    returned to the pool.
+
+    Yields:
+        sqlite3.Connection: A connection owned by the current thread until the block exits.
+
+    Raises:
+        sqlite3.OperationalError: If a new connection could not be opened.
+    """
+    conn = getattr(threadState, "conn", None)
+    if conn is not None:
+        yield conn
+        return
+
+    try:
+        conn = connectionPool.get_nowait()
+    except queue.Empty:
+        conn = connect()
+        if conn is None:
+            raise sqlite3.OperationalError("Could not connect to database")
+
+    threadState.conn = conn
+    try:
+        yield conn
+    finally:
+        threadState.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            connectionPool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def closeConnections():
+    """
+    Closes every idle pooled connection. Called when the application shuts down.
+    """
+    while True:
+        try:
+            conn = connectionPool.get_nowait()
+        except queue.Empty:
+            break
+        conn.close()
+
+def useReadOnlyConnections():
+    """
+    Makes every connection this process opens from now on read-only (SQLite's
+    mode=ro), so a process that only builds reports can never write to the database.
+    Idle pooled connections are closed first.
+    """
+    global readOnly
+
+    readOnly = True
+    closeConnections()
+
+# Background searches run under a cancel token (a dict) so that the Tk thread can
+# abort them with cancelQuery when the user has already typed something newer.
+cancelLock = threading.Lock()
+
+def runCancellable(token, function, *args):
     """
-    Closes the provided database connection and cursor.
+    Calls function on the current thread with a connection that cancelQuery(token)
+    can interrupt from another thread. DBLibrary calls made by function share that
+    connection.
 
     Args:
-        conn (sqlite3.Connection): The database connection to close.
-        cursor (sqlite3.Cursor): The cursor to close.
+        token (dict): Cancel token for this call.
+        function (callable): The work to run, typically one or more DBLibrary calls.
+        *args: Arguments passed to function.
+
+    Returns:
+        The return value of function, or None if the token was cancelled before it started.
     """
-    cursor.close()
-    conn.close()
-    
+    with dbConnection() as conn:
+        with cancelLock:
+            if token.get("cancelled"):
+                return None
+            token["connection"] = conn
+        threadState.cancelToken = token
+        try:
+            return function(*args)
+        finally:
+            threadState.cancelToken = None
+            with cancelLock:
+                token.pop("connection", None)
+
+def cancelQuery(token):
+    """
+    Cancels a call started with runCancellable, interrupting any statement it is running.
+
+    Args:
+        token (dict): The cancel token passed to runCancellable.
+    """
+    with cancelLock:
+        token["cancelled"] = True
+        conn = token.get("connection")
+        if conn is not None:
+            conn.interrupt()
+
+def queryCancelled():
+    """
+    Tells code running under runCancellable whether its results are no longer wanted,
+    e.g. so a cache does not keep results from an interrupted query.
+
+    Returns:
+        bool: True if the current thread's call has been cancelled.
+    """
+    token = getattr(threadState, "cancelToken", None)
+    return bool(token and token.get("cancelled"))
+
 def testLogin(name, password):
     """
     Verifies login credentials and returns user level and person ID if valid.
@@ -50,39 +189,37 @@ def testLogin(name, password):
             personID: The ID of the person if login successful, else None
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        # Grab the user level (customer or manager) associated with name and password
-        query = f"""
-            SELECT PersonID, PositionTitle 
-            FROM Logon 
-            WHERE LOWER(LogonName) = LOWER(?) 
-              AND Password = ?
-              AND (AccountDisabled IS NULL OR AccountDisabled = 0)
-              AND (AccountDeleted IS NULL OR AccountDeleted = 0)
-        """
-        cursor.execute(query, (name, password))
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            # Grab the user level (customer or manager) associated with name and password
+            query = f"""
+                SELECT PersonID, PositionTitle 
+                FROM Logon 
+                WHERE LOWER(LogonName) = LOWER(?) 
+                  AND Password = ?
+                  AND (AccountDisabled IS NULL OR AccountDisabled = 0)
+                  AND (AccountDeleted IS NULL OR AccountDeleted = 0)
+            """
+            cursor.execute(query, (name, password))
         
-        result = cursor.fetchone()
+            result = cursor.fetchone()
         
-        # If there is an output then login is successful
-        if result:
-            personID, positionTitle = result
-            positionTitle = positionTitle.lower()
+            # If there is an output then login is successful
+            if result:
+                personID, positionTitle = result
+                positionTitle = positionTitle.lower()
             
-            if positionTitle == "customer":
-                return 1, personID
-            elif positionTitle == "manager":
-                return 2, personID
-        else:
-            # Username and password do not exist in DB
-            return 4, None
+                if positionTitle == "customer":
+                    return 1, personID
+                elif positionTitle == "manager":
+                    return 2, personID
+            else:
+                # Username and password do not exist in DB
+                return 4, None
 
     except Exception as e:
         print(f"An error occurred: {e}")
         return 3  # Indicate failure if an exception occurs
-    finally:
-        close(conn, cursor)
     
 def userExists(username):
     """
@@ -96,24 +233,21 @@ def userExists(username):
     """
     query = "SELECT * from Logon WHERE LOWER(LogonName) = LOWER(?)"
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute(query, (username,))
+            cursor.execute(query, (username,))
 
-        result = cursor.fetchone()
+            result = cursor.fetchone()
 
-        if result:
-            return True
-        else:
-            return False
+            if result:
+                return True
+            else:
+                return False
 
     except Exception as e:
         print(f"An error occurred checking if username already exists: {e}")
 
-    finally:
-        close(conn, cursor)
-
 def registerUser(data, positionID):
     """
     Registers a new user in the Person and Logon tables with selected security questions.
@@ -126,84 +260,82 @@ def registerUser(data, positionID):
         bool: True if registration succeeded, False otherwise.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-
-        if positionID == 1:
-            position = 'customer'
-        else:
-            position = 'manager'
-
-        # get position ID
-        positionQuery = "SELECT PositionID FROM Position WHERE PositionTitle = ?"
-        cursor.execute(positionQuery, (position,))
-        positionId = cursor.fetchone()[0]
-
-        # populate "person" table with account data
-        personQuery = """
-            INSERT INTO Person 
-            (Title, NameFirst, NameMiddle, NameLast, Suffix, Address1, Address2, Address3, City, Zipcode, State, 
-            Email, PhonePrimary, PhoneSecondary, PositionID, PersonDeleted)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
-            """
-        cursor.execute(personQuery,
-            data.get("Title"), data["First Name"], data.get("Middle Name"), data["Last Name"], data.get("Suffix"),
-            data["Address 1"], data.get("Address 2"), data.get("Address 3"), data["City"], data["Zipcode"], data["State"],
-            data.get("Email"), data.get("Phone Primary"), data.get("Phone Secondary"), positionId
-        )
-
-        # get last inserted ID (to put into logon table)
-        personId = cursor.lastrowid
-
-        # figure out which set of questions the user used
-        securityQuestions = []
-        selectedQuestions = {
-            1: [data.get("Question1"), data.get("Question2"), data.get("Question3")],
-            2: [data.get("Question4"), data.get("Question5"), data.get("Question6")],
-            3: [data.get("Question7"), data.get("Question8"), data.get("Question9")]
-        }
-        chosenQuestions = selectedQuestions[data["SelectedSet"]]
-
-        # figure out the answers the user gave (based on question set)
-        chosenAnswers = []
-        selectedAnswers = {
-            1: [data.get("Answer1"), data.get("Answer2"), data.get("Answer3")],
-            2: [data.get("Answer4"), data.get("Answer5"), data.get("Answer6")],
-            3: [data.get("Answer7"), data.get("Answer8"), data.get("Answer9")]
-        }
-        chosenAnswers = selectedAnswers[data["SelectedSet"]]
-
-        # get the relevant question id's from the "securityquestion" table
-        for question in chosenQuestions:
-            questionQuery = "SELECT QuestionID FROM SecurityQuestions WHERE QuestionPrompt = ?"
-            cursor.execute(questionQuery, question)
-            questionId = cursor.fetchone()
-            securityQuestions.append(questionId[0])
-
-        # insert account data into "logon" table
-        logonQuery = """
-            INSERT INTO Logon 
-            (PersonID, LogonName, Password, FirstChallengeQuestion, FirstChallengeAnswer, 
-            SecondChallengeQuestion, SecondChallengeAnswer, ThirdChallengeQuestion, ThirdChallengeAnswer, 
-            PositionTitle, AccountDisabled, AccountDeleted)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0)
-            """
-        cursor.execute(logonQuery,
-            personId, data["Username"], data["Password"],
-            securityQuestions[0], chosenAnswers[0],
-            securityQuestions[1], chosenAnswers[1],
-            securityQuestions[2], chosenAnswers[2],
-            position
-        )
-
-        # commit changes
-        conn.commit()
-        return True
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            if positionID == 1:
+                position = 'customer'
+            else:
+                position = 'manager'
+
+            # get position ID
+            positionQuery = "SELECT PositionID FROM Position WHERE PositionTitle = ?"
+            cursor.execute(positionQuery, (position,))
+            positionId = cursor.fetchone()[0]
+
+            # populate "person" table with account data
+            personQuery = """
+                INSERT INTO Person 
+                (Title, NameFirst, NameMiddle, NameLast, Suffix, Address1, Address2, Address3, City, Zipcode, State, 
+                Email, PhonePrimary, PhoneSecondary, PositionID, PersonDeleted)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+                """
+            cursor.execute(personQuery,
+                data.get("Title"), data["First Name"], data.get("Middle Name"), data["Last Name"], data.get("Suffix"),
+                data["Address 1"], data.get("Address 2"), data.get("Address 3"), data["City"], data["Zipcode"], data["State"],
+                data.get("Email"), data.get("Phone Primary"), data.get("Phone Secondary"), positionId
+            )
+
+            # get last inserted ID (to put into logon table)
+            personId = cursor.lastrowid
+
+            # figure out which set of questions the user used
+            securityQuestions = []
+            selectedQuestions = {
+                1: [data.get("Question1"), data.get("Question2"), data.get("Question3")],
+                2: [data.get("Question4"), data.get("Question5"), data.get("Question6")],
+                3: [data.get("Question7"), data.get("Question8"), data.get("Question9")]
+            }
+            chosenQuestions = selectedQuestions[data["SelectedSet"]]
+
+            # figure out the answers the user gave (based on question set)
+            chosenAnswers = []
+            selectedAnswers = {
+                1: [data.get("Answer1"), data.get("Answer2"), data.get("Answer3")],
+                2: [data.get("Answer4"), data.get("Answer5"), data.get("Answer6")],
+                3: [data.get("Answer7"), data.get("Answer8"), data.get("Answer9")]
+            }
+            chosenAnswers = selectedAnswers[data["SelectedSet"]]
+
+            # get the relevant question id's from the "securityquestion" table
+            for question in chosenQuestions:
+                questionQuery = "SELECT QuestionID FROM SecurityQuestions WHERE QuestionPrompt = ?"
+                cursor.execute(questionQuery, question)
+                questionId = cursor.fetchone()
+                securityQuestions.append(questionId[0])
+
+            # insert account data into "logon" table
+            logonQuery = """
+                INSERT INTO Logon 
+                (PersonID, LogonName, Password, FirstChallengeQuestion, FirstChallengeAnswer, 
+                SecondChallengeQuestion, SecondChallengeAnswer, ThirdChallengeQuestion, ThirdChallengeAnswer, 
+                PositionTitle, AccountDisabled, AccountDeleted)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0)
+                """
+            cursor.execute(logonQuery,
+                personId, data["Username"], data["Password"],
+                securityQuestions[0], chosenAnswers[0],
+                securityQuestions[1], chosenAnswers[1],
+                securityQuestions[2], chosenAnswers[2],
+                position
+            )
+
+            # commit changes
+            conn.commit()
+            return True
     except Exception as e:
         print(f"Could not register user:\n{e}")
         messagebox.showerror(title="Registration Error", message="Could not register user")
-    finally:
-        close(conn, cursor)
 
 def loadQuestions(username):
     """
@@ -216,27 +348,25 @@ def loadQuestions(username):
         tuple: (Question1, Question2, Question3, Answer1, Answer2, Answer3) or None
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        query = """
-            SELECT sq1.QuestionPrompt, sq2.QuestionPrompt, sq3.QuestionPrompt, 
-                   l.FirstChallengeAnswer, l.SecondChallengeAnswer, l.ThirdChallengeAnswer
-            FROM Logon l
-            JOIN SecurityQuestions sq1 ON l.FirstChallengeQuestion = sq1.QuestionID
-            JOIN SecurityQuestions sq2 ON l.SecondChallengeQuestion = sq2.QuestionID
-            JOIN SecurityQuestions sq3 ON l.ThirdChallengeQuestion = sq3.QuestionID
-            WHERE LOWER(l.LogonName) = LOWER(?)
-        """
-
-        cursor.execute(query, (username,))
-        return cursor.fetchone()
+            query = """
+                SELECT sq1.QuestionPrompt, sq2.QuestionPrompt, sq3.QuestionPrompt, 
+                       l.FirstChallengeAnswer, l.SecondChallengeAnswer, l.ThirdChallengeAnswer
+                FROM Logon l
+                JOIN SecurityQuestions sq1 ON l.FirstChallengeQuestion = sq1.QuestionID
+                JOIN SecurityQuestions sq2 ON l.SecondChallengeQuestion = sq2.QuestionID
+                JOIN SecurityQuestions sq3 ON l.ThirdChallengeQuestion = sq3.QuestionID
+                WHERE LOWER(l.LogonName) = LOWER(?)
+            """
+
+            cursor.execute(query, (username,))
+            return cursor.fetchone()
     
     except Exception as e:
         print(f"Error getting security questions: {e}")
         messagebox.showerror(title="Database Error", message="Could not get retrieve security questions from database")
-    finally:
-        close(conn, cursor)
 
 def changePassword(username, password):
     """
@@ -247,22 +377,19 @@ def changePassword(username, password):
         password (str): The new password.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        query = "UPDATE Logon SET Password = ? WHERE LOWER(LogonName) = LOWER(?)"
-        cursor.execute(query, (password, username))
+            query = "UPDATE Logon SET Password = ? WHERE LOWER(LogonName) = LOWER(?)"
+            cursor.execute(query, (password, username))
         
-        conn.commit()
-        messagebox.showinfo(title="Password Updated", message="Your password has been changed!")
+            conn.commit()
+            messagebox.showinfo(title="Password Updated", message="Your password has been changed!")
 
     except Exception as e:
         print(f"Error updating password: {e}")
         messagebox.showerror(title="Database Error", message="Could not update password")
 
-    finally:
-        close(conn, cursor)
-
 def getItemByID(itemID):
     """
     Retrieves full item details by InventoryID.
@@ -272,202 +399,650 @@ def getItemByID(itemID):
 
     Returns:
         dict: Item data including ID, name, description, price, cost, etc., or None if not found.
+              The image itself is not included; load it with getItemImage.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-
-        query = '''
-            SELECT i.InventoryID, i.ItemName, i.ItemDescription, i.RetailPrice, i.Cost, i.Quantity, i.RestockThreshold, c.CategoryName, i.ItemImage
-            FROM Inventory i
-            JOIN Categories c ON i.CategoryID = c.CategoryID
-            WHERE i.InventoryID = ?
-        '''
-        cursor.execute(query, (itemID,))
-        row = cursor.fetchone()
-
-        if row:
-            return {
-                "InventoryID": row[0],
-                "ItemName": row[1],
-                "ItemDescription": row[2],
-                "RetailPrice": float(row[3]),
-                "Cost": float(row[4]),
-                "Quantity": row[5],
-                "RestockThreshold": row[6],
-                "CategoryName": row[7],
-                "ItemImage": row[8]
-            }
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            query = '''
+                SELECT i.InventoryID, i.ItemName, i.ItemDescription, i.RetailPrice, i.Cost, i.Quantity, i.RestockThreshold, c.CategoryName, img.ImageHash
+                FROM Inventory i
+                JOIN Categories c ON i.CategoryID = c.CategoryID
+                LEFT JOIN InventoryImage img ON i.InventoryID = img.InventoryID
+                WHERE i.InventoryID = ?
+            '''
+            cursor.execute(query, (itemID,))
+            row = cursor.fetchone()
+
+            if row:
+                return {
+                    "InventoryID": row[0],
+                    "ItemName": row[1],
+                    "ItemDescription": row[2],
+                    "RetailPrice": float(row[3]),
+                    "Cost": float(row[4]),
+                    "Quantity": row[5],
+                    "RestockThreshold": row[6],
+                    "CategoryName": row[7],
+                    "ImageHash": row[8]
+                }
 
     except Exception as e:
         print(f"Error in getItemByID: {e}")
-    finally:
-        close(conn, cursor)
 
-def getPageInventory(offset, limit):
+def toSearchQuery(keyword):
     """
-    Retrieves a page of inventory items.
+    Converts a customer's search text into an FTS5 query for InventorySearch. Every
+    word must match, and the last word also matches as a prefix so partly typed
+    words still find items.
 
     Args:
-        offset (int): Number of items to skip.
-        limit (int): Number of items to retrieve.
+        keyword (str): The search text.
 
     Returns:
-        list: List of inventory items as dictionaries.
+        str or None: The FTS5 query, or None if the text contains no searchable words.
     """
-    try:
-        conn = connect()
-        cursor = conn.cursor()
+    words = re.findall(r"\w+", keyword or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
 
-        query = '''
-            SELECT i.InventoryID, i.ItemName, i.ItemDescription, i.RetailPrice, i.Quantity, c.CategoryName, i.ItemImage
-            FROM Inventory i
-            JOIN Categories c ON i.CategoryID = c.CategoryID
-            WHERE i.Discontinued = 0 AND i.Quantity > 0
-            ORDER BY i.InventoryID
-            LIMIT ? OFFSET ?
-        '''
-        cursor.execute(query, (limit, offset))
-        rows = cursor.fetchall()
-
-        return [{
-            "InventoryID": row[0],
-            "ItemName": row[1],
-            "ItemDescription": row[2],
-            "RetailPrice": float(row[3]),
-            "Quantity": row[4],
-            "CategoryName": row[5],
-            "ItemImage": row[6]
-        } for row in rows]
+# Typo-tolerant search, used when the full-text index finds nothing
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_MAX_CANDIDATES = 200
+# Ranking every trigram match of a long misspelling takes 50-90 ms at 100k items
+# (benchmarks/fuzzy_search.py); the search runs on a cancellable LiveSearch worker
+FUZZY_TIME_BUDGET_MS = 100
+
+def compactText(text):
+    """
+    Lowercases text and keeps only letters and digits, matching how InventoryFuzzy is indexed.
+    """
+    return "".join(character for character in (text or "").lower() if character.isalnum())
+
+def getTrigrams(text):
+    """
+    Returns the set of three-character substrings of a compacted text.
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def fuzzySearchInventory(keyword, category):
+    """
+    Finds active items whose name or package names are close to the search text,
+    e.g. "silverdo" finds "Silverado" and "mach e" finds "Mustang Mach-E".
+
+    Candidates sharing trigrams with the text are read from the InventoryFuzzy index,
+    then ranked by the share of the text's trigrams they contain. The query is cut
+    off after FUZZY_TIME_BUDGET_MS so a vague search can never stall the UI.
+
+    Args:
+        keyword (str): The search text.
+        category (str): Optional category filter; if "All", no category filter is applied.
+
+    Returns:
+        list: Item dictionaries, most similar first. Returns an empty list if nothing is close
+            enough, the budget runs out, or an error occurs.
+    """
+    queryTrigrams = getTrigrams(compactText(keyword))
+    if not queryTrigrams:
+        return []
+
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            query = '''
+                SELECT i.InventoryID, i.ItemName, i.ItemDescription, i.RetailPrice,
+                       i.Quantity, c.CategoryName, img.ImageHash, f.CompactName, f.CompactPackages
+                FROM InventoryFuzzy f
+                CROSS JOIN Inventory i ON i.InventoryID = f.rowid
+                JOIN Categories c ON i.CategoryID = c.CategoryID
+                LEFT JOIN InventoryImage img ON i.InventoryID = img.InventoryID
+                WHERE InventoryFuzzy MATCH ? AND i.Discontinued = 0 AND i.Quantity > 0
+            '''
+            params = [" OR ".join(f'"{trigram}"' for trigram in sorted(queryTrigrams))]
+
+            if category and category != "All":
+                query += " AND c.CategoryName = ?"
+                params.append(category)
+
+            # Items sharing the most trigrams rank first, so the cap keeps the best candidates
+            query += " ORDER BY f.rank LIMIT ?"
+            params.append(FUZZY_MAX_CANDIDATES)
+
+            deadline = time.perf_counter() + FUZZY_TIME_BUDGET_MS / 1000
+            conn.set_progress_handler(lambda: time.perf_counter() > deadline, 1000)
+            try:
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            except sqlite3.OperationalError as e:
+                if "interrupted" not in str(e):
+                    raise
+                print(f"Fuzzy search for '{keyword}' stopped after {FUZZY_TIME_BUDGET_MS} ms")
+                rows = []
+            finally:
+                conn.set_progress_handler(None, 0)
+
+        matches = []
+        for row in rows:
+            # Score the name and each package name, keeping the best
+            best = (0.0, 0.0)
+            for text in [row[7]] + (row[8] or "").split():
+                textTrigrams = getTrigrams(text)
+                if not textTrigrams:
+                    continue
+                shared = len(queryTrigrams & textTrigrams)
+                best = max(best, (shared / len(queryTrigrams), shared / len(textTrigrams)))
+
+            if best[0] >= FUZZY_MIN_SIMILARITY:
+                matches.append((best, {
+                    "InventoryID": row[0],
+                    "ItemName": row[1],
+                    "ItemDescription": row[2],
+                    "RetailPrice": float(row[3]),
+                    "Quantity": row[4],
+                    "CategoryName": row[5],
+                    "ImageHash": row[6]
+                }))
+
+        matches.sort(key=lambda match: (-match[0][0], -match[0][1], match[1]["InventoryID"]))
+        return [item for _, item in matches]
 
     except Exception as e:
-        print(f"Error in getPageInventory: {e}")
+        print(f"Error in fuzzySearchInventory: {e}")
         return []
-    finally:
-        close(conn, cursor)
 
-def getInventoryCount():
+def searchInventoryPage(keyword, category, offset, limit):
     """
-    Retrieves the total number of active (non-discontinued) items in the Inventory table.
+    Searches the active items and returns one page of results together with the
+    total number of matches, in a single query. Keyword searches use the
+    InventorySearch full-text index over item names, descriptions, categories and
+    package names and are ordered by relevance; if nothing matches, the fuzzy
+    trigram search is used instead. Without a keyword items are in InventoryID order.
+
+    Args:
+        keyword (str): Optional search text.
+        category (str): Optional category filter; if "All", no category filter is applied.
+        offset (int): Number of records to skip (for pagination).
+        limit (int): Number of records to return.
 
     Returns:
-        int: The count of items where Discontinued = 0. Returns 0 if an error occurs.
+        tuple: (list of item dictionaries, total match count). Returns ([], 0) if an error occurs.
+            The count is 0 when the offset is past the last match.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            searchQuery = toSearchQuery(keyword)
+            params = []
+
+            query = '''
+                SELECT i.InventoryID, i.ItemName, i.ItemDescription, i.RetailPrice,
+                       i.Quantity, c.CategoryName, img.ImageHash, COUNT(*) OVER () AS TotalCount
+            '''
+            if searchQuery:
+                # CROSS JOIN keeps the full-text match as the outer loop instead of
+                # probing the index once per inventory row
+                query += '''
+                FROM InventorySearch s
+                CROSS JOIN Inventory i ON i.InventoryID = s.rowid
+                '''
+            else:
+                query += " FROM Inventory i"
+
+            query += '''
+                JOIN Categories c ON i.CategoryID = c.CategoryID
+                LEFT JOIN InventoryImage img ON i.InventoryID = img.InventoryID
+                WHERE i.Discontinued = 0 AND i.Quantity > 0
+            '''
+
+            if searchQuery:
+                query += " AND InventorySearch MATCH ?"
+                params.append(searchQuery)
+
+            if category and category != "All":
+                query += " AND c.CategoryName = ?"
+                params.append(category)
+
+            if searchQuery:
+                query += " ORDER BY s.rank, i.InventoryID"
+            else:
+                query += " ORDER BY i.InventoryID"
+            query += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+            items = [{
+                "InventoryID": row[0],
+                "ItemName": row[1],
+                "ItemDescription": row[2],
+                "RetailPrice": float(row[3]),
+                "Quantity": row[4],
+                "CategoryName": row[5],
+                "ImageHash": row[6]
+            } for row in rows]
+            totalCount = rows[0][7] if rows else 0
 
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM Inventory
-            WHERE Discontinued = 0""")
-        count = cursor.fetchone()[0]
-        return count
+            if searchQuery and not rows and (offset == 0 or countSearchInventory(keyword, category, fuzzy=False) == 0):
+                matches = fuzzySearchInventory(keyword, category)
+                return matches[offset:offset + limit], len(matches)
+
+            return items, totalCount
 
     except Exception as e:
-        print(f"Error getting inventory count: {e}")
-        return 0
+        print(f"Error in searchInventoryPage: {e}")
+        return [], 0
 
-    finally:
-        close(conn, cursor)
+# Customer catalog price filter: (label, lowest price, price it must be below)
+PRICE_BUCKETS = [
+    ("Under $30k", None, 30000),
+    ("$30k - $40k", 30000, 40000),
+    ("$40k - $50k", 40000, 50000),
+    ("$50k and up", 50000, None),
+]
 
-def searchInventory(keyword, category, offset, limit):
+def priceBucketSQL(column):
     """
-    Searches the inventory for active items based on a keyword and/or category,
-    and returns a paginated list of matching items.
+    Returns a SQL expression giving the index into PRICE_BUCKETS for a price column.
+    """
+    cases = " ".join(f"WHEN {column} < {upper} THEN {index}"
+                     for index, (_, _, upper) in enumerate(PRICE_BUCKETS) if upper is not None)
+    return f"CASE {cases} ELSE {len(PRICE_BUCKETS) - 1} END"
+
+def catalogMatchSet(cursor, keyword):
+    """
+    Returns the FROM clause, match condition and sort order selecting the items that
+    match a search. Keyword searches use the full-text index, or the fuzzy search when
+    the index matches nothing.
 
     Args:
-        keyword (str): Optional search term to match against item names.
-        category (str): Optional category filter; if "All", no category filter is applied.
-        offset (int): Number of records to skip (for pagination).
-        limit (int): Number of records to return.
+        cursor (sqlite3.Cursor): Cursor of the calling query.
+        keyword (str): Optional search text.
 
     Returns:
-        list: A list of dictionaries containing item details. Returns an empty list if no results or an error occurs.
+        tuple: (FROM clause over Inventory i, extra WHERE condition, ORDER BY expression, parameters).
+    """
+    searchQuery = toSearchQuery(keyword)
+    if not searchQuery:
+        return "FROM Inventory i", "", "i.InventoryID", []
+
+    cursor.execute('''
+        SELECT EXISTS (
+            SELECT 1 FROM InventorySearch s
+            CROSS JOIN Inventory i ON i.InventoryID = s.rowid
+            WHERE InventorySearch MATCH ? AND i.Discontinued = 0
+        )
+    ''', (searchQuery,))
+    if cursor.fetchone()[0]:
+        return ("FROM InventorySearch s CROSS JOIN Inventory i ON i.InventoryID = s.rowid",
+                "AND InventorySearch MATCH ?", "s.rank, i.InventoryID", [searchQuery])
+
+    # Items from the fuzzy search, kept in similarity order
+    fuzzyIDs = [item["InventoryID"] for item in fuzzySearchInventory(keyword, "All")]
+    return ("FROM json_each(?) m CROSS JOIN Inventory i ON i.InventoryID = m.value",
+            "", "m.key", [json.dumps(fuzzyIDs)])
+
+def getFacetCube(keyword, cursor=None):
+    """
+    Counts the active items matching a search, grouped by every facet value. Any
+    combination of facet filters can then be counted from the cube without another
+    query (see summarizeFacets). Without a keyword the cube is read from the
+    precomputed CatalogFacetCounts tables instead of counting the inventory.
+
+    Args:
+        keyword (str): Optional search text.
+        cursor (sqlite3.Cursor, optional): Cursor to run on, to share a transaction.
+
+    Returns:
+        dict or None: "items" [(category, price bucket, in stock, count)] and "packages"
+            [(category, price bucket, in stock, package name, count)]. None if an error occurs.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = cursor or conn.cursor()
+
+            if not toSearchQuery(keyword):
+                bucket = priceBucketSQL("f.RetailPrice")
+                cursor.execute(f'''
+                    SELECT c.CategoryName, {bucket}, f.InStock, SUM(f.ItemCount)
+                    FROM CatalogFacetCounts f
+                    JOIN Categories c ON f.CategoryID = c.CategoryID
+                    GROUP BY 1, 2, 3
+                ''')
+                items = cursor.fetchall()
+                cursor.execute(f'''
+                    SELECT c.CategoryName, {bucket}, f.InStock, f.PackageName, SUM(f.ItemCount)
+                    FROM CatalogPackageFacetCounts f
+                    JOIN Categories c ON f.CategoryID = c.CategoryID
+                    GROUP BY 1, 2, 3, 4
+                ''')
+                return {"items": items, "packages": cursor.fetchall()}
+
+            fromSQL, matchSQL, _, params = catalogMatchSet(cursor, keyword)
+            bucket = priceBucketSQL("i.RetailPrice")
+
+            cursor.execute(f'''
+                SELECT c.CategoryName, {bucket}, i.Quantity > 0, COUNT(*)
+                {fromSQL}
+                JOIN Categories c ON i.CategoryID = c.CategoryID
+                WHERE i.Discontinued = 0 {matchSQL}
+                GROUP BY 1, 2, 3
+            ''', params)
+            items = cursor.fetchall()
+
+            cursor.execute(f'''
+                SELECT c.CategoryName, {bucket}, i.Quantity > 0, p.PackageName, COUNT(DISTINCT i.InventoryID)
+                {fromSQL}
+                JOIN Categories c ON i.CategoryID = c.CategoryID
+                JOIN ProductPackage p ON p.InventoryID = i.InventoryID
+                WHERE i.Discontinued = 0 {matchSQL}
+                GROUP BY 1, 2, 3, 4
+            ''', params)
+            packages = cursor.fetchall()
+
+            return {"items": items, "packages": packages}
 
-        query = '''
-            SELECT i.InventoryID, i.ItemName, i.ItemDescription, i.RetailPrice,
-                   i.Quantity, c.CategoryName, i.ItemImage
-            FROM Inventory i
-            JOIN Categories c ON i.CategoryID = c.CategoryID
-            WHERE i.Discontinued = 0 AND Quantity > 0
-        '''
+    except Exception as e:
+        print(f"Error in getFacetCube: {e}")
+        return None
 
-        params = []
+def summarizeFacets(cube, category, filters):
+    """
+    Works out the total and the facet counts for a set of filters from a facet cube.
 
-        if keyword:
-            query += " AND i.ItemName LIKE ?"
-            params.append(f"%{keyword}%")
+    Each facet is counted with every other filter applied but not its own, so it shows
+    how many items each choice would give, e.g. the category counts respect the price
+    filter but not the selected category.
 
-        if category and category != "All":
-            query += " AND c.CategoryName = ?"
-            params.append(category)
+    Args:
+        cube (dict): A cube from getFacetCube.
+        category (str): Category filter; "All" or None applies no filter.
+        filters (dict or None): Optional "priceBucket" (index into PRICE_BUCKETS),
+            "package" (package name) and "inStockOnly" (bool, default True) filters.
 
-        query += " ORDER BY i.InventoryID LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+    Returns:
+        tuple: (total match count, facets). Facets is a dict with "category" {name: count},
+            "price" {bucket index: count}, "package" {name: count} and
+            "stock" {"inStock": count, "all": count}.
+    """
+    filters = filters or {}
+    category = category if category and category != "All" else None
+    priceBucket = filters.get("priceBucket")
+    package = filters.get("package")
+    inStockOnly = filters.get("inStockOnly", True)
+
+    def matches(row, exclude):
+        return ((exclude == "category" or category is None or row[0] == category) and
+                (exclude == "price" or priceBucket is None or row[1] == priceBucket) and
+                (exclude == "stock" or not inStockOnly or row[2]))
+
+    # With a package filter every count comes from that package's rows
+    if package:
+        rows = [row[:3] + row[4:] for row in cube["packages"] if row[3] == package]
+    else:
+        rows = cube["items"]
+
+    facets = {"category": {}, "price": {}, "package": {}, "stock": {"inStock": 0, "all": 0}}
+    total = 0
+    for row in rows:
+        count = row[-1]
+        if matches(row, None):
+            total += count
+        if matches(row, "category"):
+            facets["category"][row[0]] = facets["category"].get(row[0], 0) + count
+        if matches(row, "price"):
+            facets["price"][row[1]] = facets["price"].get(row[1], 0) + count
+        if matches(row, "stock"):
+            facets["stock"]["all"] += count
+            if row[2]:
+                facets["stock"]["inStock"] += count
+
+    for row in cube["packages"]:
+        if matches(row, None):
+            facets["package"][row[3]] = facets["package"].get(row[3], 0) + row[4]
+
+    return total, facets
+
+def searchInventoryFiltered(keyword, category, filters, offset, limit, cursor=None):
+    """
+    Returns one page of a catalog search with the customer's facet filters applied.
+    Keyword searches are ordered by relevance, otherwise items are in InventoryID order.
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-
-        return [{
-            "InventoryID": row[0],
-            "ItemName": row[1],
-            "ItemDescription": row[2],
-            "RetailPrice": float(row[3]),
-            "Quantity": row[4],
-            "CategoryName": row[5],
-            "ItemImage": row[6]
-        } for row in rows]
+    Args:
+        keyword (str): Optional search text.
+        category (str): Optional category filter; if "All", no category filter is applied.
+        filters (dict or None): Optional "priceBucket", "package" and "inStockOnly" filters.
+        offset (int): Number of records to skip (for pagination).
+        limit (int): Number of records to return.
+        cursor (sqlite3.Cursor, optional): Cursor to run on, to share a transaction.
+
+    Returns:
+        list: A list of item dictionaries. Returns an empty list if an error occurs.
+    """
+    filters = filters or {}
+    try:
+        with dbConnection() as conn:
+            cursor = cursor or conn.cursor()
+
+            fromSQL, matchSQL, orderSQL, params = catalogMatchSet(cursor, keyword)
+            query = f'''
+                SELECT i.InventoryID, i.ItemName, i.ItemDescription, i.RetailPrice,
+                       i.Quantity, c.CategoryName, img.ImageHash
+                {fromSQL}
+                JOIN Categories c ON i.CategoryID = c.CategoryID
+                LEFT JOIN InventoryImage img ON i.InventoryID = img.InventoryID
+                WHERE i.Discontinued = 0 {matchSQL}
+            '''
+
+            if category and category != "All":
+                query += " AND c.CategoryName = ?"
+                params.append(category)
+            if filters.get("priceBucket") is not None:
+                _, lower, upper = PRICE_BUCKETS[filters["priceBucket"]]
+                if lower is not None:
+                    query += " AND i.RetailPrice >= ?"
+                    params.append(lower)
+                if upper is not None:
+                    query += " AND i.RetailPrice < ?"
+                    params.append(upper)
+            if filters.get("package"):
+                query += " AND EXISTS (SELECT 1 FROM ProductPackage p WHERE p.InventoryID = i.InventoryID AND p.PackageName = ?)"
+                params.append(filters["package"])
+            if filters.get("inStockOnly", True):
+                query += " AND i.Quantity > 0"
+
+            query += f" ORDER BY {orderSQL} LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+            return [{
+                "InventoryID": row[0],
+                "ItemName": row[1],
+                "ItemDescription": row[2],
+                "RetailPrice": float(row[3]),
+                "Quantity": row[4],
+                "CategoryName": row[5],
+                "ImageHash": row[6]
+            } for row in rows]
 
     except Exception as e:
-        print(f"Error in searchInventory: {e}")
+        print(f"Error in searchInventoryFiltered: {e}")
         return []
-    finally:
-        close(conn, cursor)
 
-def countSearchInventory(keyword, category):
+def searchInventoryFacets(keyword, category, filters, offset, limit):
     """
-    Counts how many inventory items match the given keyword and category filters.
+    Searches the catalog with the customer's facet filters and returns a page of
+    results, the total number of matches and the facet counts, all read in one
+    transaction.
 
     Args:
-        keyword (str): Optional search term to match against item names.
+        keyword (str): Optional search text.
         category (str): Optional category filter; if "All", no category filter is applied.
+        filters (dict or None): Optional "priceBucket", "package" and "inStockOnly" filters.
+        offset (int): Number of records to skip (for pagination).
+        limit (int): Number of records to return.
 
     Returns:
-        int: The count of matching inventory items. Returns 0 if an error occurs.
+        tuple: (list of item dictionaries, total match count, facets, facet cube). See
+            summarizeFacets for the facets. Returns ([], 0, None, None) if an error occurs.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            # One read transaction, so the page and the counts see the same data
+            cursor.execute("BEGIN")
+
+            cube = getFacetCube(keyword, cursor)
+            if cube is None:
+                return [], 0, None, None
+            items = searchInventoryFiltered(keyword, category, filters, offset, limit, cursor)
+            totalCount, facets = summarizeFacets(cube, category, filters)
+            return items, totalCount, facets, cube
+
+    except Exception as e:
+        print(f"Error in searchInventoryFacets: {e}")
+        return [], 0, None, None
+
+def searchInventory(keyword, category, offset, limit):
+    """
+    Searches the inventory for active items based on a keyword and/or category,
+    and returns a paginated list of matching items.
 
-        query = '''
-            SELECT COUNT(*)
-            FROM Inventory i
-            JOIN Categories c ON i.CategoryID = c.CategoryID
-            WHERE i.Discontinued = 0 AND Quantity > 0
-        '''
+    Args:
+        keyword (str): Optional search text, matched against the full-text index.
+        category (str): Optional category filter; if "All", no category filter is applied.
+        offset (int): Number of records to skip (for pagination).
+        limit (int): Number of records to return.
 
-        params = []
+    Returns:
+        list: A list of dictionaries containing item details. Returns an empty list if no results or an error occurs.
+    """
+    return searchInventoryPage(keyword, category, offset, limit)[0]
 
-        if keyword:
-            query += " AND i.ItemName LIKE ?"
-            params.append(f"%{keyword}%")
-        if category and category != "All":
-            query += " AND c.CategoryName = ?"
-            params.append(category)
+def countSearchInventory(keyword, category, fuzzy=True):
+    """
+    Counts how many inventory items match the given keyword and category filters.
 
-        cursor.execute(query, params)
-        return cursor.fetchone()[0]
+    Args:
+        keyword (str): Optional search text, matched against the full-text index.
+        category (str): Optional category filter; if "All", no category filter is applied.
+        fuzzy (bool): Count fuzzy matches when the full-text index finds nothing,
+            as searchInventoryPage does.
+
+    Returns:
+        int: The count of matching inventory items. Returns 0 if an error occurs.
+    """
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            searchQuery = toSearchQuery(keyword)
+            params = []
+
+            if searchQuery:
+                query = '''
+                    SELECT COUNT(*)
+                    FROM InventorySearch s
+                    CROSS JOIN Inventory i ON i.InventoryID = s.rowid
+                    JOIN Categories c ON i.CategoryID = c.CategoryID
+                    WHERE InventorySearch MATCH ? AND i.Discontinued = 0 AND Quantity > 0
+                '''
+                params.append(searchQuery)
+            else:
+                query = '''
+                    SELECT COUNT(*)
+                    FROM Inventory i
+                    JOIN Categories c ON i.CategoryID = c.CategoryID
+                    WHERE i.Discontinued = 0 AND Quantity > 0
+                '''
+
+            if category and category != "All":
+                query += " AND c.CategoryName = ?"
+                params.append(category)
+
+            cursor.execute(query, params)
+            count = cursor.fetchone()[0]
+
+        if count == 0 and searchQuery and fuzzy:
+            return len(fuzzySearchInventory(keyword, category))
+        return count
     
     except Exception as e:
         print(f"Error in countSearchInventory: {e}")
         return 0
-    finally:
-        close(conn, cursor)
+
+def seekInventory(category, afterID=None, beforeID=None, limit=12):
+    """
+    Retrieves a page of active items using keyset pagination on InventoryID. Unlike
+    LIMIT/OFFSET, the cost does not grow with how deep the page is. Keyword searches
+    are ordered by relevance, not InventoryID, and are paged by searchInventoryFiltered.
+
+    Args:
+        category (str): Optional category filter; if "All", no category filter is applied.
+        afterID (int, optional): Return the items that follow this InventoryID.
+        beforeID (int, optional): Return the items that precede this InventoryID.
+            Ignored if afterID is given. With neither, the first page is returned.
+        limit (int): Number of records to return.
+
+    Returns:
+        list: A list of item dictionaries in InventoryID order. Returns an empty list if an error occurs.
+    """
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            query = '''
+                SELECT i.InventoryID, i.ItemName, i.ItemDescription, i.RetailPrice,
+                       i.Quantity, c.CategoryName, img.ImageHash
+                FROM Inventory i
+                JOIN Categories c ON i.CategoryID = c.CategoryID
+                LEFT JOIN InventoryImage img ON i.InventoryID = img.InventoryID
+                WHERE i.Discontinued = 0 AND Quantity > 0
+            '''
+
+            params = []
+
+            if category and category != "All":
+                query += " AND c.CategoryName = ?"
+                params.append(category)
+
+            if afterID is not None:
+                query += " AND i.InventoryID > ? ORDER BY i.InventoryID LIMIT ?"
+                params.extend([afterID, limit])
+            elif beforeID is not None:
+                # Walk backwards from the anchor, then flip back into ascending order
+                query += " AND i.InventoryID < ? ORDER BY i.InventoryID DESC LIMIT ?"
+                params.extend([beforeID, limit])
+            else:
+                query += " ORDER BY i.InventoryID LIMIT ?"
+                params.append(limit)
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            if afterID is None and beforeID is not None:
+                rows.reverse()
+
+            return [{
+                "InventoryID": row[0],
+                "ItemName": row[1],
+                "ItemDescription": row[2],
+                "RetailPrice": float(row[3]),
+                "Quantity": row[4],
+                "CategoryName": row[5],
+                "ImageHash": row[6]
+            } for row in rows]
+
+    except Exception as e:
+        print(f"Error in seekInventory: {e}")
+        return []
 
 def validatePromoCode(code, cartItems=None):
     """
@@ -482,58 +1057,56 @@ def validatePromoCode(code, cartItems=None):
         dict or None: A dictionary of discount details if valid, otherwise None.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-
-        query = '''
-            SELECT DiscountID, DiscountCode, Description, DiscountLevel, InventoryID,
-                   DiscountType, DiscountPercentage, DiscountDollarAmount,
-                   StartDate, ExpirationDate
-            FROM Discounts
-            WHERE DiscountCode = ?
-        '''
-        cursor.execute(query, (code,))
-        row = cursor.fetchone()
-
-        if row:
-            startDate = date.fromisoformat(row[8])
-            endDate = date.fromisoformat(row[9])
-            today = date.today()
-
-            if (startDate > today) or (endDate < today):
-                # Not started or expired
-                return None
-
-            discount = {
-                "DiscountID": row[0],
-                "DiscountCode": row[1],
-                "Description": row[2],
-                "DiscountLevel": row[3],
-                "InventoryID": row[4],
-                "DiscountType": row[5],
-                "DiscountPercentage": float(row[6]) if row[6] is not None else 0,
-                "DiscountDollarAmount": float(row[7]) if row[7] is not None else 0,
-                "StartDate": startDate,
-                "ExpirationDate": endDate
-            }
-
-            # Ensure item in cart if item level discount
-            if discount["DiscountLevel"] == 1:
-                if not cartItems:
-                    return None
-                matching = any(item.get("InventoryID") == discount["InventoryID"] for item in cartItems)
-                if not matching:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            query = '''
+                SELECT DiscountID, DiscountCode, Description, DiscountLevel, InventoryID,
+                       DiscountType, DiscountPercentage, DiscountDollarAmount,
+                       StartDate, ExpirationDate
+                FROM Discounts
+                WHERE DiscountCode = ?
+            '''
+            cursor.execute(query, (code,))
+            row = cursor.fetchone()
+
+            if row:
+                startDate = date.fromisoformat(row[8])
+                endDate = date.fromisoformat(row[9])
+                today = date.today()
+
+                if (startDate > today) or (endDate < today):
+                    # Not started or expired
                     return None
 
-            return discount
-        else:
-            return None
+                discount = {
+                    "DiscountID": row[0],
+                    "DiscountCode": row[1],
+                    "Description": row[2],
+                    "DiscountLevel": row[3],
+                    "InventoryID": row[4],
+                    "DiscountType": row[5],
+                    "DiscountPercentage": float(row[6]) if row[6] is not None else 0,
+                    "DiscountDollarAmount": float(row[7]) if row[7] is not None else 0,
+                    "StartDate": startDate,
+                    "ExpirationDate": endDate
+                }
+
+                # Ensure item in cart if item level discount
+                if discount["DiscountLevel"] == 1:
+                    if not cartItems:
+                        return None
+                    matching = any(item.get("InventoryID") == discount["InventoryID"] for item in cartItems)
+                    if not matching:
+                        return None
+
+                return discount
+            else:
+                return None
 
     except Exception as e:
         print(f"Error in validatePromoCode: {e}")
         return None
-    finally:
-        close(conn, cursor)
 
 def getProductPackages(inventoryID):
     """
@@ -547,24 +1120,22 @@ def getProductPackages(inventoryID):
               If no packages exist, returns a default 'Standard' package.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        query = """
-            SELECT PackageName, PackageDescription
-            FROM ProductPackage
-            WHERE InventoryID = ?
-        """
-        cursor.execute(query, (inventoryID,))
-        rows = cursor.fetchall()
-        # Return packages - default to "Standard" "Standard configuration"
-        return [{"name": row[0], "description": row[1]} for row in rows] if rows else [{"name": "Standard", "description": "Standard configuration"}]
+            query = """
+                SELECT PackageName, PackageDescription
+                FROM ProductPackage
+                WHERE InventoryID = ?
+            """
+            cursor.execute(query, (inventoryID,))
+            rows = cursor.fetchall()
+            # Return packages - default to "Standard" "Standard configuration"
+            return [{"name": row[0], "description": row[1]} for row in rows] if rows else [{"name": "Standard", "description": "Standard configuration"}]
 
     except Exception as e:
         print(f"Error fetching packages for InventoryID {inventoryID}: {e}")
         return [{"name": "Standard", "description": "Standard configuration"}]
-    finally:
-        close(conn, cursor)
 
 def getCategories():
     """
@@ -574,67 +1145,116 @@ def getCategories():
         list: A list of category names with "All" prepended to the list.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        cursor.execute("SELECT CategoryName FROM Categories")
-        rows = cursor.fetchall()
-        return ["All"] + [row[0] for row in rows]
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT CategoryName FROM Categories")
+            rows = cursor.fetchall()
+            return ["All"] + [row[0] for row in rows]
     except Exception as e:
         print(f"Error fetching categories: {e}")
         return ["All"]
-    finally:
-        close(conn, cursor)
 
-def insertOrder(personID, discountID, ccNumber, expDate, ccv, managerID=None):
+def getCatalogVersion():
+    """
+    Retrieves the catalog change counter, which increases on every write to the
+    inventory, package, category or image tables.
+
+    Returns:
+        int or None: The current version, or None if an error occurs.
     """
-    Inserts a new order into the Orders table.
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT Version FROM CatalogVersion WHERE VersionID = 1")
+            row = cursor.fetchone()
+            return row[0] if row else None
+    except Exception as e:
+        print(f"Error fetching catalog version: {e}")
+        return None
+
+# Units in a cart are held for the cart until HOLD_SECONDS after it last changed, so
+# two terminals cannot both sell the last unit. Stock held by other carts cannot be
+# added to a cart or sold (see placeHold and commitOrder).
+HOLD_SECONDS = 15 * 60
+
+# Units of InventoryID (first parameter) held by carts other than the given holder
+HELD_BY_OTHERS_SQL = """
+    SELECT COALESCE(SUM(Quantity), 0)
+    FROM StockHold
+    WHERE InventoryID = ? AND ExpiresAt > ? AND HolderKey != ?
+"""
+
+def commitOrder(personID, discount, ccNumber, expDate, ccv, cart, managerID=None, holderKey=None):
+    """
+    Saves an order in a single transaction: the Orders row, an OrderDetails row per
+    cart line (with its price, package, discount and tax), the stock decrement for each
+    line and the release of the cart's holds.
+    Either all of it is committed or, if anything fails, none of it is.
+
+    A line only sells if the stock left after it still covers every other cart's
+    unexpired holds, so held units are never sold twice.
 
     Args:
         personID (int): The ID of the person placing the order.
-        discountID (int): The ID of the discount applied (can be None).
+        discount (dict): The discount applied, as returned by validatePromoCode (can be None).
         ccNumber (str): Credit card number.
         expDate (str): Expiration date of the card.
         ccv (str): Credit card security code.
+        cart (list): Cart item dictionaries with 'InventoryID', 'name', 'package', 'price'
+            and 'quantity'.
         managerID (int, optional): ID of the manager processing the order.
+        holderKey (str, optional): The cart's hold key, whose holds become the sale.
 
     Returns:
         int: The newly created OrderID.
-    """
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO Orders (DiscountID, PersonID, EmployeeID, OrderDate, CC_Number, ExpDate, CCV)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (discountID, personID, managerID, date.today(), ccNumber, expDate, ccv))
-    conn.commit()
-
-    # Get the OrderID
-    orderID = cursor.lastrowid
-    close(conn, cursor)
-    return int(orderID)
 
-def insertOrderDetail(orderID, inventoryID, quantity, discountID=None):
-    """
-    Inserts a record into the OrderDetails table for a given order.
-
-    Args:
-        orderID (int): The ID of the order.
-        inventoryID (int): The inventory item ID.
-        quantity (int): Quantity purchased.
-        discountID (int, optional): The discount ID applied to this item.
+    Raises:
+        Exception: If an item no longer has enough stock or the order could not be saved.
     """
-    try:
-        conn = connect()
+    discountID = discount['DiscountID'] if discount else None
+    amounts = Pricing.priceOrderLines(cart, discount)
+    with dbConnection() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO OrderDetails (OrderID, InventoryID, DiscountID, Quantity)
-            VALUES (?, ?, ?, ?)
-        """, (orderID, inventoryID, discountID, quantity))
-        conn.commit()
-    except Exception as e:
-        print(f"Error adding order details to DB: {e}")
-    finally:
-        close(conn, cursor)
+        try:
+            # Take the write lock up front so stock cannot change between check and decrement
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                INSERT INTO Orders (DiscountID, PersonID, EmployeeID, OrderDate, CC_Number, ExpDate, CCV)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (discountID, personID, managerID, date.today().isoformat(), ccNumber, expDate, ccv))
+            orderID = cursor.lastrowid
+
+            # Each line records what was charged for it and what the item cost, so
+            # receipts and reports never depend on the item's later price or cost
+            cursor.executemany("""
+                INSERT INTO OrderDetails (OrderID, InventoryID, DiscountID, Quantity, ItemName, PackageName,
+                                          UnitPrice, DiscountAmount, TaxAmount, UnitCost)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, (SELECT Cost FROM Inventory WHERE InventoryID = ?))
+            """, [(orderID, item['InventoryID'], discountID, item['quantity'], item['name'], item['package'],
+                   item['price'], discountAmt, taxAmt, item['InventoryID'])
+                  for item, (discountAmt, taxAmt) in zip(cart, amounts)])
+
+            now = time.time()
+            for item in cart:
+                cursor.execute(f"""
+                    UPDATE Inventory
+                    SET Quantity = Quantity - ?
+                    WHERE InventoryID = ? AND Quantity - ({HELD_BY_OTHERS_SQL}) >= ?
+                """, (item['quantity'], item['InventoryID'], item['InventoryID'], now, holderKey or "", item['quantity']))
+                if cursor.rowcount != 1:
+                    raise ValueError(f"Insufficient stock for {item['name']}.")
+
+            if holderKey:
+                cursor.execute("DELETE FROM StockHold WHERE HolderKey = ?", (holderKey,))
+            conn.commit()
+        except ValueError:
+            conn.rollback()
+            raise
+        except Exception as e:
+            conn.rollback()
+            print(f"Error committing order: {e}")
+            raise Exception("The order could not be saved. No changes were made.")
+    return int(orderID)
 
 def updateInventoryQuantity(inventoryID, quantityChange):
     """
@@ -648,46 +1268,262 @@ def updateInventoryQuantity(inventoryID, quantityChange):
         Exception: If update fails or stock is insufficient.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE Inventory
-            SET Quantity = Quantity + ?
-            WHERE InventoryID = ?
-        """, (quantityChange, inventoryID))
-        conn.commit()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE Inventory
+                SET Quantity = Quantity + ?
+                WHERE InventoryID = ?
+            """, (quantityChange, inventoryID))
+            conn.commit()
     except Exception as e:
-        conn.rollback()
         print(f"Inventory update failed: {e}")
         raise Exception("Insufficient stock or invalid inventory update.")
-    finally:
-        close(conn, cursor)
 
-def checkQuantity(inventoryID):
+def getAvailableQuantity(inventoryID, holderKey=None):
     """
-    Returns the current quantity for a specific inventory item.
+    Returns how many units of an item a cart can take: the stock on hand less the
+    units held by other carts.
 
     Args:
         inventoryID (int): The ID of the item.
+        holderKey (str, optional): The cart's hold key. Without one, every hold counts.
 
     Returns:
-        int: The current quantity, or 0 if item is not found.
+        int: The available quantity, or 0 if the item is not found.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        cursor.execute("""SELECT Quantity 
-                       FROM Inventory
-                       WHERE InventoryID = ?""", (inventoryID,))
-        row = cursor.fetchone()
-        if row:
-            return row[0]
-        else:
-            return 0
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT Quantity - ({HELD_BY_OTHERS_SQL})
+                FROM Inventory
+                WHERE InventoryID = ?
+            """, (inventoryID, time.time(), holderKey or "", inventoryID))
+            row = cursor.fetchone()
+            return max(row[0], 0) if row else 0
     except Exception as e:
-        print(f"Error in checkQuantity: {e}")
-    finally:
-        close(conn, cursor)
+        print(f"Error in getAvailableQuantity: {e}")
+        return 0
+
+# Stock of each item in a JSON array of InventoryIDs (first parameter) less the units
+# held by carts other than the given holder
+AVAILABLE_STOCK_SQL = """
+    SELECT i.InventoryID, i.ItemName, i.RetailPrice, i.Discontinued,
+           i.Quantity - COALESCE((SELECT SUM(h.Quantity)
+                                  FROM StockHold h
+                                  WHERE h.InventoryID = i.InventoryID AND h.ExpiresAt > ? AND h.HolderKey != ?), 0)
+    FROM json_each(?) ids
+    JOIN Inventory i ON i.InventoryID = ids.value
+"""
+
+def getCartStatus(inventoryIDs, holderKey=None):
+    """
+    Looks up the current name, price, discontinued flag and available stock of every
+    item in a cart with a single query.
+
+    Args:
+        inventoryIDs (iterable): The cart's InventoryIDs.
+        holderKey (str, optional): The cart's hold key, so its own holds count as available.
+
+    Returns:
+        dict or None: InventoryID -> {"name", "price", "discontinued", "available"}, or None
+            if an error occurs. Items no longer in the inventory are missing.
+    """
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(AVAILABLE_STOCK_SQL, (time.time(), holderKey or "", json.dumps(list(inventoryIDs))))
+            return {row[0]: {
+                "name": row[1],
+                "price": row[2],
+                "discontinued": bool(row[3]),
+                "available": max(row[4], 0)
+            } for row in cursor.fetchall()}
+    except Exception as e:
+        print(f"Error fetching cart status: {e}")
+        return None
+
+def placeHolds(holderKey, quantities):
+    """
+    Sets how many units of each item a cart holds and renews the holds for HOLD_SECONDS,
+    in one transaction. Each hold is only changed if that many units are available to
+    the cart; a quantity of 0 releases it.
+
+    Args:
+        holderKey (str): The cart's hold key.
+        quantities (dict): InventoryID -> total units of the item in the cart.
+
+    Returns:
+        dict: InventoryID -> units available to the cart. A hold was placed if its
+            quantity is no more than this. Empty if an error occurs.
+    """
+    now = time.time()
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            # Lock out other writers so two carts cannot both claim the last unit
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(AVAILABLE_STOCK_SQL, (now, holderKey, json.dumps(list(quantities))))
+            available = {row[0]: max(row[4], 0) for row in cursor.fetchall()}
+
+            cursor.executemany("DELETE FROM StockHold WHERE HolderKey = ? AND InventoryID = ?",
+                               [(holderKey, inventoryID) for inventoryID, quantity in quantities.items() if quantity <= 0])
+            cursor.executemany("""
+                INSERT INTO StockHold (HolderKey, InventoryID, Quantity, ExpiresAt)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (HolderKey, InventoryID)
+                DO UPDATE SET Quantity = excluded.Quantity, ExpiresAt = excluded.ExpiresAt
+            """, [(holderKey, inventoryID, quantity, now + HOLD_SECONDS) for inventoryID, quantity in quantities.items()
+                  if 0 < quantity <= available.get(inventoryID, 0)])
+            conn.commit()
+            return available
+    except Exception as e:
+        print(f"Error placing stock holds: {e}")
+        return {}
+
+def placeHold(holderKey, inventoryID, quantity):
+    """
+    Sets how many units of one item a cart holds. See placeHolds.
+
+    Args:
+        holderKey (str): The cart's hold key.
+        inventoryID (int): The ID of the item.
+        quantity (int): Total units of the item in the cart.
+
+    Returns:
+        int: The units available to the cart. The hold was placed if quantity is no more than this.
+    """
+    return placeHolds(holderKey, {inventoryID: quantity}).get(inventoryID, 0)
+
+def renewHolds(holderKey):
+    """
+    Extends a cart's unexpired holds by HOLD_SECONDS from now. Holds that have already
+    expired stay expired, since their units may have been taken since.
+
+    Args:
+        holderKey (str): The cart's hold key.
+    """
+    now = time.time()
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE StockHold
+                SET ExpiresAt = ?
+                WHERE HolderKey = ? AND ExpiresAt > ?
+            """, (now + HOLD_SECONDS, holderKey, now))
+            conn.commit()
+    except Exception as e:
+        print(f"Error renewing stock holds: {e}")
+
+def releaseHolds(holderKey):
+    """
+    Releases every hold a cart has.
+
+    Args:
+        holderKey (str): The cart's hold key.
+    """
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM StockHold WHERE HolderKey = ?", (holderKey,))
+            conn.commit()
+    except Exception as e:
+        print(f"Error releasing stock holds: {e}")
+
+def reapExpiredHolds():
+    """
+    Deletes expired holds.
+
+    Returns:
+        int: The number of holds deleted.
+    """
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM StockHold WHERE ExpiresAt <= ?", (time.time(),))
+            conn.commit()
+            return cursor.rowcount
+    except Exception as e:
+        print(f"Error reaping stock holds: {e}")
+        return 0
+
+def getCartItems(personID):
+    """
+    Retrieves a person's saved cart, priced and named from the current inventory.
+
+    Args:
+        personID (int): The ID of the person.
+
+    Returns:
+        list: Cart line dictionaries with InventoryID, name, package, price and quantity,
+              in the order they were added.
+    """
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.InventoryID, i.ItemName, c.PackageName, i.RetailPrice, c.Quantity
+                FROM CartItem c
+                JOIN Inventory i ON c.InventoryID = i.InventoryID
+                WHERE c.PersonID = ?
+                ORDER BY c.AddedAt
+            """, (personID,))
+            return [{
+                "InventoryID": row[0],
+                "name": row[1],
+                "package": row[2],
+                "price": row[3],
+                "quantity": row[4]
+            } for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"Error fetching cart: {e}")
+        return []
+
+def saveCartItem(personID, inventoryID, packageName, quantity):
+    """
+    Saves one line of a person's cart. A quantity of 0 removes the line.
+
+    Args:
+        personID (int): The ID of the person.
+        inventoryID (int): The ID of the item.
+        packageName (str): The package chosen for the item.
+        quantity (int): The line's quantity.
+    """
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            if quantity > 0:
+                cursor.execute("""
+                    INSERT INTO CartItem (PersonID, InventoryID, PackageName, Quantity, AddedAt)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (PersonID, InventoryID, PackageName)
+                    DO UPDATE SET Quantity = excluded.Quantity
+                """, (personID, inventoryID, packageName, quantity, time.time()))
+            else:
+                cursor.execute("""
+                    DELETE FROM CartItem
+                    WHERE PersonID = ? AND InventoryID = ? AND PackageName = ?
+                """, (personID, inventoryID, packageName))
+            conn.commit()
+    except Exception as e:
+        print(f"Error saving cart item: {e}")
+
+def clearCartItems(personID):
+    """
+    Deletes a person's saved cart.
+
+    Args:
+        personID (int): The ID of the person.
+    """
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM CartItem WHERE PersonID = ?", (personID,))
+            conn.commit()
+    except Exception as e:
+        print(f"Error clearing cart: {e}")
 
 def removeItem(itemID):
     """
@@ -697,18 +1533,16 @@ def removeItem(itemID):
         itemID (int): The ID of the item to discontinue.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        query = """UPDATE Inventory
-            SET Discontinued = 1
-            WHERE InventoryID = ?"""
-        cursor.execute(query, (itemID,))
-        conn.commit()
+            query = """UPDATE Inventory
+                SET Discontinued = 1
+                WHERE InventoryID = ?"""
+            cursor.execute(query, (itemID,))
+            conn.commit()
     except Exception as e:
         print(f"Error removing item: {e}")
-    finally:
-        close(conn, cursor)
 
 def searchInventoryManager(keyword):
     """
@@ -721,33 +1555,31 @@ def searchInventoryManager(keyword):
         list: A list of matching inventory items with detailed data.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        query = '''
-            SELECT InventoryID, ItemName, Cost, RetailPrice, Quantity, RestockThreshold, Discontinued
-            FROM Inventory
-            WHERE ItemName LIKE ?
-        '''
-
-        cursor.execute(query, (f"%{keyword}%",))
-        rows = cursor.fetchall()
-
-        return [{
-            "InventoryID": row[0],
-            "ItemName": row[1],
-            "Cost": row[2],
-            "RetailPrice": row[3],
-            "Quantity": row[4],
-            "RestockThreshold": row[5],
-            "Discontinued": row[6]
-        } for row in rows]
+            query = '''
+                SELECT InventoryID, ItemName, Cost, RetailPrice, Quantity, RestockThreshold, Discontinued
+                FROM Inventory
+                WHERE ItemName LIKE ?
+            '''
+
+            cursor.execute(query, (f"%{keyword}%",))
+            rows = cursor.fetchall()
+
+            return [{
+                "InventoryID": row[0],
+                "ItemName": row[1],
+                "Cost": row[2],
+                "RetailPrice": row[3],
+                "Quantity": row[4],
+                "RestockThreshold": row[5],
+                "Discontinued": row[6]
+            } for row in rows]
 
     except Exception as e:
         print(f"Error in searchInventory: {e}")
         return []
-    finally:
-        close(conn, cursor)
 
 def addInventoryItem(name, description, categoryName, cost, retailPrice, quantity, restockThreshold, packages, imageBlob):
     """
@@ -765,54 +1597,93 @@ def addInventoryItem(name, description, categoryName, cost, retailPrice, quantit
         imageBlob (bytes): Binary image data.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-
-        # Get the CategoryID
-        categoryQuery = "SELECT CategoryID FROM Categories WHERE CategoryName = ?"
-        cursor.execute(categoryQuery, (categoryName,))
-        categoryRow = cursor.fetchone()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        if categoryRow:
-            categoryID = categoryRow[0]
-        else:
-            # If category does not exist, create it
-            insertCategoryQuery = "INSERT INTO Categories (CategoryName) VALUES (?)"
-            cursor.execute(insertCategoryQuery, (categoryName,))
+            # Get the CategoryID
+            categoryQuery = "SELECT CategoryID FROM Categories WHERE CategoryName = ?"
+            cursor.execute(categoryQuery, (categoryName,))
+            categoryRow = cursor.fetchone()
+
+            if categoryRow:
+                categoryID = categoryRow[0]
+            else:
+                # If category does not exist, create it
+                insertCategoryQuery = "INSERT INTO Categories (CategoryName) VALUES (?)"
+                cursor.execute(insertCategoryQuery, (categoryName,))
+                conn.commit()
+
+                # Get the new category ID
+                cursor.execute(categoryQuery, (categoryName,))
+                categoryID = cursor.fetchone()[0]
+
+            # Insert into Inventory table
+            insertInventoryQuery = """
+                INSERT INTO Inventory 
+                (ItemName, ItemDescription, CategoryID, RetailPrice, Cost, Quantity, RestockThreshold, Discontinued)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+            """
+            cursor.execute(insertInventoryQuery, (name, description, categoryID, retailPrice, cost, quantity, restockThreshold))
             conn.commit()
 
-            # Get the new category ID
-            cursor.execute(categoryQuery, (categoryName,))
-            categoryID = cursor.fetchone()[0]
-
-        # Insert into Inventory table
-        insertInventoryQuery = """
-            INSERT INTO Inventory 
-            (ItemName, ItemDescription, CategoryID, RetailPrice, Cost, Quantity, RestockThreshold, ItemImage, Discontinued)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
-        """
-        cursor.execute(insertInventoryQuery, (name, description, categoryID, retailPrice, cost, quantity, restockThreshold, imageBlob))
-        conn.commit()
-
-        # Get new InventoryID
-        inventoryID = cursor.lastrowid
-
-        # Insert packages
-        if packages:
-            for pkg in packages:
-                insertPackageQuery = """
-                    INSERT INTO ProductPackage (InventoryID, PackageName, PackageDescription)
-                    VALUES (?, ?, ?)
-                """
-                cursor.execute(insertPackageQuery, (inventoryID, pkg["name"], pkg["description"]))
+            # Get new InventoryID
+            inventoryID = cursor.lastrowid
 
-        conn.commit()
+            if imageBlob:
+                saveItemImage(cursor, inventoryID, imageBlob)
+
+            # Insert packages
+            if packages:
+                for pkg in packages:
+                    insertPackageQuery = """
+                        INSERT INTO ProductPackage (InventoryID, PackageName, PackageDescription)
+                        VALUES (?, ?, ?)
+                    """
+                    cursor.execute(insertPackageQuery, (inventoryID, pkg["name"], pkg["description"]))
+
+            conn.commit()
 
     except Exception as e:
         print(f"Error adding inventory item: {e}")
         messagebox.showerror("Database Error", "There was a problem adding the new product.")
-    finally:
-        close(conn, cursor)
+
+def saveItemImage(cursor, inventoryID, imageBlob):
+    """
+    Stores or replaces the image for an inventory item in the InventoryImage table.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the caller's open transaction.
+        inventoryID (int): The ID of the inventory item.
+        imageBlob (bytes): Binary image data.
+    """
+    cursor.execute("""
+        INSERT INTO InventoryImage (InventoryID, ImageHash, ImageData)
+        VALUES (?, ?, ?)
+        ON CONFLICT(InventoryID) DO UPDATE SET ImageHash = excluded.ImageHash, ImageData = excluded.ImageData
+    """, (inventoryID, ImageStore.hashImage(imageBlob), imageBlob))
+
+def getItemImage(inventoryID):
+    """
+    Loads the full image for a single inventory item.
+
+    Catalog queries only return the image hash, so this is called when the image
+    actually needs to be displayed.
+
+    Args:
+        inventoryID (int): The ID of the inventory item.
+
+    Returns:
+        bytes or None: Binary image data, or None if the item has no image.
+    """
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT ImageData FROM InventoryImage WHERE InventoryID = ?", (inventoryID,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+    except Exception as e:
+        print(f"Error in getItemImage: {e}")
+        return None
 
 def checkLowInventory():
     """
@@ -820,32 +1691,30 @@ def checkLowInventory():
     if any items are found.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        query = """
-            SELECT ItemName, Quantity, RestockThreshold
-            FROM Inventory
-            WHERE Quantity < RestockThreshold
-            AND Discontinued = 0
-        """
-
-        cursor.execute(query)
-        rows = cursor.fetchall()
-
-        if rows:
-            message = "The following products are below their restock threshold:\n\n"
-            for itemName, qty, threshold in rows:
-                message += f"- {itemName}: {qty} in stock (Threshold: {threshold})\n"
-            messagebox.showinfo("Inventory Notification", message)
-        else:
-            # don't show a box if nothing is low
-            pass
+            query = """
+                SELECT ItemName, Quantity, RestockThreshold
+                FROM Inventory
+                WHERE Quantity < RestockThreshold
+                AND Discontinued = 0
+            """
+
+            cursor.execute(query)
+            rows = cursor.fetchall()
+
+            if rows:
+                message = "The following products are below their restock threshold:\n\n"
+                for itemName, qty, threshold in rows:
+                    message += f"- {itemName}: {qty} in stock (Threshold: {threshold})\n"
+                messagebox.showinfo("Inventory Notification", message)
+            else:
+                # don't show a box if nothing is low
+                pass
 
     except Exception as e:
         print(f"Error checking low inventory: {e}")
-    finally:
-        close(conn, cursor)
 
 def getLowInventoryItems():
     """
@@ -854,31 +1723,29 @@ def getLowInventoryItems():
     Returns:
         list: A list of dictionaries containing low-stock item details.
     """
-    try:
-        conn = connect()
-        cursor = conn.cursor()
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            query = """
+                SELECT InventoryID, ItemName, Quantity, RestockThreshold
+                FROM Inventory
+                WHERE Quantity < RestockThreshold
+                AND Discontinued = 0
+            """
+            cursor.execute(query)
+            rows = cursor.fetchall()
 
-        query = """
-            SELECT InventoryID, ItemName, Quantity, RestockThreshold
-            FROM Inventory
-            WHERE Quantity < RestockThreshold
-            AND Discontinued = 0
-        """
-        cursor.execute(query)
-        rows = cursor.fetchall()
-
-        return [{
-            "InventoryID": row[0],
-            "ItemName": row[1],
-            "Quantity": row[2],
-            "RestockThreshold": row[3]
-        } for row in rows]
+            return [{
+                "InventoryID": row[0],
+                "ItemName": row[1],
+                "Quantity": row[2],
+                "RestockThreshold": row[3]
+            } for row in rows]
 
     except Exception as e:
         print(f"Error fetching low inventory items: {e}")
         return []
-    finally:
-        close(conn, cursor)
 
 def updateInventoryItem(itemID, name, description, categoryName, cost, retailPrice, quantity, restockThreshold, packages, imageBlob):
     """
@@ -894,56 +1761,58 @@ def updateInventoryItem(itemID, name, description, categoryName, cost, retailPri
         quantity (int): New quantity.
         restockThreshold (int): New restock threshold.
         packages (list): List of new packages.
-        imageBlob (bytes): New image data.
+        imageBlob (bytes): New image data, or None to keep the current image.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-
-        # Get the CategoryID
-        categoryQuery = "SELECT CategoryID FROM Categories WHERE CategoryName = ?"
-        cursor.execute(categoryQuery, (categoryName,))
-        categoryRow = cursor.fetchone()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        if categoryRow:
-            categoryID = categoryRow[0]
-        else:
-            # If category does not exist, create it
-            insertCategoryQuery = "INSERT INTO Categories (CategoryName) VALUES (?)"
-            cursor.execute(insertCategoryQuery, (categoryName,))
-            conn.commit()
+            # Get the CategoryID
+            categoryQuery = "SELECT CategoryID FROM Categories WHERE CategoryName = ?"
             cursor.execute(categoryQuery, (categoryName,))
-            categoryID = cursor.fetchone()[0]
-
-        # Update Inventory Table
-        updateInventoryQuery = """
-            UPDATE Inventory
-            SET ItemName = ?, ItemDescription = ?, CategoryID = ?, RetailPrice = ?, Cost = ?, 
-                Quantity = ?, RestockThreshold = ?, ItemImage = ?
-            WHERE InventoryID = ?
-        """
-        cursor.execute(updateInventoryQuery, (name, description, categoryID, retailPrice, cost, quantity, restockThreshold, imageBlob, itemID))
-
-        # Delete old packages
-        deletePackagesQuery = "DELETE FROM ProductPackage WHERE InventoryID = ?"
-        cursor.execute(deletePackagesQuery, (itemID,))
-
-        # Insert new packages
-        if packages:
-            for pkg in packages:
-                insertPackageQuery = """
-                    INSERT INTO ProductPackage (InventoryID, PackageName, PackageDescription)
-                    VALUES (?, ?, ?)
-                """
-                cursor.execute(insertPackageQuery, (itemID, pkg["name"], pkg["description"]))
+            categoryRow = cursor.fetchone()
+
+            if categoryRow:
+                categoryID = categoryRow[0]
+            else:
+                # If category does not exist, create it
+                insertCategoryQuery = "INSERT INTO Categories (CategoryName) VALUES (?)"
+                cursor.execute(insertCategoryQuery, (categoryName,))
+                conn.commit()
+                cursor.execute(categoryQuery, (categoryName,))
+                categoryID = cursor.fetchone()[0]
+
+            # Update Inventory Table
+            updateInventoryQuery = """
+                UPDATE Inventory
+                SET ItemName = ?, ItemDescription = ?, CategoryID = ?, RetailPrice = ?, Cost = ?, 
+                    Quantity = ?, RestockThreshold = ?
+                WHERE InventoryID = ?
+            """
+            cursor.execute(updateInventoryQuery, (name, description, categoryID, retailPrice, cost, quantity, restockThreshold, itemID))
+
+            # Keep the current image unless a new one was chosen
+            if imageBlob:
+                saveItemImage(cursor, itemID, imageBlob)
+
+            # Delete old packages
+            deletePackagesQuery = "DELETE FROM ProductPackage WHERE InventoryID = ?"
+            cursor.execute(deletePackagesQuery, (itemID,))
 
-        conn.commit()
+            # Insert new packages
+            if packages:
+                for pkg in packages:
+                    insertPackageQuery = """
+                        INSERT INTO ProductPackage (InventoryID, PackageName, PackageDescription)
+                        VALUES (?, ?, ?)
+                    """
+                    cursor.execute(insertPackageQuery, (itemID, pkg["name"], pkg["description"]))
+
+            conn.commit()
 
     except Exception as e:
         print(f"Error updating inventory item: {e}")
         messagebox.showerror("Database Error", "There was a problem updating the product.")
-    finally:
-        close(conn, cursor)
 
 def getAllAccounts():
     """
@@ -953,31 +1822,29 @@ def getAllAccounts():
         list: A list of dictionaries containing user account details.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            query = """
+                SELECT p.PersonID, l.LogonName, l.PositionTitle, l.AccountDisabled, l.AccountDeleted
+                FROM Person p
+                JOIN Logon l ON p.PersonID = l.PersonID
+                WHERE l.AccountDeleted = 0
+            """
+            cursor.execute(query)
+            rows = cursor.fetchall()
 
-        query = """
-            SELECT p.PersonID, l.LogonName, l.PositionTitle, l.AccountDisabled, l.AccountDeleted
-            FROM Person p
-            JOIN Logon l ON p.PersonID = l.PersonID
-            WHERE l.AccountDeleted = 0
-        """
-        cursor.execute(query)
-        rows = cursor.fetchall()
-
-        return [{
-            "PersonID": row[0],
-            "Username": row[1],
-            "Position": row[2],
-            "AccountDisabled": row[3],
-            "AccountDeleted": row[4]
-        } for row in rows]
+            return [{
+                "PersonID": row[0],
+                "Username": row[1],
+                "Position": row[2],
+                "AccountDisabled": row[3],
+                "AccountDeleted": row[4]
+            } for row in rows]
 
     except Exception as e:
         print(f"Error fetching accounts: {e}")
         return []
-    finally:
-        close(conn, cursor)
 
 def disableAccount(personID):
     """
@@ -987,22 +1854,20 @@ def disableAccount(personID):
         personID (int): ID of the person whose account is to be disabled.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        query = """
-            UPDATE Logon
-            SET AccountDisabled = 1
-            WHERE PersonID = ?
-        """
-        cursor.execute(query, (personID,))
-        conn.commit()
+            query = """
+                UPDATE Logon
+                SET AccountDisabled = 1
+                WHERE PersonID = ?
+            """
+            cursor.execute(query, (personID,))
+            conn.commit()
 
     except Exception as e:
         print(f"Error disabling account: {e}")
         messagebox.showerror("Database Error", "Could not disable the account.")
-    finally:
-        close(conn, cursor)
 
 def getAllUserInfo(personID):
     """
@@ -1015,78 +1880,76 @@ def getAllUserInfo(personID):
         dict: A dictionary of user profile fields and credentials.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        personQuery = """
-            SELECT 
-                Title, NameFirst, NameMiddle, NameLast, Suffix, Address1, Address2, Address3, 
-                City, Zipcode, State, Email, PhonePrimary, PhoneSecondary, PositionID
-            FROM Person
-            WHERE PersonID = ?
-        """
-        cursor.execute(personQuery, (personID,))
-        personRow = cursor.fetchone()
-
-        if not personRow:
-            return {}
-
-        logonQuery = """
-            SELECT 
-                LogonName, Password, 
-                FirstChallengeQuestion, FirstChallengeAnswer, 
-                SecondChallengeQuestion, SecondChallengeAnswer, 
-                ThirdChallengeQuestion, ThirdChallengeAnswer, 
-                PositionTitle
-            FROM Logon
-            WHERE PersonID = ?
-        """
-        cursor.execute(logonQuery, (personID,))
-        logonRow = cursor.fetchone()
-
-        if not logonRow:
-            return {}
-
-        questions = []
-        for questionID in [logonRow[2], logonRow[4], logonRow[6]]:
-            questionQuery = "SELECT QuestionPrompt FROM SecurityQuestions WHERE QuestionID = ?"
-            cursor.execute(questionQuery, (questionID,))
-            result = cursor.fetchone()
-            questions.append(result[0] if result else "")
-
-        userInfo = {
-            "Title": personRow[0],
-            "First Name": personRow[1],
-            "Middle Name": personRow[2],
-            "Last Name": personRow[3],
-            "Suffix": personRow[4],
-            "Address 1": personRow[5],
-            "Address 2": personRow[6],
-            "Address 3": personRow[7],
-            "City": personRow[8],
-            "Zipcode": personRow[9],
-            "State": personRow[10],
-            "Email": personRow[11],
-            "Phone Primary": personRow[12],
-            "Phone Secondary": personRow[13],
-            "Username": logonRow[0],
-            "Password": logonRow[1],
-            "Security Question 1": questions[0],
-            "Security Answer 1": logonRow[3],
-            "Security Question 2": questions[1],
-            "Security Answer 2": logonRow[5],
-            "Security Question 3": questions[2],
-            "Security Answer 3": logonRow[7],
-            "Position": logonRow[8]
-        }
-
-        return userInfo
+            personQuery = """
+                SELECT 
+                    Title, NameFirst, NameMiddle, NameLast, Suffix, Address1, Address2, Address3, 
+                    City, Zipcode, State, Email, PhonePrimary, PhoneSecondary, PositionID
+                FROM Person
+                WHERE PersonID = ?
+            """
+            cursor.execute(personQuery, (personID,))
+            personRow = cursor.fetchone()
+
+            if not personRow:
+                return {}
+
+            logonQuery = """
+                SELECT 
+                    LogonName, Password, 
+                    FirstChallengeQuestion, FirstChallengeAnswer, 
+                    SecondChallengeQuestion, SecondChallengeAnswer, 
+                    ThirdChallengeQuestion, ThirdChallengeAnswer, 
+                    PositionTitle
+                FROM Logon
+                WHERE PersonID = ?
+            """
+            cursor.execute(logonQuery, (personID,))
+            logonRow = cursor.fetchone()
+
+            if not logonRow:
+                return {}
+
+            questions = []
+            for questionID in [logonRow[2], logonRow[4], logonRow[6]]:
+                questionQuery = "SELECT QuestionPrompt FROM SecurityQuestions WHERE QuestionID = ?"
+                cursor.execute(questionQuery, (questionID,))
+                result = cursor.fetchone()
+                questions.append(result[0] if result else "")
+
+            userInfo = {
+                "Title": personRow[0],
+                "First Name": personRow[1],
+                "Middle Name": personRow[2],
+                "Last Name": personRow[3],
+                "Suffix": personRow[4],
+                "Address 1": personRow[5],
+                "Address 2": personRow[6],
+                "Address 3": personRow[7],
+                "City": personRow[8],
+                "Zipcode": personRow[9],
+                "State": personRow[10],
+                "Email": personRow[11],
+                "Phone Primary": personRow[12],
+                "Phone Secondary": personRow[13],
+                "Username": logonRow[0],
+                "Password": logonRow[1],
+                "Security Question 1": questions[0],
+                "Security Answer 1": logonRow[3],
+                "Security Question 2": questions[1],
+                "Security Answer 2": logonRow[5],
+                "Security Question 3": questions[2],
+                "Security Answer 3": logonRow[7],
+                "Position": logonRow[8]
+            }
+
+            return userInfo
 
     except Exception as e:
         print(f"Error fetching full user data: {e}")
         return {}
-    finally:
-        close(conn, cursor)
 
 def updateUserProfile(personID, data, positionID, position, imageBlob):
     """
@@ -1100,76 +1963,74 @@ def updateUserProfile(personID, data, positionID, position, imageBlob):
         imageBlob (bytes): Binary image data for the user's profile picture.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-
-        # Update Person table
-        updatePersonQuery = """
-            UPDATE Person
-            SET
-                Title = ?,
-                NameFirst = ?,
-                NameMiddle = ?,
-                NameLast = ?,
-                Suffix = ?,
-                Address1 = ?,
-                Address2 = ?,
-                Address3 = ?,
-                City = ?,
-                Zipcode = ?,
-                State = ?,
-                Email = ?,
-                PhonePrimary = ?,
-                PhoneSecondary = ?,
-                PositionID = ?,
-                Image = ?
-            WHERE PersonID = ?
-        """
-        cursor.execute(updatePersonQuery, (
-            data.get("Title"),
-            data.get("First Name"),
-            data.get("Middle Name"),
-            data.get("Last Name"),
-            data.get("Suffix"),
-            data.get("Address 1"),
-            data.get("Address 2"),
-            data.get("Address 3"),
-            data.get("City"),
-            data.get("Zipcode"),
-            data.get("State"),
-            data.get("Email"),
-            data.get("Phone Primary"),
-            data.get("Phone Secondary"),
-            positionID,
-            imageBlob,
-            personID
-        ))
-
-        # Update Logon table
-        updateLogonQuery = """
-            UPDATE Logon
-            SET
-                Password = ?,
-                FirstChallengeAnswer = ?,
-                SecondChallengeAnswer = ?,
-                ThirdChallengeAnswer = ?,
-                PositionTitle = ?
-            WHERE PersonID = ?
-        """
-        cursor.execute(updateLogonQuery, (
-            data.get("Password"),
-            data.get("Security Answer 1"),
-            data.get("Security Answer 2"),
-            data.get("Security Answer 3"),
-            position, personID
-        ))
-        conn.commit()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            # Update Person table
+            updatePersonQuery = """
+                UPDATE Person
+                SET
+                    Title = ?,
+                    NameFirst = ?,
+                    NameMiddle = ?,
+                    NameLast = ?,
+                    Suffix = ?,
+                    Address1 = ?,
+                    Address2 = ?,
+                    Address3 = ?,
+                    City = ?,
+                    Zipcode = ?,
+                    State = ?,
+                    Email = ?,
+                    PhonePrimary = ?,
+                    PhoneSecondary = ?,
+                    PositionID = ?,
+                    Image = ?
+                WHERE PersonID = ?
+            """
+            cursor.execute(updatePersonQuery, (
+                data.get("Title"),
+                data.get("First Name"),
+                data.get("Middle Name"),
+                data.get("Last Name"),
+                data.get("Suffix"),
+                data.get("Address 1"),
+                data.get("Address 2"),
+                data.get("Address 3"),
+                data.get("City"),
+                data.get("Zipcode"),
+                data.get("State"),
+                data.get("Email"),
+                data.get("Phone Primary"),
+                data.get("Phone Secondary"),
+                positionID,
+                imageBlob,
+                personID
+            ))
+
+            # Update Logon table
+            updateLogonQuery = """
+                UPDATE Logon
+                SET
+                    Password = ?,
+                    FirstChallengeAnswer = ?,
+                    SecondChallengeAnswer = ?,
+                    ThirdChallengeAnswer = ?,
+                    PositionTitle = ?
+                WHERE PersonID = ?
+            """
+            cursor.execute(updateLogonQuery, (
+                data.get("Password"),
+                data.get("Security Answer 1"),
+                data.get("Security Answer 2"),
+                data.get("Security Answer 3"),
+                position, personID
+            ))
+            conn.commit()
         
     except Exception as e:
         print(f"Error updating user profile: {e}")
         messagebox.showerror("Update Error", "Could not update user profile.")
-    finally:
-        close(conn, cursor)
 
 def getAllPromos():
     """
@@ -1179,36 +2040,34 @@ def getAllPromos():
         list: A list of dictionaries containing promotion details including associated item name.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        query = """
-            SELECT d.DiscountID, d.DiscountCode, d.Description, d.DiscountLevel, 
-                   d.InventoryID, d.DiscountType, d.DiscountPercentage, d.DiscountDollarAmount,
-                   d.StartDate, d.ExpirationDate, i.ItemName
-            FROM Discounts d
-            LEFT JOIN Inventory i ON d.InventoryID = i.InventoryID
-            ORDER BY d.ExpirationDate
-        """
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        return [{
-            "DiscountID": row[0],
-            "DiscountCode": row[1],
-            "Description": row[2],
-            "DiscountLevel": row[3],
-            "InventoryID": row[4],
-            "DiscountType": row[5],
-            "DiscountPercentage": row[6],
-            "DiscountDollarAmount": row[7],
-            "StartDate": row[8],
-            "ExpirationDate": row[9],
-            "ItemName": row[10]
-        } for row in rows]
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            query = """
+                SELECT d.DiscountID, d.DiscountCode, d.Description, d.DiscountLevel, 
+                       d.InventoryID, d.DiscountType, d.DiscountPercentage, d.DiscountDollarAmount,
+                       d.StartDate, d.ExpirationDate, i.ItemName
+                FROM Discounts d
+                LEFT JOIN Inventory i ON d.InventoryID = i.InventoryID
+                ORDER BY d.ExpirationDate
+            """
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            return [{
+                "DiscountID": row[0],
+                "DiscountCode": row[1],
+                "Description": row[2],
+                "DiscountLevel": row[3],
+                "InventoryID": row[4],
+                "DiscountType": row[5],
+                "DiscountPercentage": row[6],
+                "DiscountDollarAmount": row[7],
+                "StartDate": row[8],
+                "ExpirationDate": row[9],
+                "ItemName": row[10]
+            } for row in rows]
     except Exception as e:
         print(f"Error getting promos: {e}")
         return []
-    finally:
-        close(conn, cursor)
 
 def insertPromoCode(code, description, level, inventoryID, discountType, value, startDate, endDate):
     """
@@ -1225,28 +2084,26 @@ def insertPromoCode(code, description, level, inventoryID, discountType, value,
         endDate (str): Promotion end date in ISO format.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        if discountType == 0:
-            discountPercentage = float(value)
-            discountDollarAmount = None
-        else:
-            discountPercentage = None
-            discountDollarAmount = float(value)
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            if discountType == 0:
+                discountPercentage = float(value)
+                discountDollarAmount = None
+            else:
+                discountPercentage = None
+                discountDollarAmount = float(value)
         
-        query = """
-            INSERT INTO Discounts
-            (DiscountCode, Description, DiscountLevel, InventoryID, DiscountType,
-             DiscountPercentage, DiscountDollarAmount, StartDate, ExpirationDate)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        cursor.execute(query, (code, description, level, inventoryID, discountType,
-                               discountPercentage, discountDollarAmount, startDate, endDate))
-        conn.commit()
+            query = """
+                INSERT INTO Discounts
+                (DiscountCode, Description, DiscountLevel, InventoryID, DiscountType,
+                 DiscountPercentage, DiscountDollarAmount, StartDate, ExpirationDate)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """
+            cursor.execute(query, (code, description, level, inventoryID, discountType,
+                                   discountPercentage, discountDollarAmount, startDate, endDate))
+            conn.commit()
     except Exception as e:
         print(f"Error inserting promo: {e}")
-    finally:
-        close(conn, cursor)
 
 def deletePromoCode(discountID):
     """
@@ -1256,230 +2113,282 @@ def deletePromoCode(discountID):
         discountID (int): The ID of the discount to delete.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        query = "DELETE FROM Discounts WHERE DiscountID = ?"
-        cursor.execute(query, (discountID,))
-        conn.commit()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            query = "DELETE FROM Discounts WHERE DiscountID = ?"
+            cursor.execute(query, (discountID,))
+            conn.commit()
     except Exception as e:
         print(f"Error deleting promo: {e}")
-    finally:
-        close(conn, cursor)
 
-def getSalesByDate(date):
+def salesTotals(row):
+    """
+    Turns the unit, gross, discount and tax columns of a rollup row into report totals.
+    """
+    unitsSold, grossSales, discount, tax = row
+    return {
+        "UnitsSold": unitsSold,
+        "GrossSales": grossSales,
+        "Discount": discount,
+        "Subtotal": grossSales - discount,
+        "Tax": tax,
+        "Total": grossSales - discount + tax
+    }
+
+def getSalesSummary(startDate, endDate):
     """
-    Retrieves all sales that occurred on a specific date.
+    Retrieves sales totals for a range of days from the daily sales rollup (see
+    Migrations.addSalesRollup), so the cost of a report depends on the days it covers
+    rather than the number of orders.
 
     Args:
-        date (str): The date in 'YYYY-MM-DD' format.
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range (inclusive).
 
     Returns:
-        list: A list of sales with subtotal, tax, and total amounts per order.
+        dict: {"startDate", "endDate", "days": totals per day with its OrderCount,
+            "categories": totals per category, "total": totals for the whole range},
+            or None if an error occurs. Every totals dictionary has UnitsSold,
+            GrossSales, Discount, Subtotal, Tax and Total. Per-item totals, which grow
+            with the catalog, are read separately with iterItemSales.
     """
+    dateRange = (startDate.isoformat(), (endDate + timedelta(days=1)).isoformat())
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        query = """
-             SELECT o.OrderID, o.OrderDate, 
-                   SUM(i.RetailPrice * od.Quantity) AS Subtotal,
-                   SUM(i.RetailPrice * od.Quantity) * 0.0825 AS Tax,
-                   SUM(i.RetailPrice * od.Quantity) * 1.0825 AS Total
-            FROM Orders o
-            JOIN OrderDetails od ON o.OrderID = od.OrderID
-            JOIN Inventory i ON od.InventoryID = i.InventoryID
-            WHERE date(o.OrderDate) = ?
-            GROUP BY o.OrderID, o.OrderDate
-        """
-        cursor.execute(query, (date,))
-        rows = cursor.fetchall()
-        return [{
-            "OrderID": row[0],
-            "OrderDate": row[1],
-            "Subtotal": row[2],
-            "Tax": row[3],
-            "Total": row[4]
-        } for row in rows]
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            # One read transaction so the breakdowns agree with each other
+            cursor.execute("BEGIN")
+            cursor.execute("""
+                SELECT SaleDate, OrderCount, UnitsSold, GrossSales, Discount, Tax
+                FROM DailySales
+                WHERE SaleDate >= ? AND SaleDate < ? AND OrderCount > 0
+                ORDER BY SaleDate
+            """, dateRange)
+            days = [{"SaleDate": row[0], "OrderCount": row[1], **salesTotals(row[2:])} for row in cursor.fetchall()]
+
+            cursor.execute("""
+                SELECT COALESCE(c.CategoryName, 'Uncategorized'), SUM(s.UnitsSold), SUM(s.GrossSales),
+                       SUM(s.Discount), SUM(s.Tax)
+                FROM DailyItemSales s
+                LEFT JOIN Categories c ON c.CategoryID = s.CategoryID
+                WHERE s.SaleDate >= ? AND s.SaleDate < ?
+                GROUP BY s.CategoryID
+                ORDER BY SUM(s.GrossSales - s.Discount) DESC
+            """, dateRange)
+            categories = [{"CategoryName": row[0], **salesTotals(row[1:])} for row in cursor.fetchall()]
+            conn.commit()
+
+        total = salesTotals([sum(day[key] for day in days) for key in ("UnitsSold", "GrossSales", "Discount", "Tax")])
+        total["OrderCount"] = sum(day["OrderCount"] for day in days)
+        return {"startDate": startDate, "endDate": endDate, "days": days, "categories": categories, "total": total}
     except Exception as e:
-        print(f"Error in getSalesByDate: {e}")
-        return []
-    finally:
-        close(conn, cursor)
+        print(f"Error in getSalesSummary: {e}")
+        return None
 
-def getSalesByWeek(startDate):
+def iterItemSales(startDate, endDate):
     """
-    Retrieves all sales for a 7-day period starting from the given date.
+    Yields sales totals per item for a range of days, best selling first.
 
     Args:
-        startDate (datetime.date): The start date of the week.
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range (inclusive).
+
+    Yields:
+        tuple: (InventoryID, ItemName, UnitsSold, GrossSales, Discount, Tax).
+    """
+    return iterRows("""
+        SELECT InventoryID, MAX(ItemName), SUM(UnitsSold), SUM(GrossSales), SUM(Discount), SUM(Tax)
+        FROM DailyItemSales
+        WHERE SaleDate >= ? AND SaleDate < ?
+        GROUP BY InventoryID
+        ORDER BY SUM(GrossSales - Discount) DESC
+    """, (startDate.isoformat(), (endDate + timedelta(days=1)).isoformat()))
+
+ANALYTICS_BATCH_SIZE = 50000
+
+def iterOrderLineBatches(startDate, endDate):
+    """
+    Yields every order line placed in a range of days, all numeric, in large batches
+    for loading into arrays (see Analytics.loadOrderLines).
+
+    Args:
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range (inclusive).
+
+    Yields:
+        list: Row tuples of (OrderID, day number counted from startDate, InventoryID,
+            Quantity, revenue after discount, cost, tax, 1 if the line has no UnitPrice,
+            1 if it has no UnitCost). Legacy lines whose item had no price or cost are
+            counted at 0 for it, never NULL, so the arrays hold no NaN.
+    """
+    return iterRowBatches("""
+        SELECT od.OrderID, CAST(julianday(o.OrderDate) - julianday(?) AS INTEGER), od.InventoryID, od.Quantity,
+               COALESCE(od.UnitPrice, 0) * od.Quantity - od.DiscountAmount, COALESCE(od.UnitCost, 0) * od.Quantity,
+               od.TaxAmount, od.UnitPrice IS NULL, od.UnitCost IS NULL
+        FROM Orders o
+        JOIN OrderDetails od ON od.OrderID = o.OrderID
+        WHERE o.OrderDate >= ? AND o.OrderDate < ?
+    """, (startDate.isoformat(), startDate.isoformat(), (endDate + timedelta(days=1)).isoformat()),
+        ANALYTICS_BATCH_SIZE)
+
+def getAnalyticsLabels():
+    """
+    Retrieves every item's name and category, and every category's name, for
+    grouping and labelling analytics.
 
     Returns:
-        list: A list of sales records with totals for each order.
+        tuple: ({InventoryID: (ItemName, CategoryID)}, {CategoryID: CategoryName}).
+            Empty if an error occurs.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        endDate = startDate + datetime.timedelta(days=6)
-        query = """
-            SELECT o.OrderID, o.OrderDate, 
-                   SUM(i.RetailPrice * od.Quantity) AS Subtotal,
-                   SUM(i.RetailPrice * od.Quantity) * 0.0825 AS Tax,
-                   SUM(i.RetailPrice * od.Quantity) * 1.0825 AS Total
-            FROM Orders o
-            JOIN OrderDetails od ON o.OrderID = od.OrderID
-            JOIN Inventory i ON od.InventoryID = i.InventoryID
-             WHERE date(o.OrderDate) BETWEEN date(?) AND date(?)
-            GROUP BY o.OrderID, o.OrderDate
-        """
-        cursor.execute(query, (startDate, endDate))
-        rows = cursor.fetchall()
-        return [{
-            "OrderID": row[0],
-            "OrderDate": row[1],
-            "Subtotal": row[2],
-            "Tax": row[3],
-            "Total": row[4]
-        } for row in rows]
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT InventoryID, ItemName, CategoryID FROM Inventory")
+            items = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+            cursor.execute("SELECT CategoryID, CategoryName FROM Categories")
+            categories = dict(cursor.fetchall())
+            return items, categories
     except Exception as e:
-        print(f"Error in getSalesByWeek: {e}")
-        return []
-    finally:
-        close(conn, cursor)
+        print(f"Error fetching analytics labels: {e}")
+        return {}, {}
 
-def getSalesByMonth(month, year):
+def getSalesByDate(saleDate):
     """
-    Retrieves all sales for a given month and year.
+    Retrieves sales totals for a specific date.
 
     Args:
-        month (str): The month in 'MM' format.
-        year (str): The year in 'YYYY' format.
+        saleDate (datetime.date): The date.
 
     Returns:
-        list: A list of sales records for the specified month.
+        dict: Sales totals for the day (see getSalesSummary), or None if an error occurs.
     """
-    try:
-        conn = connect()
-        cursor = conn.cursor()
-        query = """
-            SELECT o.OrderID, o.OrderDate, 
-                   SUM(i.RetailPrice * od.Quantity) AS Subtotal,
-                   SUM(i.RetailPrice * od.Quantity) * 0.0825 AS Tax,
-                   SUM(i.RetailPrice * od.Quantity) * 1.0825 AS Total
-            FROM Orders o
-            JOIN OrderDetails od ON o.OrderID = od.OrderID
-            JOIN Inventory i ON od.InventoryID = i.InventoryID
-            WHERE strftime('%m', o.OrderDate) = ? AND strftime('%Y', o.OrderDate) = ?
-            GROUP BY o.OrderID, o.OrderDate
-        """
-
-        cursor.execute(query, (month, year))
-        rows = cursor.fetchall()
-        return [{
-            "OrderID": row[0],
-            "OrderDate": row[1],
-            "Subtotal": row[2],
-            "Tax": row[3],
-            "Total": row[4]
-        } for row in rows]
-    except Exception as e:
-        print(f"Error in getSalesByMonth: {e}")
-        return []
-    finally:
-        close(conn, cursor)
+    return getSalesSummary(saleDate, saleDate)
 
-def getInventoryForSale():
+def getSalesByWeek(startDate):
     """
-    Retrieves all inventory items that are not discontinued.
+    Retrieves sales totals for a 7-day period starting from the given date.
+
+    Args:
+        startDate (datetime.date): The start date of the week.
 
     Returns:
-        list: A list of dictionaries with inventory item details.
+        dict: Sales totals for the week (see getSalesSummary), or None if an error occurs.
     """
-    try:
-        conn = connect()
-        cursor = conn.cursor()
-        query = """
-            SELECT InventoryID, ItemName, Cost, RetailPrice, Quantity, RestockThreshold, Discontinued
-            FROM Inventory
-            WHERE Discontinued = 0
-        """
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        return [{
-            "InventoryID": row[0],
-            "ItemName": row[1],
-            "Cost": row[2],
-            "RetailPrice": row[3],
-            "Quantity": row[4],
-            "RestockThreshold": row[5],
-            "Discontinued": row[6]
-        } for row in rows]
-    except Exception as e:
-        print(f"Error in getInventoryForSale: {e}")
-        return []
-    finally:
-        close(conn, cursor)
+    return getSalesSummary(startDate, startDate + timedelta(days=6))
+
+def getSalesByMonth(month, year):
+    """
+    Retrieves sales totals for a given month and year.
+
+    Args:
+        month (int): Month (1-12).
+        year (int): Year (4-digit).
+
+    Returns:
+        dict: Sales totals for the month (see getSalesSummary), or None if an error occurs.
+    """
+    firstDay = date(int(year), int(month), 1)
+    nextMonth = (firstDay + timedelta(days=31)).replace(day=1)
+    return getSalesSummary(firstDay, nextMonth - timedelta(days=1))
 
-def getInventoryRestock():
+def rebuildSalesRollup():
     """
-    Retrieves inventory items where quantity is less than or equal to the restock threshold.
+    Recomputes the daily sales rollup from every order. Only needed after orders have
+    been edited outside the application; checkout keeps the rollup current.
 
     Returns:
-        list: A list of items that need to be restocked.
+        bool: True if the rollup was rebuilt, False if an error occurs.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        query = """
-            SELECT InventoryID, ItemName, Cost, RetailPrice, Quantity, RestockThreshold, Discontinued
-            FROM Inventory
-            WHERE Quantity <= RestockThreshold
-        """
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        return [{
-            "InventoryID": row[0],
-            "ItemName": row[1],
-            "Cost": row[2],
-            "RetailPrice": row[3],
-            "Quantity": row[4],
-            "RestockThreshold": row[5],
-            "Discontinued": row[6]
-        } for row in rows]
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            Migrations.fillSalesRollup(cursor)
+            conn.commit()
+            return True
     except Exception as e:
-        print(f"Error in getInventoryRestock: {e}")
-        return []
-    finally:
-        close(conn, cursor)
+        print(f"Error rebuilding sales rollup: {e}")
+        return False
+
+REPORT_BATCH_SIZE = 500
 
-def getAllInventoryIncludingDiscontinued():
+def iterRowBatches(query, params=(), batchSize=REPORT_BATCH_SIZE):
     """
-    Retrieves all inventory items including those that are discontinued.
+    Yields the rows of a query a batch at a time, so a result of any length is
+    processed in bounded memory.
 
-    Returns:
-        list: A list of dictionaries representing all inventory items.
+    Each generator reads on a connection of its own, opened for it and closed when it
+    is exhausted or closed. It is never pooled or registered as the thread's
+    connection, so other DBLibrary calls made while a report is streaming, and other
+    generators interleaved with this one, never share its cursor.
+
+    Args:
+        query (str): The SELECT to run.
+        params (tuple): Its parameters.
+        batchSize (int): Rows fetched from SQLite per call.
+
+    Yields:
+        list: Up to batchSize row tuples.
+
+    Raises:
+        sqlite3.Error: If the query fails, including part way through.
     """
+    conn = connect()
+    if conn is None:
+        raise sqlite3.OperationalError("Could not connect to database")
     try:
-        conn = connect()
         cursor = conn.cursor()
-        query = """
-            SELECT InventoryID, ItemName, Cost, RetailPrice, Quantity, RestockThreshold, Discontinued
-            FROM Inventory
-        """
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        return [{
-            "InventoryID": row[0],
-            "ItemName": row[1],
-            "Cost": row[2],
-            "RetailPrice": row[3],
-            "Quantity": row[4],
-            "RestockThreshold": row[5],
-            "Discontinued": row[6]
-        } for row in rows]
-    except Exception as e:
-        print(f"Error in getAllInventoryIncludingDiscontinued: {e}")
-        return []
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batchSize)
+            if not rows:
+                return
+            yield rows
     finally:
-        close(conn, cursor)
+        conn.close()
+
+def iterRows(query, params=(), batchSize=REPORT_BATCH_SIZE):
+    """
+    Yields the rows of a query as plain tuples, fetched a batch at a time (see
+    iterRowBatches).
+
+    Yields:
+        tuple: One row of the result.
+    """
+    for rows in iterRowBatches(query, params, batchSize):
+        yield from rows
+
+INVENTORY_REPORT_SQL = """
+    SELECT InventoryID, ItemName, Cost, RetailPrice, Quantity, RestockThreshold, Discontinued
+    FROM Inventory
+"""
+
+def iterInventoryForSale():
+    """
+    Yields all inventory items that are not discontinued.
+
+    Yields:
+        tuple: (InventoryID, ItemName, Cost, RetailPrice, Quantity, RestockThreshold, Discontinued).
+    """
+    return iterRows(INVENTORY_REPORT_SQL + " WHERE Discontinued = 0 ORDER BY InventoryID")
+
+def iterInventoryRestock():
+    """
+    Yields inventory items where quantity is less than or equal to the restock threshold.
+
+    Yields:
+        tuple: As iterInventoryForSale.
+    """
+    return iterRows(INVENTORY_REPORT_SQL + " WHERE Quantity <= RestockThreshold ORDER BY InventoryID")
+
+def iterAllInventoryIncludingDiscontinued():
+    """
+    Yields all inventory items including those that are discontinued.
+
+    Yields:
+        tuple: As iterInventoryForSale.
+    """
+    return iterRows(INVENTORY_REPORT_SQL + " ORDER BY InventoryID")
 
 def searchCustomerPOS(keyword, method):
     """
@@ -1499,74 +2408,72 @@ def searchCustomerPOS(keyword, method):
         list: A list of matching customer records with contact information.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-
-        if method == "Email":
-            query = """
-                SELECT PersonID, NameFirst, NameLast, Email, PhonePrimary
-                FROM Person
-                WHERE Email LIKE ?
-            """
-            params = (f"%{keyword}%",)
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            if method == "Email":
+                query = """
+                    SELECT PersonID, NameFirst, NameLast, Email, PhonePrimary
+                    FROM Person
+                    WHERE Email LIKE ?
+                """
+                params = (f"%{keyword}%",)
         
-        elif method == "Phone":
-            query = """
-                SELECT PersonID, NameFirst, NameLast, Email, PhonePrimary
-                FROM Person
-                WHERE PhonePrimary LIKE ? OR PhoneSecondary LIKE ?
-            """
-            params = (f"%{keyword}%", f"%{keyword}%")
+            elif method == "Phone":
+                query = """
+                    SELECT PersonID, NameFirst, NameLast, Email, PhonePrimary
+                    FROM Person
+                    WHERE PhonePrimary LIKE ? OR PhoneSecondary LIKE ?
+                """
+                params = (f"%{keyword}%", f"%{keyword}%")
         
-        elif method == "Invoice":  # Search by OrderID
-            query = """
-                SELECT p.PersonID, p.NameFirst, p.NameLast, p.Email, p.PhonePrimary
-                FROM Orders o
-                JOIN Person p ON o.PersonID = p.PersonID
-                WHERE o.OrderID = ?
-            """
-            params = (keyword,)
+            elif method == "Invoice":  # Search by OrderID
+                query = """
+                    SELECT p.PersonID, p.NameFirst, p.NameLast, p.Email, p.PhonePrimary
+                    FROM Orders o
+                    JOIN Person p ON o.PersonID = p.PersonID
+                    WHERE o.OrderID = ?
+                """
+                params = (keyword,)
         
-        elif method == "First Name":
-            query = """
-                SELECT PersonID, NameFirst, NameLast, Email, PhonePrimary
-                FROM Person
-                WHERE NameFirst LIKE ?
-            """
-            params = (f"%{keyword}%",)
+            elif method == "First Name":
+                query = """
+                    SELECT PersonID, NameFirst, NameLast, Email, PhonePrimary
+                    FROM Person
+                    WHERE NameFirst LIKE ?
+                """
+                params = (f"%{keyword}%",)
         
-        elif method == "Last Name":
-            query = """
-                SELECT PersonID, NameFirst, NameLast, Email, PhonePrimary
-                FROM Person
-                WHERE NameLast LIKE ?
-            """
-            params = (f"%{keyword}%",)
+            elif method == "Last Name":
+                query = """
+                    SELECT PersonID, NameFirst, NameLast, Email, PhonePrimary
+                    FROM Person
+                    WHERE NameLast LIKE ?
+                """
+                params = (f"%{keyword}%",)
         
-        elif method == "MemberID":  # Search by PersonID
-            query = """
-                SELECT PersonID, NameFirst, NameLast, Email, PhonePrimary
-                FROM Person
-                WHERE PersonID = ?
-            """
-            params = (keyword,)
+            elif method == "MemberID":  # Search by PersonID
+                query = """
+                    SELECT PersonID, NameFirst, NameLast, Email, PhonePrimary
+                    FROM Person
+                    WHERE PersonID = ?
+                """
+                params = (keyword,)
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
 
-        return [{
-            "PersonID": row[0],
-            "FirstName": row[1],
-            "LastName": row[2],
-            "Email": row[3],
-            "Phone": row[4]
-        } for row in rows]
+            return [{
+                "PersonID": row[0],
+                "FirstName": row[1],
+                "LastName": row[2],
+                "Email": row[3],
+                "Phone": row[4]
+            } for row in rows]
 
     except Exception as e:
         print(f"Error in searchCustomerPOS: {e}")
         return []
-    finally:
-        close(conn, cursor)
 
 def getAvailableDiscounts(cartItems):
     """
@@ -1579,92 +2486,162 @@ def getAvailableDiscounts(cartItems):
         list: A list of applicable discount dictionaries with details and calculated amounts.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            inventoryIDs = [str(item['InventoryID']) for item in cartItems]
 
-        inventoryIDs = [str(item['InventoryID']) for item in cartItems]
+            query = """
+                SELECT d.DiscountID, d.DiscountCode, d.DiscountType, d.DiscountPercentage, d.DiscountDollarAmount,
+                       d.DiscountLevel, d.InventoryID, i.ItemName
+                FROM Discounts d
+                LEFT JOIN Inventory i ON d.InventoryID = i.InventoryID
+                WHERE d.ExpirationDate >= date('now')
+            """
 
-        query = """
-            SELECT d.DiscountID, d.DiscountCode, d.DiscountType, d.DiscountPercentage, d.DiscountDollarAmount,
-                   d.DiscountLevel, d.InventoryID, i.ItemName
-            FROM Discounts d
-            LEFT JOIN Inventory i ON d.InventoryID = i.InventoryID
-            WHERE d.ExpirationDate >= date('now')
-        """
+            cursor.execute(query)
+            rows = cursor.fetchall()
+
+            available = []
+            for row in rows:
+                discountLevel = row[5]
+                inventoryID = row[6]
+
+                if discountLevel == 0:  # Cart level discount applies always
+                    amount = (row[3] if row[2] == 0 else row[4])  # Percent or Dollar
+                    available.append({
+                        "DiscountID": row[0],
+                        "DiscountCode": row[1],
+                        "DiscountType": row[2],
+                        "DiscountPercentage": row[3],
+                        "DiscountDollarAmount": row[4],
+                        "DiscountLevel": row[5],
+                        "InventoryID": row[6],
+                        "ItemName": row[7],
+                        "DiscountAmount": amount
+                    })
+                elif discountLevel == 1 and str(inventoryID) in inventoryIDs:
+                    # Item level discount but the item exists in the cart
+                    amount = (row[3] if row[2] == 0 else row[4])  # Percent or Dollar
+                    available.append({
+                        "DiscountID": row[0],
+                        "DiscountCode": row[1],
+                        "DiscountType": row[2],
+                        "DiscountPercentage": row[3],
+                        "DiscountDollarAmount": row[4],
+                        "DiscountLevel": row[5],
+                        "InventoryID": row[6],
+                        "ItemName": row[7],
+                        "DiscountAmount": amount
+                    })
+
+            return available
 
-        cursor.execute(query)
-        rows = cursor.fetchall()
+    except Exception as e:
+        print(f"Error in getAvailableDiscounts: {e}")
+        return []
 
-        available = []
-        for row in rows:
-            discountLevel = row[5]
-            inventoryID = row[6]
+# Everything a receipt shows, one row per order line, as recorded at checkout
+RECEIPT_SQL = """
+    SELECT o.OrderID, o.OrderDate, e.NameFirst, e.NameLast,
+           d.DiscountCode, d.DiscountLevel, d.DiscountType, d.DiscountPercentage, d.DiscountDollarAmount,
+           od.InventoryID, od.ItemName, od.PackageName, od.UnitPrice, od.Quantity,
+           od.DiscountAmount, od.TaxAmount
+    FROM Orders o
+    JOIN OrderDetails od ON od.OrderID = o.OrderID
+    LEFT JOIN Person e ON e.PersonID = o.EmployeeID
+    LEFT JOIN Discounts d ON d.DiscountID = o.DiscountID
+"""
 
-            if discountLevel == 0:  # Cart level discount applies always
-                amount = (row[3] if row[2] == 0 else row[4])  # Percent or Dollar
-                available.append({
-                    "DiscountID": row[0],
-                    "DiscountCode": row[1],
-                    "DiscountType": row[2],
-                    "DiscountPercentage": row[3],
-                    "DiscountDollarAmount": row[4],
-                    "DiscountLevel": row[5],
-                    "InventoryID": row[6],
-                    "ItemName": row[7],
-                    "DiscountAmount": amount
-                })
-            elif discountLevel == 1 and str(inventoryID) in inventoryIDs:
-                # Item level discount but the item exists in the cart
-                amount = (row[3] if row[2] == 0 else row[4])  # Percent or Dollar
-                available.append({
-                    "DiscountID": row[0],
-                    "DiscountCode": row[1],
-                    "DiscountType": row[2],
-                    "DiscountPercentage": row[3],
-                    "DiscountDollarAmount": row[4],
+def receiptOrdersFromRows(rows):
+    """
+    Groups RECEIPT_SQL rows, sorted by OrderID, into order dictionaries.
+
+    Args:
+        rows (list): Rows returned by a RECEIPT_SQL query.
+
+    Returns:
+        list: Order dictionaries with OrderID, OrderDate, ManagerName, discount (a
+              discount dictionary or None) and lines (dictionaries with InventoryID,
+              name, package, price, quantity, discountAmount and taxAmount).
+    """
+    orders = []
+    for row in rows:
+        if not orders or orders[-1]["OrderID"] != row[0]:
+            discount = None
+            if row[5] is not None:
+                discount = {
+                    "DiscountCode": row[4],
                     "DiscountLevel": row[5],
-                    "InventoryID": row[6],
-                    "ItemName": row[7],
-                    "DiscountAmount": amount
-                })
+                    "DiscountType": row[6],
+                    "DiscountPercentage": row[7],
+                    "DiscountDollarAmount": row[8]
+                }
+            orders.append({
+                "OrderID": row[0],
+                "OrderDate": row[1],
+                "ManagerName": f"{row[2]} {row[3]}" if row[2] else "N/A",
+                "discount": discount,
+                "lines": []
+            })
+        orders[-1]["lines"].append({
+            "InventoryID": row[9],
+            "name": row[10],
+            "package": row[11],
+            "price": row[12],
+            "quantity": row[13],
+            "discountAmount": row[14],
+            "taxAmount": row[15]
+        })
+    return orders
+
+def getOrderReceipt(orderID):
+    """
+    Rebuilds an order exactly as it was charged, for printing or reprinting its receipt.
 
-        return available
+    Args:
+        orderID (int): The ID of the order.
 
+    Returns:
+        dict or None: The order (see receiptOrdersFromRows), or None if it is not found.
+    """
+    try:
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(RECEIPT_SQL + """
+                WHERE o.OrderID = ?
+                ORDER BY od.OrderDetailsID
+            """, (orderID,))
+            orders = receiptOrdersFromRows(cursor.fetchall())
+            return orders[0] if orders else None
     except Exception as e:
-        print(f"Error in getAvailableDiscounts: {e}")
-        return []
-    finally:
-        close(conn, cursor)
+        print(f"Error fetching order receipt: {e}")
+        return None
 
-def getManagerNameByOrder(orderID):
+def getReceiptOrders(startDate, endDate):
     """
-    Retrieves the name of the manager (employee) associated with a specific order.
+    Rebuilds every order placed between two dates, inclusive, in one query.
 
     Args:
-        orderID (int): The ID of the order.
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range.
 
     Returns:
-        str: The full name of the manager or "N/A" if not found.
+        list: Order dictionaries (see receiptOrdersFromRows), ordered by OrderID.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT p.NameFirst, p.NameLast
-            FROM Orders o
-            LEFT JOIN Person p ON o.EmployeeID = p.PersonID
-            WHERE o.OrderID = ?
-        """, (orderID,))
-        row = cursor.fetchone()
-        if row and row[0]:
-            return f"{row[0]} {row[1]}"
-        else:
-            return "N/A"
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            # OrderDate is 'YYYY-MM-DD' text (see Migrations.normalizeOrderDates), so a
+            # half-open range on the bare column seeks idx_Orders_OrderDate
+            cursor.execute(RECEIPT_SQL + """
+                WHERE o.OrderDate >= ? AND o.OrderDate < ?
+                ORDER BY o.OrderID, od.OrderDetailsID
+            """, (startDate.isoformat(), (endDate + timedelta(days=1)).isoformat()))
+            return receiptOrdersFromRows(cursor.fetchall())
     except Exception as e:
-        print(f"Error fetching manager name: {e}")
-        return "N/A"
-    finally:
-        close(conn, cursor)
+        print(f"Error fetching receipt orders: {e}")
+        return []
 
 def getOrdersByCustomer(personID):
     """
@@ -1678,32 +2655,30 @@ def getOrdersByCustomer(personID):
               Quantity, DiscountID, and OrderDate.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+
+            query = """
+                SELECT o.OrderID, od.InventoryID, od.Quantity, od.DiscountID, o.OrderDate
+                FROM Orders o
+                JOIN OrderDetails od ON o.OrderID = od.OrderID
+                WHERE o.PersonID = ?
+                ORDER BY o.OrderDate DESC
+            """
+            cursor.execute(query, (personID,))
+            rows = cursor.fetchall()
 
-        query = """
-            SELECT o.OrderID, od.InventoryID, od.Quantity, od.DiscountID, o.OrderDate
-            FROM Orders o
-            JOIN OrderDetails od ON o.OrderID = od.OrderID
-            WHERE o.PersonID = ?
-            ORDER BY o.OrderDate DESC
-        """
-        cursor.execute(query, (personID,))
-        rows = cursor.fetchall()
-
-        return [{
-            "OrderID": row[0],
-            "InventoryID": row[1],
-            "Quantity": row[2],
-            "DiscountID": row[3] if row[3] is not None else "N/A",
-            "OrderDate": row[4] if isinstance(row[4], str) else row[4].strftime("%m/%d/%Y")
-        } for row in rows]
+            return [{
+                "OrderID": row[0],
+                "InventoryID": row[1],
+                "Quantity": row[2],
+                "DiscountID": row[3] if row[3] is not None else "N/A",
+                "OrderDate": row[4] if isinstance(row[4], str) else row[4].strftime("%m/%d/%Y")
+            } for row in rows]
 
     except Exception as e:
         print(f"Error fetching customer orders: {e}")
         return []
-    finally:
-        close(conn, cursor)
 
 def addFavorite(personID, inventoryID):
     """
@@ -1717,27 +2692,25 @@ def addFavorite(personID, inventoryID):
         bool: True if the item was added, False if it already existed or an error occurred.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COALESCE(MAX(SortOrder), 0) FROM Favorites WHERE PersonID = ?", (personID,))
-        maxSort = cursor.fetchone()[0] or 0
-
-        # Check if already exists
-        cursor.execute("SELECT 1 FROM Favorites WHERE PersonID = ? AND InventoryID = ?", (personID, inventoryID))
-        if cursor.fetchone():
-            return False
-
-        cursor.execute("""
-            INSERT INTO Favorites (PersonID, InventoryID, SortOrder)
-            VALUES (?, ?, ?)
-        """, (personID, inventoryID, maxSort + 1))
-        conn.commit()
-        return True
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(MAX(SortOrder), 0) FROM Favorites WHERE PersonID = ?", (personID,))
+            maxSort = cursor.fetchone()[0] or 0
+
+            # Check if already exists
+            cursor.execute("SELECT 1 FROM Favorites WHERE PersonID = ? AND InventoryID = ?", (personID, inventoryID))
+            if cursor.fetchone():
+                return False
+
+            cursor.execute("""
+                INSERT INTO Favorites (PersonID, InventoryID, SortOrder)
+                VALUES (?, ?, ?)
+            """, (personID, inventoryID, maxSort + 1))
+            conn.commit()
+            return True
     except Exception as e:
         print(f"Error adding favorite: {e}")
         return False
-    finally:
-        close(conn, cursor)
 
 def removeFavorite(personID, inventoryID):
     """
@@ -1748,15 +2721,13 @@ def removeFavorite(personID, inventoryID):
         inventoryID (int): The ID of the item to remove.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("DELETE FROM Favorites WHERE PersonID = ? AND InventoryID = ?", (personID, inventoryID))
-        conn.commit()
+            cursor.execute("DELETE FROM Favorites WHERE PersonID = ? AND InventoryID = ?", (personID, inventoryID))
+            conn.commit()
     except Exception as e:
         print(f"Error removing favorite: {e}")
-    finally:
-        close(conn, cursor)
 
 def getFavorites(personID):
     """
@@ -1767,25 +2738,24 @@ def getFavorites(personID):
 
     Returns:
         list: A list of tuples containing FavoriteID, SortOrder, InventoryID, ItemName, 
-              ItemDescription, RetailPrice, ItemImage, and Note.
+              ItemDescription, RetailPrice, ImageHash, and Note.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT f.FavoriteID, f.SortOrder, i.InventoryID, i.ItemName, i.ItemDescription, 
-                   i.RetailPrice, i.ItemImage, f.Note
-            FROM Favorites f
-            JOIN Inventory i ON f.InventoryID = i.InventoryID
-            WHERE f.PersonID = ?
-            ORDER BY f.SortOrder ASC
-        """, (personID,))
-        return cursor.fetchall()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT f.FavoriteID, f.SortOrder, i.InventoryID, i.ItemName, i.ItemDescription, 
+                       i.RetailPrice, img.ImageHash, f.Note
+                FROM Favorites f
+                JOIN Inventory i ON f.InventoryID = i.InventoryID
+                LEFT JOIN InventoryImage img ON i.InventoryID = img.InventoryID
+                WHERE f.PersonID = ?
+                ORDER BY f.SortOrder ASC
+            """, (personID,))
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error fetching favorites: {e}")
         return []
-    finally:
-        close(conn, cursor)
 
 def updateSortOrder(favoriteID, newSortOrder):
     """
@@ -1796,14 +2766,12 @@ def updateSortOrder(favoriteID, newSortOrder):
         newSortOrder (int): The new sort order value to assign.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE Favorites SET SortOrder = ? WHERE FavoriteID = ?", (newSortOrder, favoriteID))
-        conn.commit()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE Favorites SET SortOrder = ? WHERE FavoriteID = ?", (newSortOrder, favoriteID))
+            conn.commit()
     except Exception as e:
         print(f"Error updating sort order: {e}")
-    finally:
-        close(conn, cursor)
 
 def updateNote(favoriteID, note):
     """
@@ -1814,14 +2782,12 @@ def updateNote(favoriteID, note):
         note (str): The note text to save.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE Favorites SET Note = ? WHERE FavoriteID = ?", (note, favoriteID))
-        conn.commit()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE Favorites SET Note = ? WHERE FavoriteID = ?", (note, favoriteID))
+            conn.commit()
     except Exception as e:
         print(f"Error updating favorite note: {e}")
-    finally:
-        close(conn, cursor)
 
 def getNote(favoriteID):
     """
@@ -1834,14 +2800,12 @@ def getNote(favoriteID):
         str or None: The note text if available, otherwise None.
     """
     try:
-        conn = connect()
-        cursor = conn.cursor()
+        with dbConnection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT Note FROM Favorites WHERE FavoriteID = ?",(favoriteID,))
-        row = cursor.fetchone()
-        return row[0]
+            cursor.execute("SELECT Note FROM Favorites WHERE FavoriteID = ?",(favoriteID,))
+            row = cursor.fetchone()
+            return row[0]
     except Exception as e:
         print(f"Error fetching favorites: {e}")
-        return
-    finally:
-        close(conn, cursor)
\ No newline at end of file
+        return
\ No newline at end of file
@@ -4,6 +4,7 @@ import DBLibrary as db
 import Customer
 import Product
 import Helper as h
+import ImageLoader
 import Help
 import sys
 import os
@@ -195,9 +196,8 @@ def favoritePage(window, personID, pageNumber, managerID=None):
             container = ttk.Frame(frame, relief="raised", padding=5)
             container.grid(row=row, column=col, padx=10, pady=10, sticky="n")
 
-            image = h.convertToTkImage(fav[6], fav[2], size=imgSize)
-            imgLabel = tk.Label(container, image=image, cursor="hand2")
-            imgLabel.image = image
+            imgLabel = tk.Label(container, cursor="hand2")
+            ImageLoader.loadImage(imgLabel, fav[2], fav[6], size=imgSize)
             imgLabel.pack()
             imgLabel.bind("<Button-1>", lambda e, it=fav[2]: goToProduct(it))
             nameLabel = ttk.Label(container, text=fav[3], font=("Calibri", 10))
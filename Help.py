@@ -159,7 +159,9 @@ def helpPage(sourcePage):
 
         "Reports": [
             "Select 'Sales Reports' tab or 'Inventory Reports' tab.",
-            "Select desired option and click 'Generate Sales Report'.",],
+            "Select desired option and click 'Generate Sales Report'.",
+            "On the 'Analytics' tab, enter a start and end date and click 'Generate Analytics Report' for margins, category sales, top sellers and trends.",
+            "On the 'Report Bundle' tab, enter a start and end date and click 'Build Report Bundle' to build every report for the period at once; an index of them opens when done.",],
 
         "CustomerLookup": [
             "Select an option from the dropdown to search by.",
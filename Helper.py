@@ -2,13 +2,12 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 import re
+import uuid
 import datetime
-from PIL import Image, ImageTk
-import io
-from pathlib import Path
-import webbrowser
 import DBLibrary as db
+import Reports
 import os
+from collections import OrderedDict
 
 def clearScreen(window):
     """
@@ -201,79 +200,310 @@ def validateCard(cardNumber, cardExp, ccv):
 
     return True
 
-imageCache = {}
+# Display images keyed by (inventoryID, size). Once the estimated memory of the cached
+# images passes IMAGE_CACHE_BUDGET bytes the least recently used ones are evicted.
+IMAGE_CACHE_BUDGET = 32 * 1024 * 1024
+imageCache = OrderedDict()
+imageCacheStats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
 
-def convertToTkImage(imageBlob, inventoryID, size=(150, 100)):
+def imageSizeInBytes(image):
     """
-    Converts a BLOB image to a Tkinter-compatible PhotoImage, with caching.
+    Estimates the memory used by a Tkinter image (4 bytes per pixel).
 
     Args:
-        imageBlob (bytes): Image data from the database.
-        inventoryID (int): Unique ID to cache image.
-        size (tuple): Desired image size (width, height).
+        image (tk.PhotoImage or ImageTk.PhotoImage): The image.
 
     Returns:
-        ImageTk.PhotoImage: The resized image or a gray placeholder.
+        int: Estimated size in bytes.
     """
-    if inventoryID in imageCache:
-        return imageCache[inventoryID]
-      
-    if not imageBlob:
-        # Return a blank placeholder image if None
-        placeholder = Image.new("RGB", size, color="gray")
-        image = ImageTk.PhotoImage(placeholder)
-        imageCache[inventoryID] = image
-        return image
+    return image.width() * image.height() * 4
 
-    try:
-        image = Image.open(io.BytesIO(imageBlob))
-        image = image.resize(size, Image.LANCZOS)
-        photo = ImageTk.PhotoImage(image)
-        imageCache[inventoryID] = photo
-        return photo
-    except Exception as e:
-        print(f"Image conversion error: {e}")
-        placeholder = Image.new("RGB", size, color="gray")
-        image = ImageTk.PhotoImage(placeholder)
-        imageCache[inventoryID] = image
-        return image
-      
+def getCachedImage(inventoryID, size):
+    """
+    Looks up a cached display image and marks it as most recently used.
+
+    Args:
+        inventoryID (int): The ID of the inventory item.
+        size (tuple): Image size (width, height).
+
+    Returns:
+        tk.PhotoImage or None: The cached image, or None on a miss.
+    """
+    key = (inventoryID, tuple(size))
+    image = imageCache.get(key)
+    if image is None:
+        imageCacheStats["misses"] += 1
+        return None
+    imageCache.move_to_end(key)
+    imageCacheStats["hits"] += 1
+    return image
+
+def cacheImage(inventoryID, size, image):
+    """
+    Adds a display image to the cache, evicting least recently used images to stay
+    within IMAGE_CACHE_BUDGET.
+
+    Args:
+        inventoryID (int): The ID of the inventory item.
+        size (tuple): Image size (width, height).
+        image (tk.PhotoImage): The image to cache.
+    """
+    key = (inventoryID, tuple(size))
+    if key in imageCache:
+        imageCacheStats["bytes"] -= imageSizeInBytes(imageCache.pop(key))
+    imageCache[key] = image
+    imageCacheStats["bytes"] += imageSizeInBytes(image)
+
+    while imageCacheStats["bytes"] > IMAGE_CACHE_BUDGET and len(imageCache) > 1:
+        _, evicted = imageCache.popitem(last=False)
+        imageCacheStats["bytes"] -= imageSizeInBytes(evicted)
+        imageCacheStats["evictions"] += 1
+
+def invalidateImageCache(inventoryID=None):
+    """
+    Removes cached images for one inventory item (every size), or the whole cache.
+
+    Args:
+        inventoryID (int, optional): The item whose image changed. Clears everything if None.
+    """
+    for key in list(imageCache):
+        if inventoryID is None or key[0] == inventoryID:
+            imageCacheStats["bytes"] -= imageSizeInBytes(imageCache.pop(key))
+
+def getImageCacheStats():
+    """
+    Returns image cache statistics.
+
+    Returns:
+        dict: hits, misses, evictions, bytes, entries and hitRate (0-1).
+    """
+    stats = dict(imageCacheStats)
+    stats["entries"] = len(imageCache)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hitRate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+# Carts opened on this terminal, by PersonID, so a POS terminal can switch between
+# customers without reloading their carts. Each holds its lines in display order
+# ("lines"), the same lines keyed by (InventoryID, package) ("index") and the key its
+# stock is held under ("holdKey"). A person's cart is saved to CartItem on every change;
+# a guest's cart is kept only in memory and dropped when the guest leaves.
+openCarts = {}
+# The active cart: its owner (None for a guest), its lines and its index
+cartPersonID = None
 cart = []
+cartIndex = {}
+# Identifies the active cart's stock holds (see DBLibrary.placeHold)
+cartHoldKey = uuid.uuid4().hex
+
+def openCart(personID):
+    """
+    Makes a person's cart the active cart, restoring it from the database the first
+    time it is opened on this terminal. A guest (None) always starts an empty cart.
+
+    Args:
+        personID (int or None): The customer's PersonID, or None for a guest.
+    """
+    global cartPersonID, cart, cartIndex, cartHoldKey
+
+    # A guest's cart is abandoned when someone else takes the terminal
+    if cartPersonID is None:
+        db.releaseHolds(cartHoldKey)
+
+    state = openCarts.get(personID) if personID is not None else None
+    if state is None:
+        lines = db.getCartItems(personID) if personID is not None else []
+        state = {"lines": lines,
+                 "index": {(line['InventoryID'], line['package']): line for line in lines},
+                 "holdKey": f"person-{personID}" if personID is not None else uuid.uuid4().hex}
+        if personID is not None:
+            openCarts[personID] = state
+        # Holds from an earlier session may have lapsed, so hold the restored stock again
+        quantities = {}
+        for line in lines:
+            quantities[line['InventoryID']] = quantities.get(line['InventoryID'], 0) + line['quantity']
+        if quantities:
+            db.placeHolds(state["holdKey"], quantities)
+    else:
+        db.renewHolds(state["holdKey"])
+
+    cartPersonID = personID
+    cart = state["lines"]
+    cartIndex = state["index"]
+    cartHoldKey = state["holdKey"]
+
+def closeCart():
+    """
+    Called when the active customer leaves. A guest's cart is emptied; a person's cart
+    stays open and saved.
+    """
+    if cartPersonID is None:
+        clearCart()
+
+def saveCartLine(line):
+    """
+    Saves one line of the active cart, if it belongs to a person.
+
+    Args:
+        line (dict): The cart line; a quantity of 0 deletes it.
+    """
+    if cartPersonID is not None:
+        db.saveCartItem(cartPersonID, line['InventoryID'], line['package'], line['quantity'])
+
+def cartQuantity(inventoryID):
+    """
+    Returns how many units of an item are in the cart, across all its packages.
+
+    Args:
+        inventoryID (int): The ID of the item.
+
+    Returns:
+        int: The units in the cart.
+    """
+    return sum(product['quantity'] for product in cart if product['InventoryID'] == inventoryID)
 
 def addToCart(item):
     """
-    Adds an item to the global cart. If it already exists with the same package, increases quantity.
+    Adds an item to the active cart and holds the stock for it. If it already exists
+    with the same package, increases quantity.
 
     Args:
         item (dict): The item to add with keys: InventoryID, package, quantity.
+
+    Returns:
+        bool: False if not enough stock is available, in which case the cart is unchanged.
     """
-    for product in cart:
-        if product['InventoryID'] == item['InventoryID'] and product['package'] == item['package']:
-            product['quantity'] += item.get('quantity', 1)
-            return
-    cart.append(item)
+    quantity = item.get('quantity', 1)
+    wanted = cartQuantity(item['InventoryID']) + quantity
+    if db.placeHold(cartHoldKey, item['InventoryID'], wanted) < wanted:
+        return False
+
+    key = (item['InventoryID'], item['package'])
+    product = cartIndex.get(key)
+    if product:
+        product['quantity'] += quantity
+    else:
+        product = item
+        cart.append(product)
+        cartIndex[key] = product
+    saveCartLine(product)
+    return True
+
+def setCartQuantity(index, quantity):
+    """
+    Changes the quantity of a cart line, as far as the stock available to the cart allows,
+    and updates the hold to match.
+
+    Args:
+        index (int): Position of the line in the cart.
+        quantity (int): The quantity wanted.
+
+    Returns:
+        int: The quantity the line now has.
+    """
+    product = cart[index]
+    others = cartQuantity(product['InventoryID']) - product['quantity']
+    available = db.placeHold(cartHoldKey, product['InventoryID'], others + quantity)
+    if others + quantity > available:
+        quantity = max(available - others, 0)
+        db.placeHold(cartHoldKey, product['InventoryID'], others + quantity)
+    product['quantity'] = quantity
+    saveCartLine(product)
+    return quantity
 
 def removeFromCart(item):
     """
-    Removes an item from the cart that matches the InventoryID and package.
+    Removes an item from the cart that matches the InventoryID and package, and
+    releases its held stock.
 
     Args:
         item (dict): The item to remove.
     """
-    for product in cart:
-        if product['InventoryID'] == item['InventoryID'] and product['package'] == item['package']:
-            cart.remove(product)
-            break
-        
-# Store inventory data for faster rendering
-pageCache = {}
+    product = cartIndex.get((item['InventoryID'], item['package']))
+    if product:
+        dropCartLine(product)
+        db.placeHold(cartHoldKey, item['InventoryID'], cartQuantity(item['InventoryID']))
 
-def clearInventoryCache():
-     pageCache.clear()
+def dropCartLine(line):
+    """
+    Removes a line from the active cart and the saved cart, leaving its hold to the caller.
+
+    Args:
+        line (dict): The cart line.
+    """
+    cart.remove(line)
+    del cartIndex[(line['InventoryID'], line['package'])]
+    line['quantity'] = 0
+    saveCartLine(line)
+
+def revalidateCart():
+    """
+    Brings the active cart up to date with the inventory using one lookup for the
+    whole cart: names and prices are refreshed, discontinued items are removed and
+    quantities are cut to the stock available, then the cart's holds are renewed to match.
+
+    Returns:
+        list: Messages describing what changed, empty if nothing did.
+    """
+    if not cart:
+        return []
+    inventoryIDs = {line['InventoryID'] for line in cart}
+    status = db.getCartStatus(inventoryIDs, cartHoldKey)
+    if status is None:
+        return []
+
+    messages = []
+    # Units of each item still free for the remaining lines
+    remaining = {}
+    for line in list(cart):
+        current = status.get(line['InventoryID'])
+        if current is None or current['discontinued']:
+            messages.append(f"'{line['name']}' is no longer sold and was removed.")
+            dropCartLine(line)
+            continue
+
+        line['name'] = current['name']
+        if current['price'] != line['price']:
+            messages.append(f"The price of '{line['name']}' changed from ${line['price']:.2f} to ${current['price']:.2f}.")
+            line['price'] = current['price']
+
+        left = remaining.setdefault(line['InventoryID'], current['available'])
+        if left <= 0:
+            messages.append(f"'{line['name']}' ({line['package']}) is out of stock and was removed.")
+            dropCartLine(line)
+            continue
+        if line['quantity'] > left:
+            messages.append(f"Only {left} of '{line['name']}' are available.")
+            line['quantity'] = left
+            saveCartLine(line)
+        remaining[line['InventoryID']] = left - line['quantity']
+
+    db.placeHolds(cartHoldKey, {inventoryID: cartQuantity(inventoryID) for inventoryID in inventoryIDs})
+    return messages
+
+def clearCart():
+    """
+    Empties the active cart, deletes it from the database and releases its held stock.
+    """
+    cart.clear()
+    cartIndex.clear()
+    db.releaseHolds(cartHoldKey)
+    if cartPersonID is not None:
+        db.clearCartItems(cartPersonID)
+
+def releaseCartHolds():
+    """
+    Releases the stock held by every cart open on this terminal. Called when the
+    application exits; saved carts are held again when next opened.
+    """
+    db.releaseHolds(cartHoldKey)
+    for state in openCarts.values():
+        db.releaseHolds(state["holdKey"])
 
 def processOrder(cart, discount, personID, ccNumber, expDate, ccv, managerID=None):
     """
-    Processes an order by inserting into Orders and OrderDetails, updating inventory.
+    Processes an order by inserting into Orders and OrderDetails and updating inventory,
+    all in one transaction.
 
     Args:
         cart (list): List of cart item dicts.
@@ -286,140 +516,11 @@ def processOrder(cart, discount, personID, ccNumber, expDate, ccv, managerID=Non
 
     Returns:
         int: Generated order ID.
-    """
-    discountID = discount['DiscountID'] if discount else None
-
-    # insert into orders table
-    orderID = db.insertOrder(personID, discountID, ccNumber, expDate, ccv, managerID)
-
-    # insert into order details table and update inventory
-    for item in cart:
-        db.insertOrderDetail(orderID, inventoryID=item['InventoryID'], quantity=item['quantity'], discountID=discountID)
-        db.updateInventoryQuantity(inventoryID=item['InventoryID'], quantityChange=-item['quantity'])
-    return orderID
 
-def generateReceipt(cart, discount, orderID):
+    Raises:
+        Exception: If an item is out of stock or the order could not be saved.
     """
-    Generates an HTML receipt and opens it in the default web browser.
-
-    Args:
-        cart (list): List of purchased items.
-        discount (dict): Applied discount.
-        orderID (int): Order ID of the transaction.
-    """
-    subtotal = sum(item['price'] * item['quantity'] for item in cart)
-    discountAmt = 0
-    discountText = ""
-    discountLine = ""
-    newSubtotalLine = ""
-
-    if discount:
-        # Cart level
-        if discount['DiscountLevel'] == 0:
-            if discount['DiscountType'] == 0:
-                discountAmt = subtotal * discount['DiscountPercentage']
-                discountText = f"{int(discount['DiscountPercentage'] * 100)}%"
-            else:
-                discountAmt = discount['DiscountDollarAmount']
-                discountText = f"${discountAmt:.2f}"
-        # Item level
-        elif discount['DiscountLevel'] == 1:
-            for item in cart:
-                if item['InventoryID'] == discount['InventoryID']:
-                    if discount['DiscountType'] == 0:
-                        discountAmt += item['price'] * item['quantity'] * discount['DiscountPercentage']
-                    else:
-                        discountAmt += discount['DiscountDollarAmount'] * item['quantity']
-            discountText = f"{discount['DiscountCode']} - ${discountAmt:.2f}"
-
-        discountLine = f"<p><strong>Discount:</strong> {discountText} (${discountAmt:.2f})</p>"
-        newSubtotalLine = f"<p><strong>New Subtotal:</strong> ${subtotal - discountAmt:.2f}</p>"
-
-    discountSubtotal = subtotal - discountAmt
-    tax = discountSubtotal * 0.0825
-    total = discountSubtotal + tax
-
-    receiptFolder = Path.home() / "Documents" / "Cars2U"
-    receiptFolder.mkdir(parents=True, exist_ok=True)
-
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = receiptFolder / f"Receipt_Order_{orderID}_{timestamp}.html"
-
-    managerName = db.getManagerNameByOrder(orderID)
-
-    with open(filename, "w") as f:
-        f.write(f"""<!DOCTYPE html>
-            <html>
-            <head>
-            <meta charset="UTF-8">
-            <title>Cars2U Receipt</title>
-            <style>
-                  body {{
-                        font-family: Arial, sans-serif;
-                        max-width: 800px;
-                        margin: 30px auto;
-                        padding: 20px;
-                        background-color: #f9f9f9;
-                        border: 1px solid #ccc;
-                        border-radius: 10px;
-                  }}
-                  h2 {{
-                        text-align: center;
-                        color: #333;
-                  }}
-                  table {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin-bottom: 20px;
-                  }}
-                  th, td {{
-                        border: 1px solid #ddd;
-                        padding: 10px;
-                        text-align: center;
-                  }}
-                  th {{
-                        background-color: #e0e0e0;
-                  }}
-                  p {{
-                        font-size: 16px;
-                  }}
-                  .total {{
-                        font-weight: bold;
-                  }}
-            </style>
-            </head>
-            <body>
-            <h2>Cars2U Purchase Receipt</h2>
-            <p><strong>Processed By:</strong> {managerName}</p>
-            <table>
-                  <tr>
-                        <th>Product Name</th>
-                        <th>Item Price</th>
-                        <th>Quantity</th>
-                        <th>Line Total</th>
-                  </tr>
-            """)
-
-        for item in cart:
-            line_total = item['price'] * item['quantity']
-            f.write(f"""<tr>
-                  <td>{item['name']}</td>
-                  <td>${item['price']:.2f}</td>
-                  <td>{item['quantity']}</td>
-                  <td>${line_total:.2f}</td>
-                  </tr>""")
-
-        f.write(f"""</table>
-            <p><strong>Subtotal:</strong> ${subtotal:.2f}</p>
-            {discountLine}
-            {newSubtotalLine}
-            <p><strong>Tax (8.25%):</strong> ${tax:.2f}</p>
-            <p class="total"><strong>Total:</strong> ${total:.2f}</p>
-            <p style="text-align: center;">Thank you for shopping with Cars2U!</p>
-            </body>
-            </html>""")
-
-    webbrowser.open(str(filename))
+    return db.commitOrder(personID, discount, ccNumber, expDate, ccv, cart, managerID, cartHoldKey)
 
 def convertImageToBlob(filepath):
     """
@@ -446,8 +547,8 @@ def generateDailySalesReport(dateObj):
     Args:
         dateObj (datetime.date): Target date.
     """
-    sales = db.getSalesByDate(dateObj)
-    generateSalesHTMLReport(sales, f"Daily Sales Report - {dateObj.strftime('%m-%d-%Y')}")
+    summary = db.getSalesByDate(dateObj)
+    generateSalesHTMLReport(summary, f"Daily Sales Report - {dateObj.strftime('%m-%d-%Y')}")
 
 def generateWeeklySalesReport(startDate):
     """
@@ -456,8 +557,8 @@ def generateWeeklySalesReport(startDate):
     Args:
         startDate (datetime.date): Starting date of the week.
     """
-    sales = db.getSalesByWeek(startDate)
-    generateSalesHTMLReport(sales, f"Weekly Sales Report Starting {startDate.strftime('%m-%d-%Y')}")
+    summary = db.getSalesByWeek(startDate)
+    generateSalesHTMLReport(summary, f"Weekly Sales Report Starting {startDate.strftime('%m-%d-%Y')}")
 
 def generateMonthlySalesReport(month, year):
     """
@@ -467,79 +568,52 @@ def generateMonthlySalesReport(month, year):
         month (int): Month (1-12).
         year (int): Year (4-digit).
     """
-    sales = db.getSalesByMonth(month, year)
-    generateSalesHTMLReport(sales, f"Monthly Sales Report - {month:02d}/{year}")
+    summary = db.getSalesByMonth(month, year)
+    generateSalesHTMLReport(summary, f"Monthly Sales Report - {month:02d}/{year}")
 
 def generateInventoryReportForSale():
     """
     Generates an HTML report for all items available for sale.
     """
-    items = db.getInventoryForSale()
+    items = db.iterInventoryForSale()
     generateInventoryHTMLReport(items, "Inventory - Items For Sale")
 
 def generateInventoryReportRestock():
     """
     Generates an HTML report for items needing restock.
     """
-    items = db.getInventoryRestock()
+    items = db.iterInventoryRestock()
     generateInventoryHTMLReport(items, "Inventory - Items Needing Restock")
 
 def generateInventoryReportAll():
     """
     Generates an HTML report for all items including discontinued.
     """
-    items = db.getAllInventoryIncludingDiscontinued()
+    items = db.iterAllInventoryIncludingDiscontinued()
     generateInventoryHTMLReport(items, "Inventory - All Items")
 
-def generateSalesHTMLReport(sales, title):
+def generateSalesHTMLReport(summary, title):
     """
-    Writes a sales report in HTML format and opens it.
+    Writes a sales report in HTML format and opens it: totals for the period, then
+    broken down by day, by category and by item.
 
     Args:
-        sales (list): List of sales records.
+        summary (dict): Sales totals from DBLibrary.getSalesSummary.
         title (str): Title for the report.
     """
-    if not sales:
+    if summary is None:
+        messagebox.showerror("Error", "The sales report could not be generated.")
+        return
+    if not summary["days"]:
         messagebox.showinfo("No Sales Found", "No sales records found for the selected period.")
         return
-    
-    documents = Path.home() / "Documents" / "Cars2UReports"
-    documents.mkdir(parents=True, exist_ok=True)
-
-    filename = documents / f"{title.replace(' ', '_').replace('/', '-')}.html"
-
-    with open(filename, "w") as f:
-        f.write(f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>{title}</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                table {{ width: 100%; border-collapse: collapse; }}
-                th, td {{ border: 1px solid black; padding: 8px; text-align: center; }}
-                th {{ background-color: #f2f2f2; }}
-            </style>
-        </head>
-        <body>
-        <h2>{title}</h2>
-        <table>
-            <tr>
-                <th>Order ID</th>
-                <th>Date</th>
-                <th>Subtotal</th>
-                <th>Tax</th>
-                <th>Total</th>
-            </tr>
-        """)
-        for order in sales:
-            f.write(f"<tr><td>{order['OrderID']}</td><td>{order['OrderDate']}</td><td>${order['Subtotal']:.2f}</td><td>${order['Tax']:.2f}</td><td>${order['Total']:.2f}</td></tr>")
-
-        f.write("""
-        </table>
-        </body>
-        </html>
-        """)
+
+    try:
+        filename = Reports.writeSalesReport(summary, title)
+    except Exception as e:
+        print(f"Error writing sales report: {e}")
+        messagebox.showerror("Error", "The sales report could not be generated.")
+        return
     os.startfile(filename)
 
 def generateInventoryHTMLReport(items, title):
@@ -547,51 +621,16 @@ def generateInventoryHTMLReport(items, title):
     Writes an inventory report in HTML format and opens it.
 
     Args:
-        items (list): List of inventory items.
+        items (iterable): Item tuples from a DBLibrary inventory generator.
         title (str): Title for the report.
     """
-    if not items:
+    try:
+        filename, _ = Reports.writeInventoryReport(items, title)
+    except Exception as e:
+        print(f"Error writing inventory report: {e}")
+        messagebox.showerror("Error", "The inventory report could not be generated.")
+        return
+    if filename is None:
         messagebox.showinfo("No Items Found", "No inventory records found matching the selected criteria.")
         return
-    
-    documents = Path.home() / "Documents" / "Cars2UReports"
-    documents.mkdir(parents=True, exist_ok=True)
-
-    filename = documents / f"{title.replace(' ', '_')}.html"
-
-    with open(filename, "w") as f:
-        f.write(f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>{title}</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                table {{ width: 100%; border-collapse: collapse; }}
-                th, td {{ border: 1px solid black; padding: 8px; text-align: center; }}
-                th {{ background-color: #f2f2f2; }}
-            </style>
-        </head>
-        <body>
-        <h2>{title}</h2>
-        <table>
-            <tr>
-                <th>Inventory ID</th>
-                <th>Item Name</th>
-                <th>Cost</th>
-                <th>Retail Price</th>
-                <th>Quantity</th>
-                <th>Restock Threshold</th>
-                <th>Availability</th>
-            </tr>
-        """)
-        for item in items:
-            status = "Available" if item['Discontinued'] == 0 else "Discontinued"
-            f.write(f"<tr><td>{item['InventoryID']}</td><td>{item['ItemName']}</td><td>${item['Cost']:.2f}</td><td>${item['RetailPrice']:.2f}</td><td>{item['Quantity']}</td><td>{item['RestockThreshold']}</td><td>{status}</td></tr>")
-
-        f.write("""
-        </table>
-        </body>
-        </html>
-        """)
     os.startfile(filename)
\ No newline at end of file
@@ -0,0 +1,40 @@
+import threading
+import DBLibrary as db
+
+# Deletes expired stock holds in the background. Expired holds are already ignored
+# wherever stock is checked, so this only keeps the StockHold table small; it runs on
+# a daemon thread for the life of the application.
+
+REAP_INTERVAL_SECONDS = 60
+
+stopEvent = threading.Event()
+reaperThread = None
+
+def reapLoop():
+    """
+    Reaps expired holds every REAP_INTERVAL_SECONDS until shutdown() is called.
+    """
+    while True:
+        db.reapExpiredHolds()
+        if stopEvent.wait(REAP_INTERVAL_SECONDS):
+            return
+
+def start():
+    """
+    Starts the reaper thread. Call once the database has been created and migrated.
+    """
+    global reaperThread
+
+    if reaperThread is None:
+        stopEvent.clear()
+        reaperThread = threading.Thread(target=reapLoop, name="HoldReaper", daemon=True)
+        reaperThread.start()
+
+def shutdown():
+    """
+    Stops the reaper thread.
+    """
+    global reaperThread
+
+    stopEvent.set()
+    reaperThread = None
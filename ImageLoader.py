@@ -0,0 +1,189 @@
+import io
+import os
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageTk
+import DBLibrary as db
+import Helper as h
+import ImageStore
+
+# Product images are decoded and resized on worker threads so a page of products shows
+# up straight away with gray placeholders. Tk objects can only be created on the Tk
+# thread, so workers hand back PIL images through a queue that the Tk thread drains
+# with after() and turns into PhotoImages there.
+
+IMAGE_WORKERS = min(4, os.cpu_count() or 1)
+POLL_INTERVAL_MS = 30
+
+executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="ImageLoader")
+results = queue.Queue()
+# (inventoryID, size) -> labels waiting for that image. Only touched on the Tk thread.
+pendingLabels = {}
+placeholders = {}
+pollRoot = None
+
+def decodeImage(inventoryID, imageHash, size):
+    """
+    Loads an item's image at the given size. Runs on a worker thread.
+
+    Args:
+        inventoryID (int): The ID of the inventory item.
+        imageHash (str or None): The item's image reference from a catalog query.
+        size (tuple): Desired image size (width, height).
+
+    Returns:
+        PIL.Image.Image or None: The resized image, or None if the item has no image.
+    """
+    if not imageHash:
+        return None
+
+    thumbnailFile = ImageStore.getThumbnailFile(imageHash, size)
+    if not thumbnailFile:
+        imageBlob = db.getItemImage(inventoryID)
+        if not imageBlob:
+            return None
+        if size not in ImageStore.THUMBNAIL_SIZES:
+            image = Image.open(io.BytesIO(imageBlob))
+            return image.resize(size, Image.LANCZOS)
+        ImageStore.generateThumbnails(imageBlob, imageHash)
+        thumbnailFile = ImageStore.getThumbnailFile(imageHash, size)
+
+    image = Image.open(thumbnailFile)
+    image.load()
+    return image
+
+def decodeJob(key, imageHash):
+    """
+    Worker entry point. Always posts a result so waiting labels are released.
+
+    Args:
+        key (tuple): (inventoryID, size) of the requested image.
+        imageHash (str or None): The item's image reference.
+    """
+    try:
+        image = decodeImage(key[0], imageHash, key[1])
+    except Exception as e:
+        print(f"Background image load error: {e}")
+        image = None
+    results.put((key, image))
+
+def getPlaceholder(size):
+    """
+    Returns the shared gray placeholder image for a size.
+
+    Args:
+        size (tuple): Image size (width, height).
+
+    Returns:
+        ImageTk.PhotoImage: The placeholder image.
+    """
+    if size not in placeholders:
+        placeholders[size] = ImageTk.PhotoImage(Image.new("RGB", size, color="gray"))
+    return placeholders[size]
+
+def setLabelImage(label, image):
+    """
+    Shows an image on a label and keeps a reference so Tk does not discard it.
+    """
+    label.configure(image=image)
+    label.image = image
+
+def loadImage(label, inventoryID, imageHash, size=(150, 100)):
+    """
+    Shows an item's image on a label. A cached image is shown immediately; otherwise
+    the label gets a placeholder and the image is swapped in once a worker has loaded it.
+
+    Args:
+        label (tk.Label): The label that displays the image.
+        inventoryID (int): The ID of the inventory item.
+        imageHash (str or None): The item's image reference from a catalog query.
+        size (tuple): Desired image size (width, height).
+    """
+    size = tuple(size)
+    key = (inventoryID, size)
+    # Remember what the label is waiting for so a reused label never shows a stale image
+    label.imageKey = key
+
+    image = h.getCachedImage(inventoryID, size)
+    if image is not None:
+        setLabelImage(label, image)
+        return
+
+    setLabelImage(label, getPlaceholder(size))
+    if not imageHash:
+        return
+
+    if key in pendingLabels:
+        pendingLabels[key].append(label)
+        return
+    pendingLabels[key] = [label]
+    submitJob(label, key, imageHash)
+
+def prefetch(widget, inventoryID, imageHash, size=(150, 100)):
+    """
+    Loads an item's image into the image cache without displaying it, so a page the
+    user is likely to open next can show its images immediately.
+
+    Args:
+        widget (tk.Widget): Any widget of the application, used to reach the Tk root.
+        inventoryID (int): The ID of the inventory item.
+        imageHash (str or None): The item's image reference from a catalog query.
+        size (tuple): Desired image size (width, height).
+    """
+    size = tuple(size)
+    key = (inventoryID, size)
+    if not imageHash or key in pendingLabels or key in h.imageCache:
+        return
+    pendingLabels[key] = []
+    submitJob(widget, key, imageHash)
+
+def submitJob(widget, key, imageHash):
+    """
+    Queues an image load and makes sure the Tk thread is polling for results.
+    """
+    global pollRoot
+
+    executor.submit(decodeJob, key, imageHash)
+    if pollRoot is None:
+        pollRoot = widget.nametowidget(".")
+        pollRoot.after(POLL_INTERVAL_MS, processResults)
+
+def processResults():
+    """
+    Swaps finished images into their labels. Runs on the Tk thread via after() and
+    keeps rescheduling itself while any image is still loading.
+    """
+    global pollRoot
+
+    while True:
+        try:
+            key, pilImage = results.get_nowait()
+        except queue.Empty:
+            break
+
+        labels = pendingLabels.pop(key, [])
+        if pilImage is None:
+            image = getPlaceholder(key[1])
+        else:
+            image = ImageTk.PhotoImage(pilImage)
+            h.cacheImage(key[0], key[1], image)
+
+        for label in labels:
+            # The page may have been left or redrawn while the image was loading
+            try:
+                if label.winfo_exists() and getattr(label, "imageKey", None) == key:
+                    setLabelImage(label, image)
+            except tk.TclError:
+                pass
+
+    if pendingLabels:
+        pollRoot.after(POLL_INTERVAL_MS, processResults)
+    else:
+        pollRoot = None
+
+def shutdown():
+    """
+    Stops the worker threads, dropping any images that have not started loading.
+    """
+    executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,95 @@
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+from PIL import Image
+
+# Pre-rendered thumbnails live on disk, named by image hash and size, so the UI can
+# load them directly without decoding or resampling the full image.
+THUMBNAIL_FOLDER = Path.home() / "Documents" / "Cars2U" / "thumbnails"
+THUMBNAIL_SIZES = [(150, 100), (300, 200)]
+
+def hashImage(imageBlob):
+    """
+    Returns the content hash used to reference a product image.
+
+    Identical image data always produces the same hash, so the hash can be handed to
+    the UI in place of the image itself and used as a cache key.
+
+    Args:
+        imageBlob (bytes): Raw image file data.
+
+    Returns:
+        str or None: Hex SHA-1 digest of the data, or None if there is no image.
+    """
+    if not imageBlob:
+        return None
+    return hashlib.sha1(imageBlob).hexdigest()
+
+def thumbnailPath(imageHash, size):
+    """
+    Returns where the thumbnail for an image hash and size is stored.
+
+    Args:
+        imageHash (str): The image's content hash.
+        size (tuple): Thumbnail size (width, height).
+
+    Returns:
+        Path: The PNG file path for the thumbnail.
+    """
+    return THUMBNAIL_FOLDER / f"{imageHash}_{size[0]}x{size[1]}.png"
+
+def generateThumbnails(imageBlob, imageHash=None):
+    """
+    Decodes an image once and writes every standard thumbnail size to the thumbnail cache.
+
+    Sizes that already exist on disk are skipped. Called when an image is added or replaced,
+    and as a fallback the first time an image without thumbnails is displayed.
+
+    Args:
+        imageBlob (bytes): Raw image file data.
+        imageHash (str, optional): The image's content hash, computed if not given.
+    """
+    if not imageBlob:
+        return
+    imageHash = imageHash or hashImage(imageBlob)
+    missing = [size for size in THUMBNAIL_SIZES if not thumbnailPath(imageHash, size).exists()]
+    if not missing:
+        return
+
+    try:
+        THUMBNAIL_FOLDER.mkdir(parents=True, exist_ok=True)
+        image = Image.open(io.BytesIO(imageBlob))
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        for size in missing:
+            path = thumbnailPath(imageHash, size)
+            # A temp file of its own, as several loader threads may render the same image at once
+            tempFile = tempfile.NamedTemporaryFile(dir=THUMBNAIL_FOLDER, suffix=".tmp", delete=False)
+            try:
+                with tempFile:
+                    image.resize(size, Image.LANCZOS).save(tempFile, format="PNG")
+                os.replace(tempFile.name, path)
+            except Exception:
+                Path(tempFile.name).unlink(missing_ok=True)
+                raise
+    except Exception as e:
+        print(f"Thumbnail generation error: {e}")
+
+def getThumbnailFile(imageHash, size):
+    """
+    Returns the pre-rendered thumbnail file for an image, if one exists.
+
+    Args:
+        imageHash (str): The image's content hash.
+        size (tuple): Thumbnail size (width, height).
+
+    Returns:
+        str or None: Path to the PNG thumbnail, or None if it has not been generated.
+    """
+    if not imageHash:
+        return None
+    path = thumbnailPath(imageHash, size)
+    return str(path) if path.exists() else None
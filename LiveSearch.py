@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+import DBLibrary as db
+
+# Search-as-you-type. Keystrokes are debounced, the search runs on a worker thread,
+# and a newer search cancels the one still running (interrupting its SQLite query).
+# Only the newest search's results are handed back to the page, on the Tk thread.
+
+SEARCH_DELAY_MS = 250
+POLL_INTERVAL_MS = 20
+
+# Two workers so a search that is still unwinding from a cancel never delays the next one
+searchExecutor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="LiveSearch")
+
+def bindLiveSearch(entry, getQuery, search, showResults, initialQuery=None, delayMs=SEARCH_DELAY_MS):
+    """
+    Runs a search in the background as the user types into an entry.
+
+    Args:
+        entry (ttk.Entry): The search box. Searches stop once it is destroyed.
+        getQuery (callable): Returns the current query (e.g. the entry text and any
+            filters). Called on the Tk thread.
+        search (callable): Takes a query and returns its results. Called on a worker
+            thread, so it must only use DBLibrary/Catalog and no Tk widgets.
+        showResults (callable): Takes the results and updates the page. Called on the
+            Tk thread, only for the newest search.
+        initialQuery (optional): The query already on screen, so it is not searched again.
+        delayMs (int): How long typing must pause before a search starts.
+
+    Returns:
+        callable: schedule(event=None, delay=None, force=False), which queues a search of
+            the current query. Pass delay=0 to search straight away and force=True to
+            search even if the query has not changed (e.g. after the data was edited).
+    """
+    root = entry.nametowidget(".")
+    state = {"generation": 0, "timer": None, "token": None, "lastQuery": initialQuery}
+
+    def schedule(event=None, delay=None, force=False):
+        """
+        (Re)starts the debounce timer. Bound to every key release in the entry.
+        """
+        if state["timer"] is not None:
+            root.after_cancel(state["timer"])
+        state["timer"] = root.after(delayMs if delay is None else delay, start, force)
+
+    def start(force):
+        """
+        Starts a search of the current query, cancelling the previous one.
+        """
+        state["timer"] = None
+        if not entry.winfo_exists():
+            return
+
+        query = getQuery()
+        # Arrow keys, Shift and the like do not change the query
+        if query == state["lastQuery"] and not force:
+            return
+        state["lastQuery"] = query
+
+        if state["token"] is not None:
+            db.cancelQuery(state["token"])
+        state["generation"] += 1
+        token = {}
+        state["token"] = token
+
+        future = searchExecutor.submit(db.runCancellable, token, search, query)
+        root.after(POLL_INTERVAL_MS, deliver, future, state["generation"])
+
+    def deliver(future, generation):
+        """
+        Hands finished results to the page, dropping any from a superseded search.
+        """
+        if not future.done():
+            root.after(POLL_INTERVAL_MS, deliver, future, generation)
+            return
+        if generation != state["generation"] or not entry.winfo_exists():
+            return
+        state["token"] = None
+
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"Live search error: {e}")
+            return
+        showResults(results)
+
+    entry.bind("<KeyRelease>", schedule, add="+")
+    return schedule
+
+def shutdown():
+    """
+    Stops the search worker threads, dropping searches that have not started.
+    """
+    searchExecutor.shutdown(wait=False, cancel_futures=True)
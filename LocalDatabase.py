@@ -2,19 +2,93 @@ import sqlite3
 import os
 from pathlib import Path
 import sys
+import Migrations
+import ImageStore
 
 DB_FOLDER = Path.home() / "Documents" / "Cars2U"
 DB_FOLDER.mkdir(parents=True, exist_ok=True)
 DB_NAME = str(DB_FOLDER / "Cars2U.db")
 
+# PRAGMA settings applied when the database is built and on every connection.
+# A deployment picks one with the CARS2U_DB_PROFILE environment variable.
+PERFORMANCE_PROFILES = {
+    # Original behaviour: rollback journal, writers block readers
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+    },
+    # Single workstation or light POS use
+    "standard": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,       # ~16 MB page cache
+        "mmap_size": 134217728,     # 128 MB
+        "temp_store": "MEMORY",
+    },
+    # Busy store with several POS terminals and customers browsing at once
+    "pos": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,       # ~64 MB page cache
+        "mmap_size": 268435456,     # 256 MB
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 2000,
+    },
+    # Older hardware where memory matters more than throughput
+    "lowmemory": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+}
+DEFAULT_PROFILE = "standard"
+# Settings that change the database file or its journal; a mode=ro connection cannot apply them
+WRITE_PRAGMAS = {"journal_mode", "synchronous", "wal_autocheckpoint"}
+
+def getPerformanceProfile():
+    """
+    Returns the name of the performance profile selected for this deployment.
+
+    Returns:
+        str: The CARS2U_DB_PROFILE value if it names a known profile, otherwise DEFAULT_PROFILE.
+    """
+    name = os.environ.get("CARS2U_DB_PROFILE", DEFAULT_PROFILE).strip().lower()
+    if name not in PERFORMANCE_PROFILES:
+        print(f"Unknown database profile '{name}', using '{DEFAULT_PROFILE}'")
+        return DEFAULT_PROFILE
+    return name
+
+def applyPerformanceProfile(conn, profileName=None, readOnly=False):
+    """
+    Applies the PRAGMA settings of a performance profile to a connection.
+
+    Args:
+        conn (sqlite3.Connection): The connection to configure.
+        profileName (str, optional): Profile to apply. Defaults to the deployment's profile.
+        readOnly (bool): Whether conn was opened read-only, in which case WRITE_PRAGMAS
+            are left to the read-write connections.
+    """
+    profile = PERFORMANCE_PROFILES[profileName or getPerformanceProfile()]
+    for pragma, value in profile.items():
+        if readOnly and pragma in WRITE_PRAGMAS:
+            continue
+        conn.execute(f"PRAGMA {pragma} = {value};")
+
 def createLocalDatabase():
     """
-    Creates and populates the local SQLite database for the Cars2U application if it doesn't already exist.
+    Creates and populates the local SQLite database for the Cars2U application if it doesn't already exist,
+    then applies any pending schema migrations.
+
+    Raises:
+        Exception: If the database could not be migrated (see migrateLocalDatabase).
     """
     needsInit = True
     if os.path.exists(DB_NAME):
         try:
             conn = sqlite3.connect(DB_NAME)
+            applyPerformanceProfile(conn)
             cursor = conn.cursor()
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='Inventory'")
             if cursor.fetchone():
@@ -25,11 +99,44 @@ def createLocalDatabase():
             cursor.close()
             conn.close()
 
-    if not needsInit:
-        return
+    if needsInit:
+        createTables()
 
-    # Build DB from scratch
+    migrateLocalDatabase(backup=not needsInit)
+
+    if needsInit:
+        populateDatabase()
+        populateImages()
+
+def migrateLocalDatabase(backup=True):
+    """
+    Runs any pending migrations from Migrations.MIGRATIONS against Cars2U.db.
+
+    Args:
+        backup (bool): Whether to back up the database before migrating.
+
+    Raises:
+        Exception: If a migration fails. The failed migration has been rolled back and
+            the database left at the last version applied, which the application must
+            not run against.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        applyPerformanceProfile(conn)
+        Migrations.migrateDatabase(conn, DB_NAME, backup)
+    except Exception as e:
+        print(f"Error migrating database: {e}")
+        raise
+    finally:
+        conn.close()
+
+def createTables():
+    """
+    Builds the original Cars2U tables in an empty database. Later schema changes are
+    applied on top of these by the migrations.
+    """
     connection = sqlite3.connect(DB_NAME)
+    applyPerformanceProfile(connection)
     cursor = connection.cursor()
 
     # Enable foreign key constraints
@@ -202,9 +309,6 @@ def createLocalDatabase():
     connection.close()
     print("Cars2U.db created successfully.")
 
-    populateDatabase()
-    populateImages()
-
 def populateDatabase():
     """
     Inserts default seed data into the Cars2U database. This includes:
@@ -216,6 +320,7 @@ def populateDatabase():
     - Discount codes
     """
     conn = sqlite3.connect(DB_NAME)
+    applyPerformanceProfile(conn)
     cursor = conn.cursor()
 
     # Security Questions
@@ -353,8 +458,8 @@ def populateDatabase():
 def populateImages():
     """
     Scans the `productImages` folder for image files corresponding to inventory item names.
-    Updates the `ItemImage` field in the Inventory table with binary image data (BLOB)
-    for each matching item.
+    Stores the binary image data (BLOB) for each matching item in the InventoryImage table
+    and pre-renders its thumbnails.
     
     Only processes files with extensions: .png, .jpg, .webp, .jfif
     The image filename (without extension) must match the `ItemName` in the database.
@@ -382,6 +487,7 @@ def populateImages():
 
     try:
         conn = sqlite3.connect(DB_NAME)
+        applyPerformanceProfile(conn)
         cursor = conn.cursor()
 
         for fileName in os.listdir(imageFolder):
@@ -394,13 +500,15 @@ def populateImages():
                 imageData = f.read()
 
             cursor.execute("""
-                    UPDATE Inventory
-                    SET ItemImage = ?
+                    INSERT OR REPLACE INTO InventoryImage (InventoryID, ImageHash, ImageData)
+                    SELECT InventoryID, ?, ?
+                    FROM Inventory
                     WHERE LOWER(ItemName) = LOWER(?)
-                """, (imageData, fileBase))
+                """, (ImageStore.hashImage(imageData), imageData, fileBase))
+            ImageStore.generateThumbnails(imageData)
 
             conn.commit()
-        print("Images successfully populated in Inventory table.")
+        print("Images successfully populated in InventoryImage table.")
 
     except Exception as e:
         print(f"Error in populateImages: {e}")
@@ -74,6 +74,8 @@ def loginPage(window):
         
         if (result == 1):
             h.clearScreen(window)
+            # Restore the cart the customer left last time
+            h.openCart(personID)
             Customer.customerPage(window, personID, 0)
         elif (result == 2):
             h.clearScreen(window)
@@ -109,6 +111,7 @@ def loginPage(window):
         Opens the Customer page as a guest user (no login required).
         """
         h.clearScreen(window)
+        h.openCart(None)
         Customer.customerPage(window, None, 0)
 
     # Main Frame
@@ -1,9 +1,19 @@
 import os
 import sys
+import multiprocessing
 import tkinter as tk
-from tkinter import PhotoImage
+from tkinter import PhotoImage, messagebox
 import Login
 import LocalDatabase
+import DBLibrary as db
+import ImageLoader
+import Catalog
+import LiveSearch
+import HoldReaper
+import Receipts
+import Analytics
+import ReportBatch
+import Helper as h
 
 # #7393B3 - blue gray (background)
 # current discounts - save10 - 10% off everything
@@ -14,34 +24,64 @@ def resourcePath(relativePath):
     base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
     return os.path.join(base_path, relativePath)
 
-root = tk.Tk()
-root.title("Cars-2-U")
+def main():
+    """
+    Opens the application window and runs it until it is closed.
+    """
+    root = tk.Tk()
+    root.title("Cars-2-U")
 
-iconPath = resourcePath("Images/Logo.png")
+    iconPath = resourcePath("Images/Logo.png")
 
-try:
-    icon = PhotoImage(file=iconPath)
-    root.iconphoto(False, icon)
-except Exception as e:
-    print(f"Error loading icon: {e}")
+    try:
+        icon = PhotoImage(file=iconPath)
+        root.iconphoto(False, icon)
+    except Exception as e:
+        print(f"Error loading icon: {e}")
 
-rootWidth = 1000
-rootHeight = 650
+    rootWidth = 1000
+    rootHeight = 650
 
-# Screen dimensions
-screenWidth = root.winfo_screenwidth()
-screenHeight = root.winfo_screenheight()
+    # Screen dimensions
+    screenWidth = root.winfo_screenwidth()
+    screenHeight = root.winfo_screenheight()
 
-# Calculate center position
-xPos = (screenWidth // 2) - (rootWidth // 2)
-yPos = (screenHeight // 2) - (rootHeight // 2)
+    # Calculate center position
+    xPos = (screenWidth // 2) - (rootWidth // 2)
+    yPos = (screenHeight // 2) - (rootHeight // 2)
 
-# Set window geometry
-root.geometry(f"{rootWidth}x{rootHeight}+{xPos}+{yPos}")
+    # Set window geometry
+    root.geometry(f"{rootWidth}x{rootHeight}+{xPos}+{yPos}")
 
-LocalDatabase.createLocalDatabase()
+    try:
+        LocalDatabase.createLocalDatabase()
+    except Exception as e:
+        # Never run against a half-migrated database
+        messagebox.showerror(title="Database Error",
+                             message=f"Cars2U could not update its database and will close.\n\n{e}\n\n"
+                                     f"The failed update was rolled back.")
+        root.destroy()
+        return
+    HoldReaper.start()
 
-Login.loginPage(root)
+    Login.loginPage(root)
 
 
-root.mainloop()
\ No newline at end of file
+    root.mainloop()
+
+    # Stock left in unfinished carts goes back on sale straight away
+    h.releaseCartHolds()
+    HoldReaper.shutdown()
+    Receipts.shutdown()
+    Analytics.shutdown()
+    ReportBatch.shutdown()
+    LiveSearch.shutdown()
+    Catalog.shutdown()
+    ImageLoader.shutdown()
+    db.closeConnections()
+
+# Report batches start worker processes that import this module again, so the
+# application only starts when run directly
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,816 @@
+import sqlite3
+import time
+from datetime import datetime
+import ImageStore
+import Pricing
+
+# Every schema change after the original tables is shipped as a numbered migration.
+# The database records the last applied number in PRAGMA user_version, so an existing
+# install only runs the migrations it has not seen yet. Append new migrations to the
+# end of MIGRATIONS and never renumber or edit one that has already shipped.
+
+def addSecondaryIndexes(cursor):
+    """
+    Migration 1: secondary indexes for the hot query paths in DBLibrary.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    indexes = [
+        # testLogin, userExists, loadQuestions, changePassword
+        "CREATE INDEX IF NOT EXISTS idx_Logon_LogonNameLower ON Logon(LOWER(LogonName))",
+        "CREATE INDEX IF NOT EXISTS idx_Logon_PersonID ON Logon(PersonID)",
+        "CREATE INDEX IF NOT EXISTS idx_SecurityQuestions_QuestionPrompt ON SecurityQuestions(QuestionPrompt)",
+        # Catalog pages, counts and category filter
+        "CREATE INDEX IF NOT EXISTS idx_Inventory_Discontinued ON Inventory(Discontinued, InventoryID)",
+        "CREATE INDEX IF NOT EXISTS idx_Inventory_CategoryID ON Inventory(CategoryID)",
+        "CREATE INDEX IF NOT EXISTS idx_Categories_CategoryName ON Categories(CategoryName)",
+        "CREATE INDEX IF NOT EXISTS idx_ProductPackage_InventoryID ON ProductPackage(InventoryID)",
+        # Promo codes
+        "CREATE INDEX IF NOT EXISTS idx_Discounts_DiscountCode ON Discounts(DiscountCode)",
+        "CREATE INDEX IF NOT EXISTS idx_Discounts_ExpirationDate ON Discounts(ExpirationDate)",
+        # Orders, customer history and sales reports
+        "CREATE INDEX IF NOT EXISTS idx_Orders_PersonID_OrderDate ON Orders(PersonID, OrderDate)",
+        "CREATE INDEX IF NOT EXISTS idx_Orders_OrderDate ON Orders(OrderDate)",
+        "CREATE INDEX IF NOT EXISTS idx_OrderDetails_OrderID ON OrderDetails(OrderID)",
+        "CREATE INDEX IF NOT EXISTS idx_OrderDetails_InventoryID ON OrderDetails(InventoryID)",
+        # Favorites page
+        "CREATE INDEX IF NOT EXISTS idx_Favorites_PersonID_SortOrder ON Favorites(PersonID, SortOrder)",
+        "CREATE INDEX IF NOT EXISTS idx_Favorites_PersonID_InventoryID ON Favorites(PersonID, InventoryID)",
+        "CREATE INDEX IF NOT EXISTS idx_Favorites_InventoryID ON Favorites(InventoryID)",
+    ]
+    for statement in indexes:
+        cursor.execute(statement)
+
+def moveImagesToImageStore(cursor):
+    """
+    Migration 2: moves Inventory.ItemImage BLOBs into the InventoryImage side table.
+
+    Catalog queries then read only small Inventory rows plus the image hash, and the
+    full image is fetched by InventoryID when it is actually displayed.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS InventoryImage (
+            InventoryID INTEGER PRIMARY KEY,
+            ImageHash TEXT NOT NULL,
+            ImageData BLOB NOT NULL,
+            FOREIGN KEY (InventoryID) REFERENCES Inventory(InventoryID) ON DELETE CASCADE
+        );
+    """)
+
+    readCursor = cursor.connection.cursor()
+    try:
+        readCursor.execute("SELECT InventoryID, ItemImage FROM Inventory WHERE ItemImage IS NOT NULL")
+        for inventoryID, imageBlob in readCursor:
+            cursor.execute("""
+                INSERT OR REPLACE INTO InventoryImage (InventoryID, ImageHash, ImageData)
+                VALUES (?, ?, ?)
+            """, (inventoryID, ImageStore.hashImage(imageBlob), imageBlob))
+    finally:
+        readCursor.close()
+
+    cursor.execute("UPDATE Inventory SET ItemImage = NULL WHERE ItemImage IS NOT NULL")
+
+def addCatalogVersion(cursor):
+    """
+    Migration 3: a single-row change counter for the customer catalog.
+
+    Triggers bump CatalogVersion.Version on every write to a table the catalog pages
+    are built from, so a cache can tell its pages are stale with one cheap lookup.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS CatalogVersion (
+            VersionID INTEGER PRIMARY KEY CHECK (VersionID = 1),
+            Version INTEGER NOT NULL
+        );
+    """)
+    cursor.execute("INSERT OR IGNORE INTO CatalogVersion (VersionID, Version) VALUES (1, 0)")
+
+    for table in ["Inventory", "ProductPackage", "Categories", "InventoryImage"]:
+        for event in ["INSERT", "UPDATE", "DELETE"]:
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.capitalize()}_CatalogVersion
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE CatalogVersion SET Version = Version + 1 WHERE VersionID = 1;
+                END;
+            """)
+
+def addInventorySearch(cursor):
+    """
+    Migration 4: FTS5 full-text index over the customer catalog.
+
+    InventorySearch holds one row per item (rowid = InventoryID) with its name,
+    description, category name and package names. Triggers on Inventory,
+    ProductPackage and Categories keep it in sync.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS InventorySearch USING fts5(
+            ItemName, ItemDescription, CategoryName, PackageNames,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        );
+    """)
+    # Rank name matches above category, package and description matches
+    cursor.execute("INSERT INTO InventorySearch (InventorySearch, rank) VALUES ('rank', 'bm25(10.0, 1.0, 4.0, 2.0)')")
+
+    categoryName = "(SELECT CategoryName FROM Categories WHERE CategoryID = new.CategoryID)"
+    packageNames = "(SELECT group_concat(PackageName, ' ') FROM ProductPackage WHERE InventoryID = {}.InventoryID)"
+
+    triggers = [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_Inventory_Insert_Search AFTER INSERT ON Inventory
+        BEGIN
+            INSERT INTO InventorySearch (rowid, ItemName, ItemDescription, CategoryName, PackageNames)
+            VALUES (new.InventoryID, new.ItemName, new.ItemDescription, {categoryName}, {packageNames.format("new")});
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_Inventory_Update_Search
+        AFTER UPDATE OF ItemName, ItemDescription, CategoryID ON Inventory
+        BEGIN
+            DELETE FROM InventorySearch WHERE rowid = old.InventoryID;
+            INSERT INTO InventorySearch (rowid, ItemName, ItemDescription, CategoryName, PackageNames)
+            VALUES (new.InventoryID, new.ItemName, new.ItemDescription, {categoryName}, {packageNames.format("new")});
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_Inventory_Delete_Search AFTER DELETE ON Inventory
+        BEGIN
+            DELETE FROM InventorySearch WHERE rowid = old.InventoryID;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ProductPackage_Insert_Search AFTER INSERT ON ProductPackage
+        BEGIN
+            UPDATE InventorySearch SET PackageNames = {packageNames.format("new")} WHERE rowid = new.InventoryID;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ProductPackage_Update_Search AFTER UPDATE ON ProductPackage
+        BEGIN
+            UPDATE InventorySearch SET PackageNames = {packageNames.format("old")} WHERE rowid = old.InventoryID;
+            UPDATE InventorySearch SET PackageNames = {packageNames.format("new")} WHERE rowid = new.InventoryID;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ProductPackage_Delete_Search AFTER DELETE ON ProductPackage
+        BEGIN
+            UPDATE InventorySearch SET PackageNames = {packageNames.format("old")} WHERE rowid = old.InventoryID;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_Categories_Update_Search AFTER UPDATE OF CategoryName ON Categories
+        BEGIN
+            UPDATE InventorySearch SET CategoryName = new.CategoryName
+            WHERE rowid IN (SELECT InventoryID FROM Inventory WHERE CategoryID = new.CategoryID);
+        END;
+        """,
+    ]
+    for statement in triggers:
+        cursor.execute(statement)
+
+    # Index the items that already exist
+    cursor.execute("DELETE FROM InventorySearch")
+    cursor.execute("""
+        INSERT INTO InventorySearch (rowid, ItemName, ItemDescription, CategoryName, PackageNames)
+        SELECT i.InventoryID, i.ItemName, i.ItemDescription, c.CategoryName,
+               (SELECT group_concat(PackageName, ' ') FROM ProductPackage p WHERE p.InventoryID = i.InventoryID)
+        FROM Inventory i
+        LEFT JOIN Categories c ON i.CategoryID = c.CategoryID
+    """)
+
+def compactSQL(expression):
+    """
+    Returns SQL that lowercases text and strips spaces and common punctuation, so
+    "RAV 4", "rav-4" and "RAV4" all index as "rav4".
+    """
+    for character in [" ", "-", ".", "/", "'", "(", ")", ",", "&", "+", "_"]:
+        literal = character.replace("'", "''")
+        expression = f"replace({expression}, '{literal}', '')"
+    return f"lower({expression})"
+
+def addFuzzySearch(cursor):
+    """
+    Migration 5: trigram index used for typo-tolerant catalog search.
+
+    InventoryFuzzy holds one row per item (rowid = InventoryID) with the compacted
+    item name and package names, tokenized into trigrams by FTS5. Triggers on
+    Inventory and ProductPackage keep it in sync.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS InventoryFuzzy USING fts5(
+            CompactName, CompactPackages,
+            tokenize = 'trigram'
+        );
+    """)
+
+    compactName = compactSQL("new.ItemName")
+    compactPackages = "(SELECT group_concat(" + compactSQL("PackageName") + ", ' ') FROM ProductPackage WHERE InventoryID = {}.InventoryID)"
+
+    triggers = [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_Inventory_Insert_Fuzzy AFTER INSERT ON Inventory
+        BEGIN
+            INSERT INTO InventoryFuzzy (rowid, CompactName, CompactPackages)
+            VALUES (new.InventoryID, {compactName}, {compactPackages.format("new")});
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_Inventory_Update_Fuzzy AFTER UPDATE OF ItemName ON Inventory
+        BEGIN
+            UPDATE InventoryFuzzy SET CompactName = {compactName} WHERE rowid = new.InventoryID;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_Inventory_Delete_Fuzzy AFTER DELETE ON Inventory
+        BEGIN
+            DELETE FROM InventoryFuzzy WHERE rowid = old.InventoryID;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ProductPackage_Insert_Fuzzy AFTER INSERT ON ProductPackage
+        BEGIN
+            UPDATE InventoryFuzzy SET CompactPackages = {compactPackages.format("new")} WHERE rowid = new.InventoryID;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ProductPackage_Update_Fuzzy AFTER UPDATE ON ProductPackage
+        BEGIN
+            UPDATE InventoryFuzzy SET CompactPackages = {compactPackages.format("old")} WHERE rowid = old.InventoryID;
+            UPDATE InventoryFuzzy SET CompactPackages = {compactPackages.format("new")} WHERE rowid = new.InventoryID;
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ProductPackage_Delete_Fuzzy AFTER DELETE ON ProductPackage
+        BEGIN
+            UPDATE InventoryFuzzy SET CompactPackages = {compactPackages.format("old")} WHERE rowid = old.InventoryID;
+        END;
+        """,
+    ]
+    for statement in triggers:
+        cursor.execute(statement)
+
+    # Index the items that already exist
+    cursor.execute("DELETE FROM InventoryFuzzy")
+    cursor.execute(f"""
+        INSERT INTO InventoryFuzzy (rowid, CompactName, CompactPackages)
+        SELECT i.InventoryID, {compactSQL("i.ItemName")},
+               (SELECT group_concat({compactSQL("p.PackageName")}, ' ') FROM ProductPackage p WHERE p.InventoryID = i.InventoryID)
+        FROM Inventory i
+    """)
+
+def addCatalogFacets(cursor):
+    """
+    Migration 6: indexes and precomputed counts for the customer catalog's facet filters.
+
+    CatalogFacetCounts counts the active items per category, retail price and in-stock
+    flag, and CatalogPackageFacetCounts does the same per package name. Triggers keep
+    both up to date, so browsing without a keyword can count every facet from a few
+    small rows. Prices are kept exact so the price buckets can change without a migration.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    indexes = [
+        # Covers the match set of a keyword search: category, price and stock per item
+        "CREATE INDEX IF NOT EXISTS idx_Inventory_Facets ON Inventory(Discontinued, CategoryID, RetailPrice, Quantity)",
+        # Package filter and package counts
+        "CREATE INDEX IF NOT EXISTS idx_ProductPackage_InventoryID_PackageName ON ProductPackage(InventoryID, PackageName)",
+    ]
+    for statement in indexes:
+        cursor.execute(statement)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS CatalogFacetCounts (
+            CategoryID INTEGER NOT NULL,
+            RetailPrice REAL NOT NULL,
+            InStock INTEGER NOT NULL,
+            ItemCount INTEGER NOT NULL,
+            PRIMARY KEY (CategoryID, RetailPrice, InStock)
+        ) WITHOUT ROWID;
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS CatalogPackageFacetCounts (
+            CategoryID INTEGER NOT NULL,
+            RetailPrice REAL NOT NULL,
+            InStock INTEGER NOT NULL,
+            PackageName TEXT NOT NULL,
+            ItemCount INTEGER NOT NULL,
+            PRIMARY KEY (CategoryID, RetailPrice, InStock, PackageName)
+        ) WITHOUT ROWID;
+    """)
+
+    def adjustItem(row, change):
+        # Adds change to the item's count and drops rows that reach zero
+        return f"""
+            INSERT INTO CatalogFacetCounts (CategoryID, RetailPrice, InStock, ItemCount)
+            SELECT {row}.CategoryID, {row}.RetailPrice, {row}.Quantity > 0, {change} WHERE {row}.Discontinued = 0
+            ON CONFLICT (CategoryID, RetailPrice, InStock) DO UPDATE SET ItemCount = ItemCount + excluded.ItemCount;
+            DELETE FROM CatalogFacetCounts
+            WHERE CategoryID = {row}.CategoryID AND RetailPrice = {row}.RetailPrice
+              AND InStock = ({row}.Quantity > 0) AND ItemCount <= 0;
+        """
+
+    def adjustPackages(row, change):
+        # Adds change to the count of every package the item has
+        return f"""
+            INSERT INTO CatalogPackageFacetCounts (CategoryID, RetailPrice, InStock, PackageName, ItemCount)
+            SELECT {row}.CategoryID, {row}.RetailPrice, {row}.Quantity > 0, p.PackageName, {change}
+            FROM ProductPackage p WHERE p.InventoryID = {row}.InventoryID AND {row}.Discontinued = 0
+            ON CONFLICT (CategoryID, RetailPrice, InStock, PackageName) DO UPDATE SET ItemCount = ItemCount + excluded.ItemCount;
+            DELETE FROM CatalogPackageFacetCounts
+            WHERE CategoryID = {row}.CategoryID AND RetailPrice = {row}.RetailPrice
+              AND InStock = ({row}.Quantity > 0) AND ItemCount <= 0;
+        """
+
+    def adjustPackage(row, change):
+        # Adds change to the count of one package row's item
+        return f"""
+            INSERT INTO CatalogPackageFacetCounts (CategoryID, RetailPrice, InStock, PackageName, ItemCount)
+            SELECT i.CategoryID, i.RetailPrice, i.Quantity > 0, {row}.PackageName, {change}
+            FROM Inventory i WHERE i.InventoryID = {row}.InventoryID AND i.Discontinued = 0
+            ON CONFLICT (CategoryID, RetailPrice, InStock, PackageName) DO UPDATE SET ItemCount = ItemCount + excluded.ItemCount;
+            DELETE FROM CatalogPackageFacetCounts
+            WHERE PackageName = {row}.PackageName AND ItemCount <= 0;
+        """
+
+    triggers = [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_Inventory_Insert_Facets AFTER INSERT ON Inventory
+        BEGIN
+            {adjustItem("new", 1)}
+            {adjustPackages("new", 1)}
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_Inventory_Update_Facets
+        AFTER UPDATE OF CategoryID, RetailPrice, Quantity, Discontinued ON Inventory
+        WHEN old.CategoryID IS NOT new.CategoryID OR old.RetailPrice IS NOT new.RetailPrice
+          OR (old.Quantity > 0) IS NOT (new.Quantity > 0) OR old.Discontinued IS NOT new.Discontinued
+        BEGIN
+            {adjustItem("old", -1)}
+            {adjustItem("new", 1)}
+            {adjustPackages("old", -1)}
+            {adjustPackages("new", 1)}
+        END;
+        """,
+        # Runs before the cascaded package deletes, which then no longer find the item,
+        # so its packages are only subtracted once
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_Inventory_Delete_Facets BEFORE DELETE ON Inventory
+        BEGIN
+            {adjustItem("old", -1)}
+            {adjustPackages("old", -1)}
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ProductPackage_Insert_Facets AFTER INSERT ON ProductPackage
+        BEGIN
+            {adjustPackage("new", 1)}
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ProductPackage_Update_Facets
+        AFTER UPDATE OF InventoryID, PackageName ON ProductPackage
+        BEGIN
+            {adjustPackage("old", -1)}
+            {adjustPackage("new", 1)}
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ProductPackage_Delete_Facets AFTER DELETE ON ProductPackage
+        BEGIN
+            {adjustPackage("old", -1)}
+        END;
+        """,
+    ]
+    for statement in triggers:
+        cursor.execute(statement)
+
+    # Count the items that already exist
+    cursor.execute("DELETE FROM CatalogFacetCounts")
+    cursor.execute("DELETE FROM CatalogPackageFacetCounts")
+    cursor.execute("""
+        INSERT INTO CatalogFacetCounts (CategoryID, RetailPrice, InStock, ItemCount)
+        SELECT CategoryID, RetailPrice, Quantity > 0, COUNT(*)
+        FROM Inventory WHERE Discontinued = 0
+        GROUP BY 1, 2, 3
+    """)
+    cursor.execute("""
+        INSERT INTO CatalogPackageFacetCounts (CategoryID, RetailPrice, InStock, PackageName, ItemCount)
+        SELECT i.CategoryID, i.RetailPrice, i.Quantity > 0, p.PackageName, COUNT(*)
+        FROM Inventory i JOIN ProductPackage p ON p.InventoryID = i.InventoryID
+        WHERE i.Discontinued = 0
+        GROUP BY 1, 2, 3, 4
+    """)
+
+def addStockHolds(cursor):
+    """
+    Migration 7: time-limited stock holds for items sitting in a cart.
+
+    A hold reserves units of an item for one cart (HolderKey) until ExpiresAt (Unix
+    time). Units held by other carts are not available to sell, and expired holds are
+    ignored until the reaper deletes them.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS StockHold (
+            HolderKey TEXT NOT NULL,
+            InventoryID INTEGER NOT NULL,
+            Quantity INTEGER NOT NULL CHECK (Quantity > 0),
+            ExpiresAt REAL NOT NULL,
+            PRIMARY KEY (HolderKey, InventoryID),
+            FOREIGN KEY (InventoryID) REFERENCES Inventory(InventoryID) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+    """)
+    # Units held per item, and the reaper's scan for expired holds
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_StockHold_InventoryID ON StockHold(InventoryID, ExpiresAt, Quantity)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_StockHold_ExpiresAt ON StockHold(ExpiresAt)")
+
+def addCartItems(cursor):
+    """
+    Migration 8: saved shopping carts, one row per cart line of a logged-in person.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS CartItem (
+            PersonID INTEGER NOT NULL,
+            InventoryID INTEGER NOT NULL,
+            PackageName TEXT NOT NULL,
+            Quantity INTEGER NOT NULL CHECK (Quantity > 0),
+            AddedAt REAL NOT NULL,
+            PRIMARY KEY (PersonID, InventoryID, PackageName),
+            FOREIGN KEY (PersonID) REFERENCES Person(PersonID) ON DELETE CASCADE,
+            FOREIGN KEY (InventoryID) REFERENCES Inventory(InventoryID) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+    """)
+    # Cascaded deletes of discontinued items
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_CartItem_InventoryID ON CartItem(InventoryID)")
+
+def addOrderLinePricing(cursor):
+    """
+    Migration 9: records on each OrderDetails row what was charged for it, so a receipt
+    or sales report never has to re-derive an order from the live Inventory table.
+
+    Orders placed before this migration are backfilled from the current item names and
+    prices, with their discount and tax split across lines as checkout now does. Their
+    packages were never recorded and stay NULL.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    cursor.execute("PRAGMA table_info(OrderDetails)")
+    existing = {row[1] for row in cursor.fetchall()}
+    columns = [
+        ("ItemName", "TEXT"),
+        ("PackageName", "TEXT"),
+        ("UnitPrice", "REAL"),
+        ("DiscountAmount", "REAL NOT NULL DEFAULT 0"),
+        ("TaxAmount", "REAL NOT NULL DEFAULT 0"),
+    ]
+    for name, definition in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE OrderDetails ADD COLUMN {name} {definition}")
+
+    cursor.execute("""
+        SELECT od.OrderDetailsID, od.OrderID, od.InventoryID, od.Quantity, i.ItemName, i.RetailPrice,
+               d.DiscountLevel, d.DiscountType, d.DiscountPercentage, d.DiscountDollarAmount, d.InventoryID
+        FROM OrderDetails od
+        JOIN Orders o ON o.OrderID = od.OrderID
+        JOIN Inventory i ON i.InventoryID = od.InventoryID
+        LEFT JOIN Discounts d ON d.DiscountID = o.DiscountID
+        WHERE od.UnitPrice IS NULL
+        ORDER BY od.OrderID, od.OrderDetailsID
+    """)
+    orders = {}
+    for row in cursor.fetchall():
+        discount = None
+        if row[6] is not None:
+            discount = {"DiscountLevel": row[6], "DiscountType": row[7], "DiscountPercentage": row[8],
+                        "DiscountDollarAmount": row[9], "InventoryID": row[10]}
+        order = orders.setdefault(row[1], {"discount": discount, "lines": []})
+        order["lines"].append({"OrderDetailsID": row[0], "InventoryID": row[2], "quantity": row[3],
+                               "name": row[4], "price": row[5]})
+
+    updates = []
+    for order in orders.values():
+        amounts = Pricing.priceOrderLines(order["lines"], order["discount"])
+        for line, (discountAmt, taxAmt) in zip(order["lines"], amounts):
+            updates.append((line["name"], line["price"], discountAmt, taxAmt, line["OrderDetailsID"]))
+    cursor.executemany("""
+        UPDATE OrderDetails
+        SET ItemName = ?, UnitPrice = ?, DiscountAmount = ?, TaxAmount = ?
+        WHERE OrderDetailsID = ?
+    """, updates)
+
+def fillSalesRollup(cursor):
+    """
+    Recomputes DailySales and DailyItemSales from Orders and OrderDetails. Used by
+    migrations 10 and 11 and by DBLibrary.rebuildSalesRollup. Orders whose date cannot
+    be read are left out.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside a transaction.
+    """
+    cursor.execute("DELETE FROM DailySales")
+    cursor.execute("DELETE FROM DailyItemSales")
+    cursor.execute("""
+        INSERT INTO DailySales (SaleDate, OrderCount, UnitsSold, GrossSales, Discount, Tax)
+        SELECT date(o.OrderDate), COUNT(DISTINCT o.OrderID), COALESCE(SUM(od.Quantity), 0),
+               COALESCE(SUM(od.UnitPrice * od.Quantity), 0), COALESCE(SUM(od.DiscountAmount), 0),
+               COALESCE(SUM(od.TaxAmount), 0)
+        FROM Orders o
+        LEFT JOIN OrderDetails od ON od.OrderID = o.OrderID
+        WHERE date(o.OrderDate) IS NOT NULL
+        GROUP BY date(o.OrderDate)
+    """)
+    cursor.execute("""
+        INSERT INTO DailyItemSales (SaleDate, InventoryID, ItemName, CategoryID, UnitsSold, GrossSales, Discount, Tax)
+        SELECT date(o.OrderDate), od.InventoryID, MAX(od.ItemName), i.CategoryID, SUM(od.Quantity),
+               SUM(od.UnitPrice * od.Quantity), SUM(od.DiscountAmount), SUM(od.TaxAmount)
+        FROM OrderDetails od
+        JOIN Orders o ON o.OrderID = od.OrderID
+        LEFT JOIN Inventory i ON i.InventoryID = od.InventoryID
+        WHERE date(o.OrderDate) IS NOT NULL
+        GROUP BY date(o.OrderDate), od.InventoryID
+    """)
+
+def addSalesRollup(cursor):
+    """
+    Migration 10: daily sales totals, overall and per item, for the sales reports.
+
+    Triggers on Orders and OrderDetails add each sale to its day as it is committed,
+    so a report reads one row per day (and per item sold that day) whatever the size
+    of the order history. Orders are only ever inserted by the application; after
+    editing orders by hand, run DBLibrary.rebuildSalesRollup.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS DailySales (
+            SaleDate TEXT PRIMARY KEY,
+            OrderCount INTEGER NOT NULL,
+            UnitsSold INTEGER NOT NULL,
+            GrossSales REAL NOT NULL,
+            Discount REAL NOT NULL,
+            Tax REAL NOT NULL
+        ) WITHOUT ROWID;
+    """)
+    # CategoryID is the item's category when it sold; category totals group by it
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS DailyItemSales (
+            SaleDate TEXT NOT NULL,
+            InventoryID INTEGER NOT NULL,
+            ItemName TEXT,
+            CategoryID INTEGER,
+            UnitsSold INTEGER NOT NULL,
+            GrossSales REAL NOT NULL,
+            Discount REAL NOT NULL,
+            Tax REAL NOT NULL,
+            PRIMARY KEY (SaleDate, InventoryID)
+        ) WITHOUT ROWID;
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_Orders_Insert_DailySales
+        AFTER INSERT ON Orders
+        BEGIN
+            INSERT INTO DailySales (SaleDate, OrderCount, UnitsSold, GrossSales, Discount, Tax)
+            VALUES (date(NEW.OrderDate), 1, 0, 0, 0, 0)
+            ON CONFLICT (SaleDate) DO UPDATE SET OrderCount = OrderCount + 1;
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_Orders_Delete_DailySales
+        BEFORE DELETE ON Orders
+        BEGIN
+            UPDATE DailySales SET OrderCount = OrderCount - 1 WHERE SaleDate = date(OLD.OrderDate);
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_OrderDetails_Insert_DailySales
+        AFTER INSERT ON OrderDetails
+        BEGIN
+            INSERT INTO DailySales (SaleDate, OrderCount, UnitsSold, GrossSales, Discount, Tax)
+            SELECT date(o.OrderDate), 0, NEW.Quantity, NEW.UnitPrice * NEW.Quantity, NEW.DiscountAmount, NEW.TaxAmount
+            FROM Orders o
+            WHERE o.OrderID = NEW.OrderID
+            ON CONFLICT (SaleDate) DO UPDATE SET
+                UnitsSold = UnitsSold + excluded.UnitsSold,
+                GrossSales = GrossSales + excluded.GrossSales,
+                Discount = Discount + excluded.Discount,
+                Tax = Tax + excluded.Tax;
+
+            INSERT INTO DailyItemSales (SaleDate, InventoryID, ItemName, CategoryID, UnitsSold, GrossSales, Discount, Tax)
+            SELECT date(o.OrderDate), NEW.InventoryID, NEW.ItemName,
+                   (SELECT CategoryID FROM Inventory WHERE InventoryID = NEW.InventoryID),
+                   NEW.Quantity, NEW.UnitPrice * NEW.Quantity, NEW.DiscountAmount, NEW.TaxAmount
+            FROM Orders o
+            WHERE o.OrderID = NEW.OrderID
+            ON CONFLICT (SaleDate, InventoryID) DO UPDATE SET
+                ItemName = excluded.ItemName,
+                UnitsSold = UnitsSold + excluded.UnitsSold,
+                GrossSales = GrossSales + excluded.GrossSales,
+                Discount = Discount + excluded.Discount,
+                Tax = Tax + excluded.Tax;
+        END;
+    """)
+    # BEFORE so the order's date can still be read if the order goes first
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_OrderDetails_Delete_DailySales
+        BEFORE DELETE ON OrderDetails
+        BEGIN
+            UPDATE DailySales
+            SET UnitsSold = UnitsSold - OLD.Quantity,
+                GrossSales = GrossSales - OLD.UnitPrice * OLD.Quantity,
+                Discount = Discount - OLD.DiscountAmount,
+                Tax = Tax - OLD.TaxAmount
+            WHERE SaleDate = (SELECT date(OrderDate) FROM Orders WHERE OrderID = OLD.OrderID);
+
+            UPDATE DailyItemSales
+            SET UnitsSold = UnitsSold - OLD.Quantity,
+                GrossSales = GrossSales - OLD.UnitPrice * OLD.Quantity,
+                Discount = Discount - OLD.DiscountAmount,
+                Tax = Tax - OLD.TaxAmount
+            WHERE SaleDate = (SELECT date(OrderDate) FROM Orders WHERE OrderID = OLD.OrderID)
+              AND InventoryID = OLD.InventoryID;
+        END;
+    """)
+
+    fillSalesRollup(cursor)
+
+# Formats an OrderDate may have been written in before it was normalized
+LEGACY_DATE_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f",
+                       "%m/%d/%Y", "%m/%d/%Y %H:%M:%S", "%m-%d-%Y"]
+
+def normalizeOrderDates(cursor):
+    """
+    Migration 11: stores every OrderDate as 'YYYY-MM-DD' text and keeps it that way,
+    so date-range filters compare the column directly and seek idx_Orders_OrderDate
+    instead of applying date() to every order.
+
+    Dates that cannot be read in any known format are reported and left as they are.
+    The sales rollup is rebuilt afterwards, as it groups orders by day.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    cursor.execute("SELECT OrderID, OrderDate FROM Orders WHERE OrderDate IS NOT date(OrderDate) OR typeof(OrderDate) != 'text'")
+    updates = []
+    for orderID, orderDate in cursor.fetchall():
+        for dateFormat in LEGACY_DATE_FORMATS:
+            try:
+                updates.append((datetime.strptime(str(orderDate).strip(), dateFormat).date().isoformat(), orderID))
+                break
+            except ValueError:
+                continue
+        else:
+            print(f"Order {orderID} has an unreadable OrderDate {orderDate!r}; left unchanged")
+    cursor.executemany("UPDATE Orders SET OrderDate = ? WHERE OrderID = ?", updates)
+
+    for event in ("INSERT", "UPDATE OF OrderDate"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_Orders_{event.split()[0].title()}_OrderDateFormat
+            BEFORE {event} ON Orders
+            WHEN NEW.OrderDate IS NOT date(NEW.OrderDate) OR typeof(NEW.OrderDate) != 'text'
+            BEGIN
+                SELECT RAISE(ABORT, 'OrderDate must be YYYY-MM-DD text');
+            END;
+        """)
+
+    if updates:
+        fillSalesRollup(cursor)
+
+def addOrderLineCost(cursor):
+    """
+    Migration 12: records each order line's unit cost at checkout, so margins in the
+    sales analytics are not affected by later cost changes. Existing lines are
+    backfilled from the items' current cost.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction.
+    """
+    cursor.execute("PRAGMA table_info(OrderDetails)")
+    if "UnitCost" not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE OrderDetails ADD COLUMN UnitCost REAL")
+    cursor.execute("""
+        UPDATE OrderDetails
+        SET UnitCost = (SELECT Cost FROM Inventory WHERE Inventory.InventoryID = OrderDetails.InventoryID)
+        WHERE UnitCost IS NULL
+    """)
+
+# (version, description, function) in the order they must be applied
+MIGRATIONS = [
+    (1, "Secondary indexes for hot query paths", addSecondaryIndexes),
+    (2, "Move product images into InventoryImage", moveImagesToImageStore),
+    (3, "Catalog change counter", addCatalogVersion),
+    (4, "Full-text catalog search index", addInventorySearch),
+    (5, "Trigram index for fuzzy search", addFuzzySearch),
+    (6, "Catalog facet indexes and counts", addCatalogFacets),
+    (7, "Stock holds for cart reservations", addStockHolds),
+    (8, "Saved shopping carts", addCartItems),
+    (9, "Price, package, discount and tax on order lines", addOrderLinePricing),
+    (10, "Daily sales rollup", addSalesRollup),
+    (11, "Normalize order dates", normalizeOrderDates),
+    (12, "Unit cost on order lines", addOrderLineCost),
+]
+
+def getSchemaVersion(conn):
+    """
+    Returns the number of the last migration applied to the database.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the database.
+
+    Returns:
+        int: The PRAGMA user_version value (0 for a database that predates migrations).
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def backupDatabase(conn, dbPath, version):
+    """
+    Writes a consistent copy of the database next to the original before it is migrated.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the database being migrated.
+        dbPath (str): Path of the database file.
+        version (int): The schema version being backed up, used in the backup file name.
+
+    Returns:
+        str: Path of the backup file.
+    """
+    backupPath = f"{dbPath}.v{version}.bak"
+    backupConn = sqlite3.connect(backupPath)
+    try:
+        conn.backup(backupConn)
+    finally:
+        backupConn.close()
+    return backupPath
+
+def migrateDatabase(conn, dbPath, backup=True):
+    """
+    Applies every pending migration in order, each in its own transaction.
+
+    A migration that fails is rolled back together with its version bump and the
+    error is re-raised, leaving the database at the last successful version.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the database.
+        dbPath (str): Path of the database file, used for the backup copy.
+        backup (bool): Whether to back up the database before the first pending migration.
+            Skipped for a database that was just created.
+
+    Returns:
+        int: The schema version after migrating.
+    """
+    currentVersion = getSchemaVersion(conn)
+    pending = [migration for migration in MIGRATIONS if migration[0] > currentVersion]
+    if not pending:
+        return currentVersion
+
+    if backup:
+        start = time.perf_counter()
+        backupPath = backupDatabase(conn, dbPath, currentVersion)
+        print(f"Backed up database to {backupPath} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Manage transactions explicitly so DDL and the version bump commit together
+    previousIsolation = conn.isolation_level
+    conn.isolation_level = None
+    cursor = conn.cursor()
+    try:
+        for version, description, migration in pending:
+            start = time.perf_counter()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {version}")
+                cursor.execute("COMMIT")
+            except Exception as e:
+                cursor.execute("ROLLBACK")
+                print(f"Migration {version} ({description}) failed: {e}")
+                raise
+            currentVersion = version
+            print(f"Applied migration {version} ({description}) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    finally:
+        cursor.close()
+        conn.isolation_level = previousIsolation
+
+    return currentVersion
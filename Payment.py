@@ -3,6 +3,8 @@ from tkinter import ttk, messagebox
 import datetime
 import Helper as h
 import Customer
+import Catalog
+import Receipts
 import Cart
 import Help
 
@@ -24,7 +26,7 @@ def paymentPage(window, cart, discount, personID, pageNumber, managerID=None):
     def submit():
         """
         Validates user input for payment fields, processes the order if valid,
-        and generates a receipt. Handles both input errors and backend failures.
+        and queues its receipt. Handles both input errors and backend failures.
         """
         card = cardVar.get().strip()
         exp = expVar.get().strip()
@@ -61,16 +63,23 @@ def paymentPage(window, cart, discount, personID, pageNumber, managerID=None):
             messagebox.showerror("Invalid Expiration", "Use format MM/YYYY or MM/YY.")
             return
 
+        # Prices or stock may have changed while the customer was paying
+        changes = h.revalidateCart()
+        if changes:
+            messagebox.showwarning("Cart Updated", "\n".join(changes) + "\n\nPlease review your cart.")
+            back()
+            return
+
         try:
             orderID = h.processOrder(cart, discount, personID, card, exp, ccv, managerID)
-            h.generateReceipt(cart, discount, orderID)
         except Exception as e:
             messagebox.showerror("Order Failed", str(e))
             return
-        h.cart.clear()
-        messagebox.showinfo("Purchase Complete", "Transaction completed and receipt has been generated.")
-        h.clearInventoryCache()
-        h.cart.clear()
+        # The receipt is written and opened in the background
+        Receipts.queueReceipt(orderID)
+        messagebox.showinfo("Purchase Complete", "Transaction completed. Your receipt will open in your browser.")
+        Catalog.clearCache()
+        h.clearCart()
         returnCustomer()
 
     def back():
@@ -0,0 +1,84 @@
+# Discount and tax arithmetic shared by the cart page, order commit, receipts and the
+# order backfill migration. Kept free of database and Tk imports so any of them can use it.
+
+TAX_RATE = 0.0825
+
+def getDiscountAmount(cart, discount):
+    """
+    Works out the total discount for a cart.
+
+    Args:
+        cart (list): Line dictionaries with InventoryID, price and quantity.
+        discount (dict or None): The discount applied, with DiscountLevel (0 cart, 1 item),
+            DiscountType (0 percentage, 1 dollar amount), DiscountPercentage,
+            DiscountDollarAmount and InventoryID.
+
+    Returns:
+        float: The discount amount.
+    """
+    if not discount:
+        return 0
+
+    # Cart level
+    if discount['DiscountLevel'] == 0:
+        if discount['DiscountType'] == 0:
+            return sum(item['price'] * item['quantity'] for item in cart) * discount['DiscountPercentage']
+        return discount['DiscountDollarAmount']
+
+    # Item level
+    discountAmt = 0
+    for item in cart:
+        if item['InventoryID'] == discount['InventoryID']:
+            if discount['DiscountType'] == 0:
+                discountAmt += item['price'] * item['quantity'] * discount['DiscountPercentage']
+            else:
+                discountAmt += discount['DiscountDollarAmount'] * item['quantity']
+    return discountAmt
+
+def describeDiscount(discount, discountAmt):
+    """
+    Returns the short description of a discount shown on receipts.
+
+    Args:
+        discount (dict): The discount applied.
+        discountAmt (float): The amount it took off.
+
+    Returns:
+        str: e.g. "10%", "$500.00" or "F150SAVE - $1000.00".
+    """
+    if discount['DiscountLevel'] == 0:
+        if discount['DiscountType'] == 0:
+            return f"{int(discount['DiscountPercentage'] * 100)}%"
+        return f"${discountAmt:.2f}"
+    return f"{discount['DiscountCode']} - ${discountAmt:.2f}"
+
+def priceOrderLines(cart, discount):
+    """
+    Splits an order's discount and tax across its lines, in cents, as they are stored
+    with each OrderDetails row.
+
+    Item discounts go to the lines of that item. A cart percentage applies to every
+    line and a cart dollar amount is shared in proportion to line totals, with any
+    rounding left over going to the last line so the lines add up to the discount.
+
+    Args:
+        cart (list): Line dictionaries with InventoryID, price and quantity.
+        discount (dict or None): The discount applied.
+
+    Returns:
+        list: (discount amount, tax amount) for each line, in cart order.
+    """
+    lineTotals = [item['price'] * item['quantity'] for item in cart]
+    discounts = [0.0] * len(cart)
+
+    if discount and discount['DiscountLevel'] == 1:
+        for index, item in enumerate(cart):
+            discounts[index] = round(getDiscountAmount([item], discount), 2)
+    elif discount and cart:
+        totalDiscount = round(min(getDiscountAmount(cart, discount), sum(lineTotals)), 2)
+        subtotal = sum(lineTotals)
+        for index in range(len(cart) - 1):
+            discounts[index] = round(totalDiscount * lineTotals[index] / subtotal, 2) if subtotal else 0.0
+        discounts[-1] = round(totalDiscount - sum(discounts[:-1]), 2)
+
+    return [(discounts[index], round((lineTotals[index] - discounts[index]) * TAX_RATE, 2)) for index in range(len(cart))]
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 import Helper as h
+import ImageLoader
 import Customer
 import Help
 import DBLibrary as db
@@ -51,7 +52,9 @@ def productPage(window, item, personID, pageNumber, isFavorite, managerID=None):
             "price": item["RetailPrice"],
             "quantity": 1
         }
-        h.addToCart(itemToAdd)
+        if not h.addToCart(itemToAdd):
+            messagebox.showerror("Out of Stock", f"No more '{item['ItemName']}' are available right now.")
+            return
         messagebox.showinfo("Cart", f"Added '{item['ItemName']}' with '{selectedPackage}' package to cart.")
         h.clearScreen(window)
         Customer.customerPage(window, personID, pageNumber, managerID)
@@ -72,9 +75,8 @@ def productPage(window, item, personID, pageNumber, isFavorite, managerID=None):
     title.pack(pady=10)
 
     # Product Image
-    image = h.convertToTkImage(item['ItemImage'], item['InventoryID'], size=(300, 200))
-    imgLabel = tk.Label(window, image=image, bg="#ffffff")
-    imgLabel.image = image
+    imgLabel = tk.Label(window, bg="#ffffff")
+    ImageLoader.loadImage(imgLabel, item['InventoryID'], item['ImageHash'], size=(300, 200))
     imgLabel.pack(pady=10)
 
     # Package dropdown
@@ -104,9 +106,11 @@ def productPage(window, item, personID, pageNumber, isFavorite, managerID=None):
     priceLabel.pack(anchor="w")
     priceInfoLabel = ttk.Label(infoFrame, text=f"${item['RetailPrice']:.2f}", background="#7393B3", font=("Calibri", 12))
     priceInfoLabel.pack(anchor="w")
+    # Stock not already in this cart or held by another
+    available = max(db.getAvailableQuantity(item["InventoryID"], h.cartHoldKey) - h.cartQuantity(item["InventoryID"]), 0)
     quantityLabel = ttk.Label(infoFrame, text="Quantity Available: ", background="#7393B3", font=("Calibri", 12, "bold"))
     quantityLabel.pack(anchor="w")
-    quantityInfoLabel = ttk.Label(infoFrame, text=f"{item['Quantity']}", background="#7393B3", font=("Calibri", 12))
+    quantityInfoLabel = ttk.Label(infoFrame, text=f"{available}", background="#7393B3", font=("Calibri", 12))
     quantityInfoLabel.pack(anchor="w")
 
     # Bottom buttons
@@ -4,6 +4,7 @@ import Helper as h
 import DBLibrary as db
 import Manager
 import Help
+import LiveSearch
 
 def promoCodesPage(window, personID):
     """
@@ -119,16 +120,24 @@ def promoCodesPage(window, personID):
             selectedInventoryID.set(0)
             selectedItemName.set("None")
 
-    def searchItems():
+    def showItems(results):
         """
-        Searches inventory items based on the entered keyword and populates the itemTree with results.
+        Populates the itemTree with search results.
         """
-        keyword = searchVar.get().strip()
-        results = db.searchInventoryManager(keyword)
         itemTree.delete(*itemTree.get_children())
         for item in results:
             itemTree.insert("", "end", iid=item['InventoryID'], values=(item['ItemName'], f"${item['RetailPrice']:.2f}"))
 
+    # Search inventory as the user types
+    liveSearch = LiveSearch.bindLiveSearch(searchEntry, lambda: searchVar.get().strip(),
+                                           db.searchInventoryManager, showItems, initialQuery="")
+
+    def searchItems():
+        """
+        Searches inventory items based on the entered keyword straight away.
+        """
+        liveSearch(delay=0, force=True)
+
     def selectItem():
         """
         Sets the selected inventory item from the search results into the selectedInventoryID and
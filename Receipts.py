@@ -0,0 +1,211 @@
+import html
+import datetime
+import webbrowser
+from pathlib import Path
+from string import Template
+from concurrent.futures import ThreadPoolExecutor
+import DBLibrary as db
+import Pricing
+
+# HTML receipts are rendered and written on a background thread, so checkout finishes
+# as soon as the order has been committed. Every receipt, new or reprinted, is rebuilt
+# from what the order recorded at checkout (see DBLibrary.getOrderReceipt). The page
+# templates are compiled once at import and each receipt is written with a single write.
+
+RECEIPT_FOLDER = Path.home() / "Documents" / "Cars2U"
+REPRINT_FOLDER = RECEIPT_FOLDER / "Reprints"
+
+# One worker keeps receipts in order and off the Tk thread
+receiptExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Receipts")
+
+RECEIPT_PAGE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>Cars2U Receipt</title>
+<style>
+    body {
+        font-family: Arial, sans-serif;
+        max-width: 800px;
+        margin: 30px auto;
+        padding: 20px;
+        background-color: #f9f9f9;
+        border: 1px solid #ccc;
+        border-radius: 10px;
+    }
+    h2 {
+        text-align: center;
+        color: #333;
+    }
+    table {
+        width: 100%;
+        border-collapse: collapse;
+        margin-bottom: 20px;
+    }
+    th, td {
+        border: 1px solid #ddd;
+        padding: 10px;
+        text-align: center;
+    }
+    th {
+        background-color: #e0e0e0;
+    }
+    p {
+        font-size: 16px;
+    }
+    .total {
+        font-weight: bold;
+    }
+</style>
+</head>
+<body>
+<h2>Cars2U Purchase Receipt</h2>
+<p><strong>Order:</strong> $orderID &nbsp; <strong>Date:</strong> $orderDate</p>
+<p><strong>Processed By:</strong> $managerName</p>
+<table>
+    <tr>
+        <th>Product Name</th>
+        <th>Package</th>
+        <th>Item Price</th>
+        <th>Quantity</th>
+        <th>Line Total</th>
+    </tr>
+$rows
+</table>
+<p><strong>Subtotal:</strong> $$$subtotal</p>
+$discountLines
+<p><strong>Tax ($taxRate%):</strong> $$$tax</p>
+<p class="total"><strong>Total:</strong> $$$total</p>
+<p style="text-align: center;">Thank you for shopping with Cars2U!</p>
+</body>
+</html>
+""")
+
+ITEM_ROW = Template("    <tr><td>$name</td><td>$package</td><td>$$$price</td><td>$quantity</td><td>$$$lineTotal</td></tr>")
+
+DISCOUNT_LINES = Template("""<p><strong>Discount:</strong> $discountText ($$$discountAmount)</p>
+<p><strong>New Subtotal:</strong> $$$newSubtotal</p>""")
+
+def renderReceipt(order):
+    """
+    Renders a receipt page from the precompiled templates.
+
+    Args:
+        order (dict): The order, as returned by DBLibrary.getOrderReceipt.
+
+    Returns:
+        str: The receipt's HTML.
+    """
+    lines = order['lines']
+    subtotal = sum(line['price'] * line['quantity'] for line in lines)
+    discountAmt = sum(line['discountAmount'] for line in lines)
+    tax = sum(line['taxAmount'] for line in lines)
+
+    rows = "\n".join(ITEM_ROW.substitute(name=html.escape(line['name'] or ""),
+                                         package=html.escape(line['package'] or "-"),
+                                         price=f"{line['price']:.2f}",
+                                         quantity=line['quantity'],
+                                         lineTotal=f"{line['price'] * line['quantity']:.2f}") for line in lines)
+    discountLines = ""
+    if order['discount'] or discountAmt:
+        # The discount's own record may have been deleted since; the amount was still charged
+        discountText = Pricing.describeDiscount(order['discount'], discountAmt) if order['discount'] else f"${discountAmt:.2f}"
+        discountLines = DISCOUNT_LINES.substitute(discountText=html.escape(discountText),
+                                                  discountAmount=f"{discountAmt:.2f}",
+                                                  newSubtotal=f"{subtotal - discountAmt:.2f}")
+
+    orderDate = order['OrderDate']
+    if not isinstance(orderDate, str):
+        orderDate = orderDate.strftime("%m/%d/%Y")
+
+    return RECEIPT_PAGE.substitute(orderID=order['OrderID'],
+                                   orderDate=html.escape(orderDate),
+                                   managerName=html.escape(order['ManagerName']),
+                                   rows=rows,
+                                   subtotal=f"{subtotal:.2f}",
+                                   discountLines=discountLines,
+                                   taxRate=f"{Pricing.TAX_RATE * 100:g}",
+                                   tax=f"{tax:.2f}",
+                                   total=f"{subtotal - discountAmt + tax:.2f}")
+
+def writeReceipt(orderID):
+    """
+    Writes an order's receipt and opens it in the default web browser. Runs on the
+    receipt thread.
+
+    Args:
+        orderID (int): The order's ID.
+
+    Returns:
+        Path or None: The receipt file, or None if it could not be written.
+    """
+    try:
+        order = db.getOrderReceipt(orderID)
+        if order is None:
+            return None
+
+        RECEIPT_FOLDER.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = RECEIPT_FOLDER / f"Receipt_Order_{orderID}_{timestamp}.html"
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(renderReceipt(order))
+
+        webbrowser.open(str(filename))
+        return filename
+    except Exception as e:
+        print(f"Error writing receipt for order {orderID}: {e}")
+        return None
+
+def queueReceipt(orderID):
+    """
+    Queues the receipt of an order, new or past, to be written and opened.
+
+    Args:
+        orderID (int): The order's ID.
+
+    Returns:
+        Future: Resolves to the receipt file once it has been written.
+    """
+    return receiptExecutor.submit(writeReceipt, orderID)
+
+def writeReprints(startDate, endDate):
+    """
+    Re-renders the receipts of every order placed between two dates, inclusive. Runs
+    on the receipt thread.
+
+    Args:
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range.
+
+    Returns:
+        tuple: (folder the receipts were written to, number of receipts written).
+    """
+    REPRINT_FOLDER.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for order in db.getReceiptOrders(startDate, endDate):
+        try:
+            with open(REPRINT_FOLDER / f"Receipt_Order_{order['OrderID']}.html", "w", encoding="utf-8") as f:
+                f.write(renderReceipt(order))
+            written += 1
+        except Exception as e:
+            print(f"Error re-rendering receipt for order {order['OrderID']}: {e}")
+    return REPRINT_FOLDER, written
+
+def rerenderReceipts(startDate, endDate):
+    """
+    Queues the re-rendering of every receipt for a date range.
+
+    Args:
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range.
+
+    Returns:
+        Future: Resolves to (folder, number of receipts written).
+    """
+    return receiptExecutor.submit(writeReprints, startDate, endDate)
+
+def shutdown():
+    """
+    Finishes the receipts already queued, so none is lost when the application exits.
+    """
+    receiptExecutor.shutdown(wait=True)
@@ -0,0 +1,212 @@
+import os
+import html
+import threading
+import multiprocessing
+from datetime import date, datetime, timedelta
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import DBLibrary as db
+import Reports
+import Analytics
+
+# Month-end report batches. Every sales report for a range of days (each day, each
+# week starting in the range, each month it touches), the three inventory snapshots
+# and the range's analytics are built in parallel by a pool of worker processes, each
+# reading the database through read-only connections. The reports are written into
+# one bundle folder with an index.html linking them all.
+#
+# A coordinator thread feeds the pool and records progress in the batch's state dict,
+# which the reports page polls from the Tk thread. Workers are started with "spawn" so
+# they never inherit the application's open SQLite connections or Tk state.
+
+BUNDLE_FOLDER = Reports.REPORT_FOLDER / "Batches"
+# Leave a core for the application itself
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+INVENTORY_SOURCES = {
+    "forsale": db.iterInventoryForSale,
+    "restock": db.iterInventoryRestock,
+    "all": db.iterAllInventoryIncludingDiscontinued,
+}
+
+# Runs one batch at a time off the Tk thread
+coordinatorExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ReportBatch")
+batchLock = threading.Lock()
+# The state dict of the batch in progress, if any
+currentBatch = None
+
+def initWorker():
+    """
+    Prepares a worker process: report workers only ever read.
+    """
+    db.useReadOnlyConnections()
+
+def planReports(startDate, endDate):
+    """
+    Lists the reports of a batch, in the order the index shows them.
+
+    Args:
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range (inclusive).
+
+    Returns:
+        list: (section, title, kind, args) per report, for runReport.
+    """
+    reports = []
+    day = startDate
+    while day <= endDate:
+        reports.append(("Daily Sales", f"Daily Sales Report - {day.strftime('%m-%d-%Y')}", "sales", (day, day)))
+        day += timedelta(days=1)
+
+    # Whole weeks and months, as the reports page produces them
+    weekStart = startDate
+    while weekStart <= endDate:
+        reports.append(("Weekly Sales", f"Weekly Sales Report Starting {weekStart.strftime('%m-%d-%Y')}", "sales",
+                        (weekStart, weekStart + timedelta(days=6))))
+        weekStart += timedelta(days=7)
+
+    month = date(startDate.year, startDate.month, 1)
+    while month <= endDate:
+        nextMonth = (month + timedelta(days=31)).replace(day=1)
+        reports.append(("Monthly Sales", f"Monthly Sales Report - {month.month:02d}/{month.year}", "sales",
+                        (month, nextMonth - timedelta(days=1))))
+        month = nextMonth
+
+    reports.append(("Inventory", "Inventory - Items For Sale", "inventory", ("forsale",)))
+    reports.append(("Inventory", "Inventory - Items Needing Restock", "inventory", ("restock",)))
+    reports.append(("Inventory", "Inventory - All Items", "inventory", ("all",)))
+    reports.append(("Analytics", Analytics.reportTitle(startDate, endDate), "analytics", (startDate, endDate)))
+    return reports
+
+def runReport(kind, title, args, folder):
+    """
+    Builds one report of a batch. Runs in a worker process.
+
+    Args:
+        kind (str): "sales", "inventory" or "analytics".
+        title (str): Title of the report.
+        args (tuple): The report's date range, or the inventory selection.
+        folder (Path): The bundle folder.
+
+    Returns:
+        str: The report's file name, or None if it had nothing to show.
+
+    Raises:
+        Exception: If the report could not be built.
+    """
+    if kind == "sales":
+        summary = db.getSalesSummary(*args)
+        if summary is None:
+            raise Exception("Sales totals could not be read.")
+        if not summary["days"]:
+            return None
+        return Reports.writeSalesReport(summary, title, folder).name
+    if kind == "inventory":
+        filename, _ = Reports.writeInventoryReport(INVENTORY_SOURCES[args[0]](), title, folder)
+        return filename.name if filename else None
+    if kind == "analytics":
+        analytics = Analytics.computeAnalytics(*args)
+        return Analytics.writeAnalyticsReport(analytics, title, folder).name if analytics else None
+    raise ValueError(f"Unknown report kind {kind}")
+
+def indexRow(result):
+    """
+    Renders one report's line of the bundle index.
+    """
+    section, title, fileName, error = result
+    if fileName:
+        link = f'<a href="{html.escape(quote(fileName))}">{html.escape(title)}</a>'
+        status = "Ready"
+    else:
+        link = html.escape(title)
+        status = f"Failed: {html.escape(error)}" if error else "Nothing to report"
+    return f"    <tr><td>{link}</td><td>{status}</td></tr>\n"
+
+def writeIndex(state):
+    """
+    Writes the bundle's index.html, one table per section in plan order.
+    """
+    sections = {}
+    for result in state["results"]:
+        sections.setdefault(result[0], []).append(result)
+    title = f"Report Bundle {state['startDate'].strftime('%m-%d-%Y')} to {state['endDate'].strftime('%m-%d-%Y')}"
+    filename, _ = Reports.writeReport(title, [(section, ["Report", "Status"], results, indexRow)
+                                              for section, results in sections.items()],
+                                      state["folder"], "index.html")
+    return filename
+
+def runBatch(state):
+    """
+    Builds every report of a batch on the worker pool and writes the index. Runs on
+    the coordinator thread; progress is recorded in state.
+    """
+    plan = state["plan"]
+    folder = state["folder"]
+    results = [(section, title, None, None) for section, title, _, _ in plan]
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=initWorker) as pool:
+            with batchLock:
+                state["pool"] = pool
+            futures = {pool.submit(runReport, kind, title, args, folder): index
+                       for index, (_, title, kind, args) in enumerate(plan)}
+            for future in as_completed(futures):
+                index = futures[future]
+                section, title, _, _ = plan[index]
+                try:
+                    results[index] = (section, title, future.result(), None)
+                except Exception as e:
+                    print(f"Error building report {title}: {e}")
+                    results[index] = (section, title, None, str(e) or type(e).__name__)
+                with batchLock:
+                    state["done"] += 1
+                    state["failed"] += results[index][3] is not None
+        state["results"] = results
+        state["index"] = writeIndex(state)
+    except Exception as e:
+        print(f"Error running report batch: {e}")
+        state["error"] = str(e)
+    finally:
+        with batchLock:
+            state["pool"] = None
+            state["finished"] = True
+
+def startBatch(startDate, endDate):
+    """
+    Starts building the report bundle of a range of days in the background.
+
+    Args:
+        startDate (datetime.date): First day of the range.
+        endDate (datetime.date): Last day of the range (inclusive).
+
+    Returns:
+        dict: The batch's state, read by the caller to show progress: "total" and
+            "done" report counts, "failed" count, "finished", and once finished the
+            bundle's "index" file (None if the batch failed, with "error" set).
+            None if a batch is already running.
+    """
+    global currentBatch
+
+    plan = planReports(startDate, endDate)
+    folderName = f"{startDate.isoformat()}_to_{endDate.isoformat()}_{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    state = {"plan": plan, "startDate": startDate, "endDate": endDate, "folder": BUNDLE_FOLDER / folderName,
+             "total": len(plan), "done": 0, "failed": 0, "finished": False, "results": [],
+             "index": None, "error": None, "pool": None}
+    with batchLock:
+        if currentBatch is not None and not currentBatch["finished"]:
+            return None
+        currentBatch = state
+    coordinatorExecutor.submit(runBatch, state)
+    return state
+
+def shutdown():
+    """
+    Abandons the batch in progress, if any, so the application can exit without
+    waiting for it.
+    """
+    with batchLock:
+        pool = currentBatch["pool"] if currentBatch is not None else None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+    coordinatorExecutor.shutdown(wait=False, cancel_futures=True)
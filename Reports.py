@@ -0,0 +1,158 @@
+import html
+from pathlib import Path
+from string import Template
+import DBLibrary as db
+
+# HTML sales and inventory reports. Rows are streamed from DBLibrary's fetchmany
+# generators straight into a buffered file, so the page header is on disk before the
+# first query finishes and memory stays bounded however many rows a report has. Rows
+# are rendered with str.format templates, several times faster per row than the
+# string.Template used for the page itself.
+
+REPORT_FOLDER = Path.home() / "Documents" / "Cars2UReports"
+WRITE_BUFFER_BYTES = 64 * 1024
+
+REPORT_HEAD = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>$title</title>
+<style>
+    body { font-family: Arial, sans-serif; margin: 20px; }
+    table { width: 100%; border-collapse: collapse; margin-bottom: 20px; }
+    th, td { border: 1px solid black; padding: 8px; text-align: center; }
+    th { background-color: #f2f2f2; }
+</style>
+</head>
+<body>
+<h2>$title</h2>
+""")
+
+REPORT_FOOT = """</body>
+</html>
+"""
+
+TABLE_START = Template("""$heading<table>
+    <tr>$columns</tr>
+""")
+
+TABLE_END = "</table>\n"
+
+SALES_COLUMNS = ["Units", "Gross", "Discount", "Subtotal", "Tax", "Total"]
+
+SALES_CELLS = "<td>{}</td><td>${:.2f}</td><td>${:.2f}</td><td>${:.2f}</td><td>${:.2f}</td><td>${:.2f}</td></tr>\n".format
+
+INVENTORY_ROW = "    <tr><td>{}</td><td>{}</td><td>${:.2f}</td><td>${:.2f}</td><td>{}</td><td>{}</td><td>{}</td></tr>\n".format
+
+INVENTORY_COLUMNS = ["Inventory ID", "Item Name", "Cost", "Retail Price", "Quantity", "Restock Threshold", "Availability"]
+
+def reportPath(title, folder=REPORT_FOLDER):
+    """
+    Returns the file a report with the given title is written to.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder / f"{title.replace(' ', '_').replace('/', '-')}.html"
+
+def salesRow(labels, unitsSold, grossSales, discount, tax):
+    """
+    Renders one row of a sales table: its label cells followed by the totals.
+    """
+    subtotal = grossSales - discount
+    cells = "".join(f"<td>{html.escape(str(label))}</td>" for label in labels)
+    return "    <tr>" + cells + SALES_CELLS(unitsSold, grossSales, discount, subtotal, tax, subtotal + tax)
+
+def totalsRow(labels, totals):
+    """
+    Renders a sales row from a totals dictionary of DBLibrary.getSalesSummary.
+    """
+    return salesRow(labels, totals["UnitsSold"], totals["GrossSales"], totals["Discount"], totals["Tax"])
+
+def inventoryRow(row):
+    """
+    Renders one row of an inventory table from a DBLibrary.iterInventoryForSale tuple.
+    """
+    inventoryID, name, cost, price, quantity, threshold, discontinued = row
+    return INVENTORY_ROW(inventoryID, html.escape(name or ""), cost, price, quantity, threshold,
+                         "Discontinued" if discontinued else "Available")
+
+def writeReport(title, sections, folder=REPORT_FOLDER, fileName=None):
+    """
+    Streams a report to its file, one table per section.
+
+    Args:
+        title (str): Title of the report, also used for its file name.
+        sections (list): (heading, column names, rows, renderRow) per table. rows may be
+            any iterable, including a DBLibrary generator, and is consumed as it is written.
+        folder (Path): Folder to write the report to.
+        fileName (str, optional): File name to use instead of one made from the title.
+
+    Returns:
+        tuple: (report file, number of rows written across all tables).
+
+    Raises:
+        Exception: If a query or the write fails. The partial file is removed.
+    """
+    filename = folder / fileName if fileName else reportPath(title, folder)
+    written = 0
+    try:
+        with open(filename, "w", encoding="utf-8", buffering=WRITE_BUFFER_BYTES) as f:
+            f.write(REPORT_HEAD.substitute(title=html.escape(title)))
+            for heading, columns, rows, renderRow in sections:
+                f.write(TABLE_START.substitute(heading=f"<h3>{html.escape(heading)}</h3>\n" if heading else "",
+                                               columns="".join(f"<th>{html.escape(column)}</th>" for column in columns)))
+                try:
+                    for row in rows:
+                        f.write(renderRow(row))
+                        written += 1
+                finally:
+                    # Closes a generator's connection even if the write failed
+                    if hasattr(rows, "close"):
+                        rows.close()
+                f.write(TABLE_END)
+            f.write(REPORT_FOOT)
+    except Exception:
+        filename.unlink(missing_ok=True)
+        raise
+    return filename, written
+
+def writeSalesReport(summary, title, folder=REPORT_FOLDER):
+    """
+    Writes a sales report: totals for the period, then by day, by category and by item.
+
+    Args:
+        summary (dict): Sales totals from DBLibrary.getSalesSummary.
+        title (str): Title for the report.
+        folder (Path): Folder to write the report to.
+
+    Returns:
+        Path: The report file.
+    """
+    filename, _ = writeReport(title, [
+        (None, ["Orders"] + SALES_COLUMNS, [summary["total"]],
+         lambda total: totalsRow([total["OrderCount"]], total)),
+        ("By Day", ["Date", "Orders"] + SALES_COLUMNS, summary["days"],
+         lambda day: totalsRow([day["SaleDate"], day["OrderCount"]], day)),
+        ("By Category", ["Category"] + SALES_COLUMNS, summary["categories"],
+         lambda category: totalsRow([category["CategoryName"]], category)),
+        ("By Item", ["Item ID", "Item"] + SALES_COLUMNS, db.iterItemSales(summary["startDate"], summary["endDate"]),
+         lambda item: salesRow(item[:2], *item[2:])),
+    ], folder)
+    return filename
+
+def writeInventoryReport(rows, title, folder=REPORT_FOLDER):
+    """
+    Writes an inventory report.
+
+    Args:
+        rows (iterable): Item tuples from a DBLibrary inventory generator.
+        title (str): Title for the report.
+        folder (Path): Folder to write the report to.
+
+    Returns:
+        tuple: (report file, or None if there were no items, number of items).
+    """
+    filename, written = writeReport(title, [(None, INVENTORY_COLUMNS, rows, inventoryRow)], folder)
+    if not written:
+        filename.unlink(missing_ok=True)
+        return None, 0
+    return filename, written
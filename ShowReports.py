@@ -3,7 +3,11 @@ from tkinter import ttk, messagebox
 import Helper as h
 import DBLibrary as db
 import datetime
+import os
 import Help
+import Receipts
+import Analytics
+import ReportBatch
 
 def showReportsPage(window, personID):
     """
@@ -12,6 +16,9 @@ def showReportsPage(window, personID):
     Provides tabs for generating different types of sales and inventory reports.
     Sales reports can be generated based on a daily, weekly, or monthly date.
     Inventory reports can be filtered by type (for sale, needing restock, or all).
+    The receipts tab re-renders the receipts of every order in a date range, the
+    analytics tab reports margins, category sales, top sellers and trends for one, and
+    the bundle tab builds every report for one in the background.
 
     Args:
         window (tk.Tk or tk.Frame): The application window or container to populate with the report UI.
@@ -31,9 +38,15 @@ def showReportsPage(window, personID):
 
     salesTab = ttk.Frame(notebook)
     inventoryTab = ttk.Frame(notebook)
+    receiptsTab = ttk.Frame(notebook)
+    analyticsTab = ttk.Frame(notebook)
+    bundleTab = ttk.Frame(notebook)
 
     notebook.add(salesTab, text="Sales Reports")
     notebook.add(inventoryTab, text="Inventory Reports")
+    notebook.add(receiptsTab, text="Receipts")
+    notebook.add(analyticsTab, text="Analytics")
+    notebook.add(bundleTab, text="Report Bundle")
 
     salesOptionVar = tk.StringVar(value="daily")
 
@@ -79,6 +92,20 @@ def showReportsPage(window, personID):
 
     ttk.Button(salesTab, text="Generate Sales Report", command=generateSalesReport).pack(pady=10)
 
+    def rebuildSalesTotals():
+        """
+        Recomputes the daily sales totals the reports read from, for use after orders
+        have been changed outside the application.
+        """
+        if not messagebox.askyesno("Rebuild Sales Totals", "Recompute the sales totals from every order?"):
+            return
+        if db.rebuildSalesRollup():
+            messagebox.showinfo("Rebuild Sales Totals", "Sales totals have been rebuilt.")
+        else:
+            messagebox.showerror("Error", "The sales totals could not be rebuilt.")
+
+    ttk.Button(salesTab, text="Rebuild Sales Totals", command=rebuildSalesTotals).pack(pady=5)
+
     inventoryOptionVar = tk.StringVar(value="forsale")
 
     ttk.Label(inventoryTab, text="Select Inventory Report Type:").pack(pady=5)
@@ -109,6 +136,161 @@ def showReportsPage(window, personID):
 
     ttk.Button(inventoryTab, text="Generate Inventory Report", command=generateInventoryReport).pack(pady=10)
 
+    receiptStartVar = tk.StringVar()
+    receiptEndVar = tk.StringVar()
+
+    ttk.Label(receiptsTab, text="Start Date (MM/DD/YYYY)").pack(pady=5)
+    ttk.Entry(receiptsTab, textvariable=receiptStartVar, width=20).pack()
+    ttk.Label(receiptsTab, text="End Date (MM/DD/YYYY)").pack(pady=5)
+    ttk.Entry(receiptsTab, textvariable=receiptEndVar, width=20).pack()
+
+    def waitForReprints(future):
+        """
+        Reports the result of a re-render once the receipt thread has finished it.
+        Runs on the Tk thread via after().
+        """
+        if not future.done():
+            window.after(100, waitForReprints, future)
+            return
+        # The manager may have left the reports page in the meantime
+        if not reprintButton.winfo_exists():
+            return
+        reprintButton.config(state="normal")
+        try:
+            folder, written = future.result()
+        except Exception as e:
+            messagebox.showerror("Receipts", f"Could not re-render receipts: {e}")
+            return
+        if written:
+            messagebox.showinfo("Receipts", f"Re-rendered {written} receipts to {folder}.")
+        else:
+            messagebox.showinfo("No Orders Found", "No orders found for the selected period.")
+
+    def rerenderReceipts():
+        """
+        Re-renders the receipts of every order between the start and end dates in the
+        background.
+        """
+        try:
+            startDate = datetime.datetime.strptime(receiptStartVar.get().strip(), "%m/%d/%Y").date()
+            endDate = datetime.datetime.strptime(receiptEndVar.get().strip(), "%m/%d/%Y").date()
+        except ValueError:
+            messagebox.showerror("Date Error", "Please enter valid dates in MM/DD/YYYY format.")
+            return
+        if endDate < startDate:
+            messagebox.showerror("Date Error", "The end date must not be before the start date.")
+            return
+        reprintButton.config(state="disabled")
+        waitForReprints(Receipts.rerenderReceipts(startDate, endDate))
+
+    reprintButton = ttk.Button(receiptsTab, text="Re-render Receipts", command=rerenderReceipts)
+    reprintButton.pack(pady=10)
+
+    analyticsStartVar = tk.StringVar()
+    analyticsEndVar = tk.StringVar()
+
+    ttk.Label(analyticsTab, text="Start Date (MM/DD/YYYY)").pack(pady=5)
+    ttk.Entry(analyticsTab, textvariable=analyticsStartVar, width=20).pack()
+    ttk.Label(analyticsTab, text="End Date (MM/DD/YYYY)").pack(pady=5)
+    ttk.Entry(analyticsTab, textvariable=analyticsEndVar, width=20).pack()
+
+    def waitForAnalytics(future):
+        """
+        Opens the analytics report once the analytics thread has written it. Runs on
+        the Tk thread via after().
+        """
+        if not future.done():
+            window.after(100, waitForAnalytics, future)
+            return
+        if not analyticsButton.winfo_exists():
+            return
+        analyticsButton.config(state="normal")
+        try:
+            filename = future.result()
+        except Exception as e:
+            print(f"Error generating analytics report: {e}")
+            messagebox.showerror("Analytics", "The analytics report could not be generated.")
+            return
+        if filename is None:
+            messagebox.showinfo("No Sales Found", "No sales records found for the selected period.")
+            return
+        os.startfile(filename)
+
+    def generateAnalyticsReport():
+        """
+        Builds the analytics report for the dates entered in the background.
+        """
+        try:
+            startDate = datetime.datetime.strptime(analyticsStartVar.get().strip(), "%m/%d/%Y").date()
+            endDate = datetime.datetime.strptime(analyticsEndVar.get().strip(), "%m/%d/%Y").date()
+        except ValueError:
+            messagebox.showerror("Date Error", "Please enter valid dates in MM/DD/YYYY format.")
+            return
+        if endDate < startDate:
+            messagebox.showerror("Date Error", "The end date must not be before the start date.")
+            return
+        analyticsButton.config(state="disabled")
+        waitForAnalytics(Analytics.queueReport(startDate, endDate))
+
+    analyticsButton = ttk.Button(analyticsTab, text="Generate Analytics Report", command=generateAnalyticsReport)
+    analyticsButton.pack(pady=10)
+
+    bundleStartVar = tk.StringVar()
+    bundleEndVar = tk.StringVar()
+    bundleStatusVar = tk.StringVar()
+
+    ttk.Label(bundleTab, text="Start Date (MM/DD/YYYY)").pack(pady=5)
+    ttk.Entry(bundleTab, textvariable=bundleStartVar, width=20).pack()
+    ttk.Label(bundleTab, text="End Date (MM/DD/YYYY)").pack(pady=5)
+    ttk.Entry(bundleTab, textvariable=bundleEndVar, width=20).pack()
+
+    def waitForBundle(batch):
+        """
+        Shows the progress of a report batch, and opens its index once it has finished.
+        Runs on the Tk thread via after().
+        """
+        if not bundleButton.winfo_exists():
+            return
+        bundleProgress.config(maximum=batch["total"], value=batch["done"])
+        bundleStatusVar.set(f"Built {batch['done']} of {batch['total']} reports")
+        if not batch["finished"]:
+            window.after(200, waitForBundle, batch)
+            return
+        bundleButton.config(state="normal")
+        if batch["index"] is None:
+            bundleStatusVar.set("")
+            messagebox.showerror("Report Bundle", "The report bundle could not be built.")
+            return
+        if batch["failed"]:
+            messagebox.showwarning("Report Bundle", f"{batch['failed']} reports could not be built. See the bundle index for details.")
+        os.startfile(batch["index"])
+
+    def buildReportBundle():
+        """
+        Starts building every sales, inventory and analytics report for the dates entered.
+        """
+        try:
+            startDate = datetime.datetime.strptime(bundleStartVar.get().strip(), "%m/%d/%Y").date()
+            endDate = datetime.datetime.strptime(bundleEndVar.get().strip(), "%m/%d/%Y").date()
+        except ValueError:
+            messagebox.showerror("Date Error", "Please enter valid dates in MM/DD/YYYY format.")
+            return
+        if endDate < startDate:
+            messagebox.showerror("Date Error", "The end date must not be before the start date.")
+            return
+        batch = ReportBatch.startBatch(startDate, endDate)
+        if batch is None:
+            messagebox.showinfo("Report Bundle", "A report bundle is already being built.")
+            return
+        bundleButton.config(state="disabled")
+        waitForBundle(batch)
+
+    bundleButton = ttk.Button(bundleTab, text="Build Report Bundle", command=buildReportBundle)
+    bundleButton.pack(pady=10)
+    bundleProgress = ttk.Progressbar(bundleTab, length=300, mode="determinate")
+    bundleProgress.pack(pady=5)
+    ttk.Label(bundleTab, textvariable=bundleStatusVar).pack()
+
     def back():
         """
         Clears the current screen and navigates back to the manager main page.
@@ -5,6 +5,7 @@ import Helper as h
 import Manager
 import Help
 import AddInventory
+import LiveSearch
 
 def updateInventoryPage(window, personID):
     """
@@ -35,19 +36,26 @@ def updateInventoryPage(window, personID):
     searchEntry = ttk.Entry(searchFrame, width=50)
     searchEntry.pack(side="left", padx=5)
 
-    def searchInventory():
+    def findItems(keyword):
         """
-        Searches inventory based on the keyword entered in the search bar.
+        Searches inventory for the keyword. Runs on a worker thread.
 
-        If the input is empty, no results are shown.
-        Populates the tree view with search results.
+        If the keyword is empty, no results are returned.
         """
-        keyword = searchEntry.get().strip()
         if keyword:
-            items = db.searchInventoryManager(keyword)
-        else:
-            items = []
-        refreshTree(items)
+            return db.searchInventoryManager(keyword)
+        return []
+
+    # Search as the manager types; results fill the tree view
+    liveSearch = LiveSearch.bindLiveSearch(searchEntry, lambda: searchEntry.get().strip(),
+                                           findItems, lambda items: refreshTree(items), initialQuery="")
+
+    def searchInventory():
+        """
+        Searches inventory based on the keyword entered in the search bar, straight away.
+        Also used to refresh the results after an item is changed.
+        """
+        liveSearch(delay=0, force=True)
 
     searchButton = ttk.Button(searchFrame, text="Search", command=searchInventory)
     searchButton.pack(side="left", padx=5)
@@ -0,0 +1,58 @@
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Shared set-up for the benchmark scripts. Each benchmark runs against its own
+# scratch Cars2U.db, never the real one.
+
+REPO_FOLDER = Path(__file__).resolve().parent.parent
+
+def useScratchHome():
+    """
+    Points the home folder, and with it Cars2U.db, at a new scratch folder and puts
+    the application modules on the path. Must be called before LocalDatabase or
+    DBLibrary is imported, as they fix the database path on import.
+
+    Returns:
+        str: The scratch home folder.
+    """
+    home = tempfile.mkdtemp(prefix="cars2u-bench-")
+    # Path.home() reads USERPROFILE on Windows and HOME elsewhere
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+    sys.path.insert(0, str(REPO_FOLDER))
+    return home
+
+def removeScratchHome(home):
+    """
+    Closes the database connections and deletes a scratch home folder.
+    """
+    if "DBLibrary" in sys.modules:
+        sys.modules["DBLibrary"].closeConnections()
+    shutil.rmtree(home, ignore_errors=True)
+
+def buildDatabase():
+    """
+    Creates the sample database, fully migrated, in the scratch home folder.
+
+    Returns:
+        str: Path of the database file.
+    """
+    import LocalDatabase
+
+    cwd = os.getcwd()
+    # populateImages reads productImages relative to the working folder
+    os.chdir(REPO_FOLDER)
+    try:
+        LocalDatabase.createLocalDatabase()
+    finally:
+        os.chdir(cwd)
+    return LocalDatabase.DB_NAME
+
+def percentile(values, share):
+    """
+    Returns the value below which the given share (0 to 1) of the sorted values fall.
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(share * len(values)))] if values else 0.0
@@ -0,0 +1,119 @@
+import io
+import time
+import random
+import argparse
+from datetime import date, timedelta
+from contextlib import redirect_stdout
+from common import useScratchHome, removeScratchHome, buildDatabase, percentile
+
+# Monthly report filters on a large order history. --orders orders (one line each)
+# are spread evenly over --years years and one month is read back with each form of
+# date predicate the reports have used. Wrapping OrderDate in strftime() or date()
+# makes SQLite scan every order; the half-open range on the bare ISO column
+# (Migrations.normalizeOrderDates) seeks idx_Orders_OrderDate.
+#
+#   python benchmarks/date_ranges.py [--orders 1000000] [--years 4] [--repeats 5]
+
+MONTH_SQL = """
+    SELECT COUNT(*), SUM(od.Quantity * od.UnitPrice)
+    FROM Orders o
+    JOIN OrderDetails od ON od.OrderID = o.OrderID
+    WHERE {}
+"""
+
+def predicates(month):
+    """
+    Returns (name, WHERE clause, parameters) for each way of selecting a month's orders.
+    """
+    nextMonth = (month + timedelta(days=31)).replace(day=1)
+    return [
+        ("strftime", "strftime('%Y', o.OrderDate) = ? AND strftime('%m', o.OrderDate) = ?",
+         (str(month.year), f"{month.month:02d}")),
+        ("date() BETWEEN", "date(o.OrderDate) BETWEEN ? AND ?",
+         (month.isoformat(), (nextMonth - timedelta(days=1)).isoformat())),
+        ("half-open range", "o.OrderDate >= ? AND o.OrderDate < ?", (month.isoformat(), nextMonth.isoformat())),
+    ]
+
+def addOrders(count, years):
+    """
+    Adds count orders of one unit each, spread evenly over the given number of years
+    up to today, through the normal inserts (and so the rollup triggers).
+
+    Returns:
+        datetime.date: The first day of the history.
+    """
+    import DBLibrary as db
+
+    random.seed(1)
+    firstDay = date.today() - timedelta(days=365 * years)
+    days = (date.today() - firstDay).days
+    with db.dbConnection() as conn:
+        personIDs = [row[0] for row in conn.execute("SELECT PersonID FROM Person")]
+        items = conn.execute("SELECT InventoryID, ItemName, RetailPrice, Cost FROM Inventory").fetchall()
+        orderID = conn.execute("SELECT COALESCE(MAX(OrderID), 0) FROM Orders").fetchone()[0]
+        orders = []
+        lines = []
+        for index in range(count):
+            orderID += 1
+            inventoryID, name, price, cost = random.choice(items)
+            orders.append((orderID, random.choice(personIDs), (firstDay + timedelta(days=index * days // count)).isoformat()))
+            lines.append((orderID, inventoryID, name, price, price * 0.07, cost))
+        conn.executemany("""
+            INSERT INTO Orders (OrderID, PersonID, OrderDate, CC_Number, ExpDate, CCV)
+            VALUES (?, ?, ?, '4111111111111111', '12/30', '123')
+        """, orders)
+        conn.executemany("""
+            INSERT INTO OrderDetails (OrderID, InventoryID, Quantity, ItemName, UnitPrice, TaxAmount, UnitCost)
+            VALUES (?, ?, 1, ?, ?, ?, ?)
+        """, lines)
+        conn.commit()
+        conn.execute("ANALYZE")
+    return firstDay
+
+def timeCall(function, repeats):
+    """
+    Returns the median time in ms of calling function repeatedly.
+    """
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentile(latencies, 0.5)
+
+def main():
+    parser = argparse.ArgumentParser(description="Monthly report date filters on a large order history.")
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    home = useScratchHome()
+    try:
+        with redirect_stdout(io.StringIO()):
+            buildDatabase()
+        import DBLibrary as db
+
+        start = time.perf_counter()
+        firstDay = addOrders(args.orders, args.years)
+        # A full month in the middle of the history
+        month = (firstDay + timedelta(days=365 * args.years // 2)).replace(day=1)
+        print(f"Added {args.orders} orders from {firstDay} in {time.perf_counter() - start:.1f} s; "
+              f"reading {month:%B %Y}, median of {args.repeats} runs")
+
+        with db.dbConnection() as conn:
+            for name, where, params in predicates(month):
+                sql = MONTH_SQL.format(where)
+                plan = "; ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+                count = conn.execute(sql, params).fetchone()[0]
+                elapsed = timeCall(lambda: conn.execute(sql, params).fetchall(), args.repeats)
+                print(f"{name:<16} {count:>7} orders {elapsed:>8.1f} ms   {plan}")
+
+        nextMonth = (month + timedelta(days=31)).replace(day=1)
+        print(f"{'getReceiptOrders':<16} {timeCall(lambda: db.getReceiptOrders(month, nextMonth - timedelta(days=1)), args.repeats):>23.1f} ms")
+        print(f"{'getSalesByMonth':<16} {timeCall(lambda: db.getSalesByMonth(month.month, month.year), args.repeats):>23.1f} ms")
+    finally:
+        removeScratchHome(home)
+
+if __name__ == "__main__":
+    main()
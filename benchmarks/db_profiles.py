@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import argparse
+import threading
+import subprocess
+from common import useScratchHome, removeScratchHome, buildDatabase, percentile
+
+# Read/write concurrency under each database performance profile
+# (LocalDatabase.PERFORMANCE_PROFILES). Several reader threads browse the catalog
+# and check cart stock while one writer checks out orders, for a fixed time. Each
+# profile runs in its own process against its own fresh database, since the journal
+# mode is a property of the file.
+#
+#   python benchmarks/db_profiles.py [--profiles legacy standard] [--readers 4] [--seconds 5]
+
+def runWorkload(readers, seconds):
+    """
+    Runs the readers and the writer against the scratch database for the given time.
+
+    Returns:
+        dict: Reader latencies in ms, read and write counts and failures.
+    """
+    import DBLibrary as db
+
+    with db.dbConnection() as conn:
+        inventoryIDs = [row[0] for row in conn.execute("SELECT InventoryID FROM Inventory")]
+        personID = conn.execute("SELECT PersonID FROM Person ORDER BY PersonID LIMIT 1").fetchone()[0]
+        # Plenty of stock so the writer never runs out
+        conn.execute("UPDATE Inventory SET Quantity = 1000000, Discontinued = 0")
+        conn.commit()
+
+    stop = threading.Event()
+    latencies = [[] for _ in range(readers)]
+    writes = []
+    failures = []
+
+    def read(index):
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                db.searchInventory("", "All", 0, 20)
+                db.getCartStatus(inventoryIDs[:5])
+            except Exception as e:
+                failures.append(e)
+            latencies[index].append((time.perf_counter() - start) * 1000)
+
+    def write():
+        cart = [{"InventoryID": inventoryIDs[0], "name": "Benchmark item", "package": None, "price": 100.0, "quantity": 1}]
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                db.commitOrder(personID, None, "4111111111111111", "12/30", "123", cart)
+            except Exception as e:
+                failures.append(e)
+            writes.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=read, args=(index,)) for index in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    reads = [latency for readerLatencies in latencies for latency in readerLatencies]
+    return {"reads": reads, "writes": writes, "failures": len(failures)}
+
+def runProfile(profile, readers, seconds):
+    """
+    Builds a fresh database under the profile and prints its workload timings. Runs
+    in the child process started for the profile by main.
+    """
+    home = useScratchHome()
+    try:
+        buildDatabase()
+        result = runWorkload(readers, seconds)
+    finally:
+        removeScratchHome(home)
+    reads, writes = result["reads"], result["writes"]
+    print(f"{profile:<10} {len(reads) / seconds:>9.0f} {percentile(reads, 0.5):>8.2f} {percentile(reads, 0.99):>8.2f} "
+          f"{max(reads, default=0):>8.1f} {len(writes) / seconds:>9.0f} {percentile(writes, 0.5):>8.2f} "
+          f"{percentile(writes, 0.99):>8.2f} {result['failures']:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Read/write concurrency under each database performance profile.")
+    parser.add_argument("--profiles", nargs="+", default=["legacy", "standard"])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        runProfile(args.child, args.readers, args.seconds)
+        return
+
+    print(f"{args.readers} readers and 1 writer for {args.seconds:g} s per profile; times in ms")
+    print(f"{'profile':<10} {'reads/s':>9} {'read p50':>8} {'read p99':>8} {'read max':>8} "
+          f"{'writes/s':>9} {'write p50':>8} {'write p99':>8} {'failures':>8}")
+    for profile in args.profiles:
+        # The profile is chosen per deployment through the environment, as in production
+        env = dict(os.environ, CARS2U_DB_PROFILE=profile)
+        completed = subprocess.run([sys.executable, __file__, "--child", profile, "--readers", str(args.readers),
+                                    "--seconds", str(args.seconds)], env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"{profile:<10} failed:\n{completed.stderr}")
+            continue
+        # The application's own start-up messages come first; the timings are the last line
+        print(completed.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    main()
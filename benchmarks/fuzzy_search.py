@@ -0,0 +1,95 @@
+import io
+import time
+import random
+import argparse
+from contextlib import redirect_stdout
+from common import useScratchHome, removeScratchHome, buildDatabase, percentile
+
+# Latency of DBLibrary.fuzzySearchInventory at catalog scale. The sample inventory is
+# grown to --rows items (every make and model in every trim, year and colour) through
+# the normal Inventory inserts, so the InventoryFuzzy triggers index them as the
+# application would. Searches are then timed against FUZZY_TIME_BUDGET_MS. Only text
+# the full-text InventorySearch finds nothing for falls back to the fuzzy search, so
+# the queries are the kind of misspellings that do: short ones, and long ones whose
+# common trigrams ("che", "ion", "ter") match a large share of the catalog.
+#
+#   python benchmarks/fuzzy_search.py [--rows 100000] [--repeats 20]
+
+QUERIES = ["silverdo", "rav 4", "mach e", "f150", "odysey", "ionic 5", "toyta", "camery 2021",
+           "grnad cherokee", "pacifca limted", "tesla modle 3", "chevrolet silverdo"]
+
+TRIMS = ["Base", "LE", "SE", "XLE", "XLT", "Lariat", "Touring", "Sport", "Limited", "Platinum",
+         "Premium", "Long Range", "Performance", "Standard Range"]
+COLOURS = ["Red", "Blue", "Black", "White", "Silver", "Grey", "Green", "Orange", "Yellow", "Brown",
+           "Bronze", "Pearl"]
+
+def growInventory(rows):
+    """
+    Adds sample items until the inventory holds the given number of rows.
+    """
+    import DBLibrary as db
+
+    random.seed(1)
+    with db.dbConnection() as conn:
+        models = conn.execute("SELECT ItemName, ItemDescription, CategoryID, RetailPrice, Cost FROM Inventory").fetchall()
+        missing = rows - conn.execute("SELECT COUNT(*) FROM Inventory").fetchone()[0]
+        items = []
+        for index in range(missing):
+            name, description, categoryID, price, cost = models[index % len(models)]
+            year = 2000 + (index // len(models)) % 25
+            items.append((f"{year} {name} {random.choice(TRIMS)} {random.choice(COLOURS)}", description, categoryID,
+                          price, cost, random.randint(1, 5), 1))
+        conn.executemany("""
+            INSERT INTO Inventory (ItemName, ItemDescription, CategoryID, RetailPrice, Cost, Quantity, RestockThreshold, Discontinued)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+        """, items)
+        conn.commit()
+
+def timeQuery(keyword, repeats):
+    """
+    Runs one search repeatedly.
+
+    Returns:
+        tuple: (latencies in ms, most results returned, times the budget cut the search off).
+    """
+    import DBLibrary as db
+
+    latencies = []
+    found = 0
+    stopped = 0
+    for _ in range(repeats):
+        output = io.StringIO()
+        start = time.perf_counter()
+        with redirect_stdout(output):
+            results = db.fuzzySearchInventory(keyword, "All")
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = max(found, len(results))
+        stopped += "stopped after" in output.getvalue()
+    return latencies, found, stopped
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of the fuzzy inventory search at catalog scale.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    home = useScratchHome()
+    try:
+        with redirect_stdout(io.StringIO()):
+            buildDatabase()
+        import DBLibrary as db
+
+        start = time.perf_counter()
+        growInventory(args.rows)
+        print(f"Indexed {args.rows} inventory rows in {time.perf_counter() - start:.1f} s; "
+              f"budget {db.FUZZY_TIME_BUDGET_MS} ms, {args.repeats} runs per query, times in ms")
+        print(f"{'query':<16} {'results':>7} {'p50':>7} {'p95':>7} {'max':>7} {'cut off':>8}")
+        for keyword in QUERIES:
+            latencies, results, stopped = timeQuery(keyword, args.repeats)
+            print(f"{keyword:<16} {results:>7} {percentile(latencies, 0.5):>7.1f} {percentile(latencies, 0.95):>7.1f} "
+                  f"{max(latencies):>7.1f} {stopped:>8}")
+    finally:
+        removeScratchHome(home)
+
+if __name__ == "__main__":
+    main()
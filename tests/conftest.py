@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+import pytest
+
+# LocalDatabase and DBLibrary fix their database path from the home folder when they
+# are imported, so point it at a scratch folder first (HOME, or USERPROFILE on
+# Windows). Worker processes started by the tests inherit it through the environment.
+os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="cars2u-tests-")
+REPO_FOLDER = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_FOLDER))
+
+import LocalDatabase
+
+@pytest.fixture(scope="session")
+def database():
+    """
+    Builds a fresh, fully migrated Cars2U.db once for the test session.
+
+    Returns:
+        str: Path of the database file.
+    """
+    cwd = os.getcwd()
+    # populateImages reads productImages relative to the working folder
+    os.chdir(REPO_FOLDER)
+    try:
+        LocalDatabase.createLocalDatabase()
+    finally:
+        os.chdir(cwd)
+    return LocalDatabase.DB_NAME
@@ -0,0 +1,72 @@
+from datetime import date
+import pytest
+
+MONTH = (date(2024, 1, 1), date(2024, 1, 31))
+
+# Hot lookups that must be answered from an index (see Migrations.addSecondaryIndexes
+# and the migrations after it)
+LOOKUPS = [
+    ("testLogin", ("customer", "password")),
+    ("userExists", ("customer",)),
+    ("getOrdersByCustomer", (1,)),
+    ("getFavorites", (1,)),
+    ("getProductPackages", (1,)),
+    ("validatePromoCode", ("SAVE10",)),
+    ("getOrderReceipt", (1,)),
+    ("getReceiptOrders", MONTH),
+    ("seekInventory", ("trucks", 1)),
+    ("searchInventoryFiltered", ("ford", "All", None, 0, 12)),
+    ("searchInventoryFiltered", ("", "trucks", None, 12, 12)),
+    ("getCartStatus", ([1, 2, 3],)),
+    ("getSalesSummary", MONTH),
+    ("iterItemSales", MONTH),
+]
+
+def capturedQueries(db, name, args, monkeypatch):
+    """
+    Calls a DBLibrary function and returns the SELECTs it ran, with their parameters bound.
+    Generators are run to the end.
+    """
+    statements = []
+    connect = db.connect
+
+    def tracedConnect():
+        # Streaming generators read on a connection of their own
+        conn = connect()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(db, "connect", tracedConnect)
+    with db.dbConnection() as conn:
+        # Nested dbConnection blocks reuse this connection, so the trace sees every query
+        conn.set_trace_callback(statements.append)
+        try:
+            result = getattr(db, name)(*args)
+            if hasattr(result, "__next__"):
+                list(result)
+        finally:
+            conn.set_trace_callback(None)
+    # FTS5 reads its own shadow tables ('main'.'InventorySearch_config' and so on) through
+    # the same connection; those are SQLite's business, not DBLibrary's
+    return [sql for sql in statements if sql.lstrip().upper().startswith("SELECT") and "'main'." not in sql]
+
+def tableScans(conn, sql):
+    """
+    Returns the plan steps of a query that read a whole table instead of an index.
+    Full-text and json_each virtual tables answer from their own indexes, and a
+    CONSTANT ROW is the single row of a SELECT with no FROM.
+    """
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+    return [detail for _, _, _, detail in plan
+            if detail.startswith("SCAN ") and "USING INDEX" not in detail and "USING COVERING INDEX" not in detail
+            and "VIRTUAL TABLE" not in detail and detail != "SCAN CONSTANT ROW"]
+
+@pytest.mark.parametrize("name, args", LOOKUPS, ids=[f"{name}{args}" for name, args in LOOKUPS])
+def test_lookup_uses_indexes(database, monkeypatch, name, args):
+    import DBLibrary as db
+
+    queries = capturedQueries(db, name, args, monkeypatch)
+    assert queries, f"{name} ran no query"
+    with db.dbConnection() as conn:
+        for sql in queries:
+            assert tableScans(conn, sql) == [], sql
@@ -0,0 +1,59 @@
+import sqlite3
+import time
+import multiprocessing
+
+WORKERS = 4
+STOCK = 5
+ATTEMPTS = 20
+
+def buyOne(workerID, inventoryID, personID):
+    """
+    Tries to buy one unit of an item ATTEMPTS times the way a cart does: hold it, then
+    check out. Runs in a worker process.
+
+    Returns:
+        tuple: (units sold, checkouts attempted, seconds spent), not counting process start-up.
+    """
+    import DBLibrary as db
+
+    sold = 0
+    start = time.perf_counter()
+    for attempt in range(ATTEMPTS):
+        holderKey = f"test-{workerID}-{attempt}"
+        if db.placeHold(holderKey, inventoryID, 1) < 1:
+            continue
+        cart = [{"InventoryID": inventoryID, "name": "Contended item", "package": None, "price": 100.0, "quantity": 1}]
+        try:
+            db.commitOrder(personID, None, "4111111111111111", "12/30", "123", cart, holderKey=holderKey)
+            sold += 1
+        except ValueError:
+            db.releaseHolds(holderKey)
+    return sold, ATTEMPTS, time.perf_counter() - start
+
+def test_concurrent_checkouts_never_oversell(database, capsys):
+    conn = sqlite3.connect(database)
+    inventoryID = conn.execute("SELECT InventoryID FROM Inventory ORDER BY InventoryID LIMIT 1").fetchone()[0]
+    personID = conn.execute("SELECT PersonID FROM Person ORDER BY PersonID LIMIT 1").fetchone()[0]
+    conn.execute("UPDATE Inventory SET Quantity = ? WHERE InventoryID = ?", (STOCK, inventoryID))
+    conn.execute("DELETE FROM StockHold WHERE InventoryID = ?", (inventoryID,))
+    conn.commit()
+    ordersBefore = conn.execute("SELECT COUNT(*) FROM OrderDetails WHERE InventoryID = ?", (inventoryID,)).fetchone()[0]
+
+    with multiprocessing.get_context("spawn").Pool(WORKERS) as pool:
+        results = pool.starmap(buyOne, [(workerID, inventoryID, personID) for workerID in range(WORKERS)])
+
+    sold = sum(units for units, _, _ in results)
+    attempts = sum(tries for _, tries, _ in results)
+    elapsed = max(seconds for _, _, seconds in results)
+    onHand = conn.execute("SELECT Quantity FROM Inventory WHERE InventoryID = ?", (inventoryID,)).fetchone()[0]
+    lines = conn.execute("SELECT COUNT(*) FROM OrderDetails WHERE InventoryID = ?", (inventoryID,)).fetchone()[0]
+    conn.close()
+
+    with capsys.disabled():
+        print(f"\n{WORKERS} workers: {attempts} checkout attempts on {STOCK} units in {elapsed:.2f} s "
+              f"({attempts / elapsed:.0f} attempts/s), {sold} sold")
+
+    assert sold <= STOCK
+    assert onHand >= 0
+    assert onHand == STOCK - sold
+    assert lines - ordersBefore == sold